@@ -2,3 +2,8 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 from . import models
+from .models.account_move import fill_impacting_cash_basis
+
+
+def _pre_init_impacting_cash_basis(env):
+    fill_impacting_cash_basis(env.cr)
@@ -2,6 +2,7 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 {
     'name' : 'Cash Basis Accounting Reports',
+    'version': '1.1',
     'summary': 'Add cash basis functionality for reports',
     'category': 'Accounting/Accounting',
     'description': """
@@ -11,6 +12,7 @@ Cash Basis for Accounting Reports
     'depends': ['account_reports'],
     'data': [
         'data/account_reports_data.xml',
+        'data/ir_cron_data.xml',
         'views/account_report_view.xml',
     ],
     'assets': {
@@ -19,5 +21,6 @@ Cash Basis for Accounting Reports
         ],
     },
     'installable': True,
+    'pre_init_hook': '_pre_init_impacting_cash_basis',
     'license': 'OEEL-1',
 }
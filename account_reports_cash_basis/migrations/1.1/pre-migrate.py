@@ -0,0 +1,7 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+from odoo.addons.account_reports_cash_basis.models.account_move import fill_impacting_cash_basis
+
+
+def migrate(cr, version):
+    # impacting_cash_basis became stored, fill it by batches before the ORM recomputes it for every move.
+    fill_impacting_cash_basis(cr)
@@ -3,4 +3,6 @@
 
 from . import account_move
 from . import account_move_line
+from . import account_partial_reconcile
 from . import account_report
+from . import ir_config_parameter
@@ -1,48 +1,84 @@
-from odoo import fields, models
+import logging
+
+from odoo import api, fields, models
 from odoo.tools import SQL
 
+_logger = logging.getLogger(__name__)
+
+IMPACTING_CASH_BASIS_BATCH_SIZE = 50000
+
+
+def fill_impacting_cash_basis(cr, batch_size=IMPACTING_CASH_BASIS_BATCH_SIZE):
+    """ Create and fill the impacting_cash_basis column of account_move by ranges of ids, so that installing or
+    upgrading the module neither recomputes every move through the ORM nor updates the whole table at once.
+    """
+    cr.execute("ALTER TABLE account_move ADD COLUMN IF NOT EXISTS impacting_cash_basis boolean")
+    cr.execute("SELECT MIN(id), MAX(id) FROM account_move")
+    min_id, max_id = cr.fetchone()
+    if min_id is None:
+        return
+    for start_id in range(min_id, max_id + 1, batch_size):
+        cr.execute(SQL(
+            """
+            UPDATE account_move move
+               SET impacting_cash_basis = (
+                       journal.type IN ('cash', 'bank')
+                       OR NOT EXISTS (
+                           SELECT 1
+                             FROM account_move_line aml
+                             JOIN account_account account ON aml.account_id = account.id
+                            WHERE aml.move_id = move.id
+                              AND account.account_type IN ('asset_receivable', 'liability_payable')
+                       )
+                       OR EXISTS (
+                           SELECT 1
+                             FROM account_move_line aml
+                             JOIN account_account account ON aml.account_id = account.id
+                             JOIN account_partial_reconcile part ON aml.id IN (part.debit_move_id, part.credit_move_id)
+                            WHERE aml.move_id = move.id
+                              AND account.account_type IN ('asset_receivable', 'liability_payable')
+                       )
+                   )
+              FROM account_journal journal
+             WHERE journal.id = move.journal_id
+               AND move.id >= %s AND move.id < %s
+            """,
+            start_id, start_id + batch_size,
+        ))
+        _logger.info("Computed impacting_cash_basis of account moves %s to %s", start_id, min(start_id + batch_size, max_id + 1) - 1)
+
+
 
 class AccountMove(models.Model):
     _name = "account.move"
     _inherit = "account.move"
 
-    impacting_cash_basis = fields.Boolean(store=False, search='_search_impacting_cash_basis')
+    impacting_cash_basis = fields.Boolean(compute='_compute_impacting_cash_basis', store=True, index=True)
+
+    def write(self, vals):
+        # Posting, cancelling or resetting a move changes its lines in the cash basis table.
+        if vals.keys() & {'state', 'date', 'journal_id'}:
+            self.env['account.report']._mark_cash_basis_moves(self.ids)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['account.report']._mark_cash_basis_moves(self.ids)
+        return super().unlink()
 
-    def _search_impacting_cash_basis(self, operator, value):
+    @api.depends('journal_id.type', 'line_ids.account_id.account_type', 'line_ids.matched_debit_ids', 'line_ids.matched_credit_ids')
+    def _compute_impacting_cash_basis(self):
         """
-        Searches moves that impact the cash basis:
+        Moves that impact the cash basis:
             - Move with cash or bank journals
             - Move without any receivable or payable line
             - Move with a receivable or payable line and a partial is associated, specifically with a receivable or payable line
         """
-
-        sql = SQL("""(
-            WITH moves_with_receivable_payable AS (
-                SELECT DISTINCT aml.move_id as id
-                FROM account_move_line aml
-                JOIN account_account account ON aml.account_id = account.id
-                WHERE account.account_type IN ('asset_receivable', 'liability_payable')
-            ), 
-            reconciled_move_on_receivable_payable AS (
-                SELECT DISTINCT aml.move_id as id
-                FROM account_partial_reconcile part
-                JOIN account_move_line aml ON aml.id = part.debit_move_id OR aml.id = part.credit_move_id
-                JOIN account_account account ON aml.account_id = account.id
-                WHERE account.account_type IN ('asset_receivable', 'liability_payable')
+        for move in self:
+            receivable_payable_lines = move.line_ids.filtered(
+                lambda line: line.account_id.account_type in ('asset_receivable', 'liability_payable')
+            )
+            move.impacting_cash_basis = (
+                move.journal_id.type in ('cash', 'bank')
+                or not receivable_payable_lines
+                or bool(receivable_payable_lines.matched_debit_ids or receivable_payable_lines.matched_credit_ids)
             )
-            SELECT DISTINCT move.id
-            FROM account_move move
-            LEFT JOIN account_journal journal ON journal.id = move.journal_id
-            LEFT JOIN moves_with_receivable_payable move_rp on move_rp.id = move.id
-            LEFT JOIN reconciled_move_on_receivable_payable rec_move on rec_move.id = move.id
-            WHERE
-                journal.type IN ('cash', 'bank')
-                OR
-                move_rp.id IS NULL
-                OR 
-                rec_move.id IS NOT NULL
-        )""")
-
-        # op is 'in' if (impacting_cash_basis, '=', True) or (impacting_cash_basis, '!=', False), 'not in' otherwise
-        op = 'in' if (operator == '=') ^ (value is False) else 'not in'
-        return [('id', op, sql)]
@@ -1,5 +1,7 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
-from odoo import models
+import time
+
+from odoo import api, models
 from odoo.tools import SQL
 
 
@@ -7,6 +9,22 @@ class AccountMoveLine(models.Model):
     _name = "account.move.line"
     _inherit = "account.move.line"
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['account.report']._mark_cash_basis_moves(lines.move_id.ids)
+        return lines
+
+    def write(self, vals):
+        moves = self.move_id
+        res = super().write(vals)
+        self.env['account.report']._mark_cash_basis_moves((moves | self.move_id).ids)
+        return res
+
+    def unlink(self):
+        self.env['account.report']._mark_cash_basis_moves(self.move_id.ids)
+        return super().unlink()
+
     def _where_calc(self, domain, active_test=True):
         """ In case of cash basis for reports, we need to shadow the table account_move_line to get amounts
         based on cash.
@@ -14,10 +32,14 @@ class AccountMoveLine(models.Model):
         """
         query = super()._where_calc(domain, active_test)
         if self.env.context.get('account_report_cash_basis'):
+            start = time.perf_counter()
             self.env['account.report']._prepare_lines_for_cash_basis()
             if self.env.context.get('account_report_analytic_groupby'):
-                self.env['account.report']._prepare_lines_for_analytic_groupby_with_cash_basis()
-                query._tables['account_move_line'] = SQL.identifier('analytic_cash_basis_temp_account_move_line')
+                table = self.env['account.report']._prepare_lines_for_analytic_groupby_with_cash_basis()
             else:
-                query._tables['account_move_line'] = SQL.identifier('cash_basis_temp_account_move_line')
+                table = self.env['account.report']._get_cash_basis_table()
+            query._tables['account_move_line'] = SQL.identifier(table)
+            timings = self.env.context.get('account_report_cash_basis_timings')
+            if timings is not None:
+                timings['prepare'] += time.perf_counter() - start
         return query
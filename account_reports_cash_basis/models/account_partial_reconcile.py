@@ -0,0 +1,21 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+from odoo import api, models
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = "account.partial.reconcile"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        partials._mark_cash_basis_moves()
+        return partials
+
+    def unlink(self):
+        self._mark_cash_basis_moves()
+        return super().unlink()
+
+    def _mark_cash_basis_moves(self):
+        """ The cash basis lines of a move are prorated on the partials of its receivable and payable lines. """
+        moves = self.debit_move_id.move_id | self.credit_move_id.move_id
+        self.env['account.report']._mark_cash_basis_moves(moves.ids)
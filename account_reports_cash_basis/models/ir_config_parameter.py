@@ -0,0 +1,31 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+from odoo import api, models
+
+from .account_report import PERSISTENT_TABLE_PARAM
+
+
+class IrConfigParameter(models.Model):
+    _inherit = "ir.config_parameter"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        params = super().create(vals_list)
+        params._reset_cash_basis_table()
+        return params
+
+    def write(self, vals):
+        self._reset_cash_basis_table()
+        res = super().write(vals)
+        self._reset_cash_basis_table()
+        return res
+
+    def unlink(self):
+        self._reset_cash_basis_table()
+        return super().unlink()
+
+    def _reset_cash_basis_table(self):
+        """ The moves are not queued while the persistent cash basis table is disabled, so the table is dropped when
+        the option changes and rebuilt from scratch at its next use.
+        """
+        if PERSISTENT_TABLE_PARAM in self.mapped('key'):
+            self.env['account.report']._drop_cash_basis_table()
@@ -2,3 +2,4 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 from . import test_account_reports_cash_basis
+from . import test_account_reports_cash_basis_persistent
@@ -2,6 +2,7 @@
 # pylint: disable=C0326
 from odoo.tests import tagged
 from odoo import fields, Command
+from odoo.tools import SQL
 
 from odoo.addons.account_reports.tests.common import TestAccountReportsCommon
 
@@ -1011,6 +1012,109 @@ class TestAccountReports(TestAccountReportsCommon):
         # All 5 invoices, first 3 and last partially paid (2 payments on invoice_2)
         self.assert_line_values(report, '2016-03-10', [0, 620, 120, 1360.0], cash_basis=True, analytic=True)
 
+    def test_analytic_cash_basis_scoped_tables(self):
+        """
+            Tests that the analytic cash basis tables only hold the lines of the journals, analytic accounts and end
+            date of the report, and that one table is shared by the analytic columns of the same scope
+        """
+        second_account = self.env['account.analytic.account'].create({
+            'name': 'second account',
+            'plan_id': self.analytic_plan_departments.id,
+        })
+        misc_journal = self.company_data['default_journal_misc']
+        entries = self.env['account.move'].create([
+            {
+                'move_type': 'entry',
+                'date': '2016-01-01',
+                'journal_id': misc_journal.id,
+                'line_ids': [
+                    Command.create({'debit': 1000.0, 'credit': 0.0, 'account_id': self.receivable_account_1.id}),
+                    Command.create({'debit': 0.0, 'credit': 1000.0, 'account_id': self.revenue_account_1.id,
+                                    'analytic_distribution': {analytic_account.id: 100}}),
+                ],
+            }
+            for analytic_account in (self.analytic_account_partner_a_1, second_account)
+        ])
+        entries.action_post()
+
+        # Half of the first entry paid in February, the whole second entry paid in March.
+        payments = self.env['account.move'].create([
+            {
+                'move_type': 'entry',
+                'date': date,
+                'journal_id': self.liquidity_journal_1.id,
+                'line_ids': [
+                    Command.create({'debit': 0.0, 'credit': amount, 'account_id': self.receivable_account_1.id}),
+                    Command.create({'debit': amount, 'credit': 0.0, 'account_id': self.liquidity_account.id}),
+                ],
+            }
+            for date, amount in (('2016-02-01', 500.0), ('2016-03-01', 1000.0))
+        ])
+        payments.action_post()
+        for entry, payment in zip(entries, payments):
+            self._reconcile_on((entry + payment).line_ids, self.receivable_account_1)
+
+        report = self.env.ref('account_reports.balance_sheet')
+
+        def count_analytic_tables():
+            self.env.cr.execute("""
+                SELECT COUNT(*) FROM pg_class
+                 WHERE relname LIKE 'analytic_cash_basis_temp_account_move_line%'
+                   AND relkind = 'r' AND relnamespace = pg_my_temp_schema()
+            """)
+            return self.env.cr.fetchone()[0]
+
+        def assert_earnings(date_to, journals, expected_values):
+            options = self._generate_options(
+                report,
+                fields.Date.to_date('2016-01-01'),
+                fields.Date.to_date(date_to),
+                default_options={
+                    'analytic_accounts_groupby': [self.analytic_account_partner_a_1.id, second_account.id],
+                    'report_cash_basis': True,
+                },
+            )
+            for journal in options['journals']:
+                if journal.get('model') == 'account.journal':
+                    journal['selected'] = journal['id'] in journals.ids
+            lines = [line for line in report._get_lines(options) if line['name'] == 'Current Year Unallocated Earnings']
+            self.assertLinesValues(lines, [0, 1, 2, 3], [('Current Year Unallocated Earnings', *expected_values)], options)
+
+        # Analytic columns, then the total including the first invoice of the set up (460.0 paid)
+        assert_earnings('2016-12-31', self.env['account.journal'], [500.0, 1000.0, 1960.0])
+        # Both analytic columns share the scope of the report, hence its table
+        self.assertEqual(count_analytic_tables(), 1)
+
+        # The second entry is paid after the end date
+        assert_earnings('2016-02-29', self.env['account.journal'], [500.0, 0.0, 730.0])
+        # The revenue lines are in the miscellaneous journal, nothing is left with the bank journal alone
+        assert_earnings('2016-12-31', misc_journal, [500.0, 1000.0, 1960.0])
+        assert_earnings('2016-12-31', self.liquidity_journal_1, [0.0, 0.0, 0.0])
+        # One table per distinct scope
+        self.assertEqual(count_analytic_tables(), 4)
+
+        # Only the lines of the analytic accounts of the scope are copied
+        AccountReport = self.env['account.report'].with_context(
+            account_report_cash_basis=True,
+            account_report_cash_basis_scope={
+                'analytic_account_ids': (self.analytic_account_partner_a_1.id,),
+                'journal_ids': (misc_journal.id,),
+                'date_to': '2016-12-31',
+            },
+        )
+        AccountReport._prepare_lines_for_cash_basis()
+        table = AccountReport._prepare_lines_for_analytic_groupby_with_cash_basis()
+        self.env.cr.execute(SQL(
+            """
+            SELECT analytic_distribution::text, SUM(balance)
+              FROM %s
+             WHERE analytic_distribution IS NOT NULL
+          GROUP BY analytic_distribution::text
+            """,
+            SQL.identifier(table),
+        ))
+        self.assertEqual(self.env.cr.fetchall(), [(str(self.analytic_account_partner_a_1.id), -500.0)])
+
     def test_cash_basis_move_multi_account(self):
         receivable_account_2 = self.copy_account(self.receivable_account_1)
         receivable_account_3 = self.copy_account(self.receivable_account_1)
@@ -1112,3 +1216,39 @@ class TestAccountReports(TestAccountReportsCommon):
             ],
             options
         )
+
+    def test_impacting_cash_basis_stored(self):
+        invoice = self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': '2017-01-01',
+            'journal_id': self.company_data['default_journal_misc'].id,
+            'line_ids': [
+                (0, 0, {'debit': 100.0, 'credit': 0.0, 'account_id': self.receivable_account_1.id}),
+                (0, 0, {'debit': 0.0, 'credit': 100.0, 'account_id': self.revenue_account_1.id}),
+            ],
+        })
+        invoice.action_post()
+        payment = self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': '2017-02-01',
+            'journal_id': self.liquidity_journal_1.id,
+            'line_ids': [
+                (0, 0, {'debit': 0.0, 'credit': 40.0, 'account_id': self.receivable_account_1.id}),
+                (0, 0, {'debit': 40.0, 'credit': 0.0, 'account_id': self.liquidity_account.id}),
+            ],
+        })
+        payment.action_post()
+        self.assertRecordValues(invoice + payment, [
+            {'impacting_cash_basis': False},
+            {'impacting_cash_basis': True},
+        ])
+
+        self._reconcile_on((invoice + payment).line_ids, self.receivable_account_1)
+        self.assertTrue(invoice.impacting_cash_basis)
+        self.assertEqual(
+            self.env['account.move'].search([('id', 'in', (invoice + payment).ids), ('impacting_cash_basis', '=', True)]),
+            invoice + payment,
+        )
+
+        payment.line_ids.remove_move_reconcile()
+        self.assertFalse(invoice.impacting_cash_basis)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=C0326
+from odoo.tests import tagged
+from odoo import fields
+
+from odoo.addons.account_reports.tests.common import TestAccountReportsCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAccountReportsCashBasisPersistent(TestAccountReportsCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param('account_reports_cash_basis.persistent_table', True)
+
+        cls.liquidity_journal = cls.company_data['default_journal_bank']
+        cls.liquidity_account = cls.liquidity_journal.default_account_id
+        cls.receivable_account = cls.company_data['default_account_receivable']
+        cls.revenue_account = cls.company_data['default_account_revenue']
+
+        cls.invoice = cls.env['account.move'].create({
+            'move_type': 'entry',
+            'date': '2016-01-01',
+            'journal_id': cls.company_data['default_journal_misc'].id,
+            'line_ids': [
+                (0, 0, {'debit': 1150.0,    'credit': 0.0,      'account_id': cls.receivable_account.id}),
+                (0, 0, {'debit': 0.0,       'credit': 1150.0,   'account_id': cls.revenue_account.id}),
+            ],
+        })
+        cls.invoice.action_post()
+        # The table is built by the scheduled action, the reports read the temporary table until then
+        cls.env['account.report']._cron_refresh_cash_basis_table()
+
+    def _create_payment(self, date, amount):
+        payment = self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': date,
+            'journal_id': self.liquidity_journal.id,
+            'line_ids': [
+                (0, 0, {'debit': 0.0,       'credit': amount,   'account_id': self.receivable_account.id}),
+                (0, 0, {'debit': amount,    'credit': 0.0,      'account_id': self.liquidity_account.id}),
+            ],
+        })
+        payment.action_post()
+        (self.invoice + payment).line_ids.filtered(
+            lambda line: line.account_id == self.receivable_account and not line.reconciled
+        ).reconcile()
+        return payment
+
+    def _assert_revenue(self, expected):
+        report = self.env.ref('account_reports.general_ledger_report')
+        options = self._generate_options(report, fields.Date.from_string('2016-01-01'), fields.Date.from_string('2016-12-31'))
+        options['report_cash_basis'] = True
+        lines = [line for line in report._get_lines(options) if line['name'].endswith('Product Sales')]
+        self.assertEqual(
+            lines and lines[0]['columns'][-1]['no_format'] or 0.0,
+            expected,
+        )
+
+    def _queued_move_ids(self):
+        self.env.cr.execute("SELECT move_id FROM account_move_line_cash_basis_queue")
+        return {move_id for move_id, in self.env.cr.fetchall()}
+
+    def test_cash_basis_persistent_table_incremental(self):
+        self.env['res.currency'].search([('name', '!=', 'USD')]).with_context(force_deactivate=True).active = False
+        self._assert_revenue(0.0)
+
+        # The changes are queued, then applied when the report is opened again in the same transaction.
+        payment_1 = self._create_payment('2016-02-01', 230.0)
+        self.assertTrue({self.invoice.id, payment_1.id} <= self._queued_move_ids())
+        self._assert_revenue(-230.0)
+        self.assertFalse(self._queued_move_ids())
+
+        payment_2 = self._create_payment('2016-03-01', 345.0)
+        self._assert_revenue(-575.0)
+
+        # Removing a partial or cancelling a payment is taken into account as well.
+        payment_2.line_ids.remove_move_reconcile()
+        self._assert_revenue(-230.0)
+
+        payment_1.button_draft()
+        payment_1.button_cancel()
+        self._assert_revenue(0.0)
+
+    def test_cash_basis_persistent_table_rebuilt_by_cron(self):
+        self.env['res.currency'].search([('name', '!=', 'USD')]).with_context(force_deactivate=True).active = False
+        self._create_payment('2016-02-01', 230.0)
+        self.env['account.report']._drop_cash_basis_table()
+
+        # The report does not build the missing table, it falls back on the temporary table instead.
+        self._assert_revenue(-230.0)
+        self.env.cr.execute("SELECT to_regclass('account_move_line_cash_basis')")
+        self.assertIsNone(self.env.cr.fetchone()[0])
+        self.env.cr.execute("DROP TABLE cash_basis_temp_account_move_line")
+
+        # The scheduled action builds it, and drains the moves queued afterwards.
+        self.env['account.report']._cron_refresh_cash_basis_table()
+        self._create_payment('2016-03-01', 345.0)
+        self.assertTrue(self._queued_move_ids())
+        self.env['account.report']._cron_refresh_cash_basis_table()
+        self.assertFalse(self._queued_move_ids())
+        self._assert_revenue(-575.0)
+
+    def test_cash_basis_persistent_table_disabled(self):
+        self.env['res.currency'].search([('name', '!=', 'USD')]).with_context(force_deactivate=True).active = False
+        self._assert_revenue(0.0)
+        self.env['ir.config_parameter'].sudo().set_param('account_reports_cash_basis.persistent_table', False)
+        self.env.cr.execute("SELECT to_regclass('account_move_line_cash_basis')")
+        self.assertIsNone(self.env.cr.fetchone()[0])
+
+        self._create_payment('2016-02-01', 230.0)
+        self.assertFalse(self._queued_move_ids())
+        self._assert_revenue(-230.0)
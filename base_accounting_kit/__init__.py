@@ -23,3 +23,8 @@ from . import controllers
 from . import models
 from . import report
 from . import wizard
+
+
+def _post_init_refresh_followup(env):
+    """Store the follow-up values of the existing partners."""
+    env['res.partner']._cron_refresh_followup(auto_commit=False)
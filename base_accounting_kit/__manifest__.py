@@ -21,7 +21,7 @@
 #############################################################################
 {
     'name': 'Odoo 18 Full Accounting Kit for Community',
-    'version': '18.0.5.0.6',
+    'version': '18.0.5.0.7',
     'category': 'Accounting',
     'live_test_url': 'https://kit.easyinstance.com/web/login?redirect=/odoo/accounting',
     'summary': """Odoo 18 Accounting, Odoo 18 Accounting Reports, Odoo18 Accounting, Odoo Accounting, Odoo18 Financial Reports, Odoo18 Asset, Odoo18 Profit and Loss, PDC, Followups, Odoo18, Accounting, Odoo Apps, Reports""",
@@ -43,6 +43,10 @@
         'data/followup_levels.xml',
         'data/multiple_invoice_data.xml',
         'data/recurring_entry_cron.xml',
+        'data/followup_refresh_cron.xml',
+        'data/account_report_job_cron.xml',
+        'data/account_statement_run_cron.xml',
+        'data/credit_exposure_cron.xml',
         'data/account_pdc_data.xml',
         'views/reports_config_view.xml',
         'views/accounting_menu.xml',
@@ -96,6 +100,10 @@
         'views/account_bank_statement_views.xml',
         'views/account_bank_statement_line_views.xml',
         'views/account_payment_view.xml',
+        'views/account_report_job_views.xml',
+        'views/account_statement_run_views.xml',
+        'views/res_partner_credit_exposure_views.xml',
+        'views/account_report_instrumentation_views.xml',
         'wizard/account_lock_date_views.xml',
         'wizard/import_bank_statement_views.xml',
     ],
@@ -115,6 +123,7 @@
             'base_accounting_kit/static/src/xml/bank_reconcile_widget.xml',
         ]
     },
+    'post_init_hook': '_post_init_refresh_followup',
     'license': 'LGPL-3',
     'images': ['static/description/banner.jpg'],
     'installable': True,
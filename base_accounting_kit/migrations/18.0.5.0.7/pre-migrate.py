@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+
+def migrate(cr, version):
+    """The follow-up status was a varchar column written by the follow-up
+    compute for the company of the user. It became company dependent, hence
+    a jsonb column; the values cannot be assigned to a company, so the
+    column is dropped and the values are computed again after the update."""
+    cr.execute("""
+        SELECT data_type FROM information_schema.columns
+         WHERE table_name = 'res_partner' AND column_name = 'followup_status'
+    """)
+    row = cr.fetchone()
+    if row and row[0] != 'jsonb':
+        cr.execute("ALTER TABLE res_partner DROP COLUMN followup_status")
@@ -32,12 +32,17 @@ from . import account_payment
 from . import account_payment_method
 from . import account_recurring_entries_line
 from . import account_report
+from . import account_report_job
+from . import account_statement_run
 from . import followup_line
 from . import multiple_invoice
 from . import multiple_invoice_layout
 from . import product_template
 from . import recurring_payments
+from . import report_instrumentation
 from . import res_company
 from . import res_config_settings
 from . import res_partner
+from . import res_partner_credit_exposure
 from . import sale_order
+from . import sale_order_line
@@ -137,26 +137,68 @@ class AccountAssetAsset(models.Model):
     @api.model
     def compute_generated_entries(self, date, asset_type=None):
         """Compute generated entries for assets based on the provided date and asset type."""
-        # Entries generated : one by grouped category and one by asset from ungrouped category
-        created_move_ids = []
+        return self._generate_depreciation_entries(date, asset_type)[0]
+
+    @api.model
+    def _generate_depreciation_entries(self, date, asset_type=None):
+        """
+        Generate the entries of the depreciation lines due at the given
+        date: one by grouped category and one by line of the ungrouped
+        categories. The due lines of all the open assets are read with one
+        query, and the moves of each grouping mode created at once.
+
+        :param date: Date up to which the lines are posted.
+        :param str asset_type: Type of the assets, 'purchase' or 'sale'.
+        :return: The ids of the created moves, and the summary of
+            _get_depreciation_summary.
+        :rtype: tuple
+        """
+        grouped_lines, ungrouped_lines, summary = \
+            self._get_depreciation_summary(
+                self._get_depreciation_lines_to_post(date, asset_type))
+        created_move_ids = ungrouped_lines.create_move()
+        created_move_ids += grouped_lines.create_grouped_move()
+        return created_move_ids, summary
+
+    @api.model
+    def _get_depreciation_summary(self, lines):
+        """
+        Split the depreciation lines to post by grouping mode and total the
+        entries they generate, the grouped lines being converted at the
+        depreciation date of the context, or today, as create_grouped_move
+        does.
+
+        :param lines: Depreciation lines to post.
+        :return: The grouped lines, the ungrouped lines and for each
+            category and company the number of assets, entries and moves,
+            the total amount and the currency.
+        :rtype: tuple
+        """
+        grouped_lines = lines.filtered(
+            lambda line: line.asset_id.category_id.group_entries).with_context(
+            depreciation_date=self.env.context.get(
+                'depreciation_date') or fields.Date.context_today(self))
+        ungrouped_lines = lines - grouped_lines
+        summary = ungrouped_lines._get_depreciation_preview()
+        for totals in summary.values():
+            totals['moves'] = totals['entries']
+        grouped_summary = grouped_lines._get_depreciation_preview()
+        for totals in grouped_summary.values():
+            totals['moves'] = 1
+        summary.update(grouped_summary)
+        return grouped_lines, ungrouped_lines, summary
+
+    @api.model
+    def _get_depreciation_lines_to_post(self, date, asset_type=None):
+        """Return the unposted depreciation lines of the open assets due at
+        the given date, the lines compute_generated_entries posts."""
         type_domain = []
         if asset_type:
-            type_domain = [('type', '=', asset_type)]
-
-        ungrouped_assets = self.env['account.asset.asset'].search(
-            type_domain + [('state', '=', 'open'),
-                           ('category_id.group_entries', '=', False)])
-        created_move_ids += ungrouped_assets._compute_entries(date,
-                                                              group_entries=False)
-
-        for grouped_category in self.env['account.asset.category'].search(
-                type_domain + [('group_entries', '=', True)]):
-            assets = self.env['account.asset.asset'].search(
-                [('state', '=', 'open'),
-                 ('category_id', '=', grouped_category.id)])
-            created_move_ids += assets._compute_entries(date,
-                                                        group_entries=True)
-        return created_move_ids
+            type_domain = [('asset_id.type', '=', asset_type)]
+        return self.env['account.asset.depreciation.line'].search(
+            type_domain + [('asset_id.state', '=', 'open'),
+                           ('depreciation_date', '<=', date),
+                           ('move_check', '=', False)])
 
     def _compute_board_amount(self, sequence, residual_amount, amount_to_depr,
                               undone_dotation_number,
@@ -223,112 +265,143 @@ class AccountAssetAsset(models.Model):
             undone_dotation_number += 1
         return undone_dotation_number
 
+    def _get_board_dates(self, start_date, count, schedules):
+        """
+        Return the first dates of a depreciation schedule, each date being
+        the previous one plus the depreciation period. The schedules are
+        shared by the assets with the same start date and period.
+
+        :param start_date: Date of the first depreciation.
+        :param int count: Number of dates needed.
+        :param dict schedules: Schedules already computed, by start date and
+            period.
+        :return: The dates of the schedule, at least count of them.
+        :rtype: list
+        """
+        dates = schedules.setdefault((start_date, self.method_period),
+                                     [start_date])
+        while len(dates) < count:
+            depreciation_date = dates[-1]
+            dates.append(date(depreciation_date.year, depreciation_date.month,
+                              depreciation_date.day) + relativedelta(
+                months=+self.method_period))
+        return dates
+
+    def _get_board_start_date(self, posted_depreciation_line_ids,
+                              last_depreciation_dates):
+        """Return the date of the first unposted depreciation of the
+        asset."""
+        # if we already have some previous validated entries, starting date
+        # is last entry + method period
+        if posted_depreciation_line_ids and \
+                posted_depreciation_line_ids[-1].depreciation_date:
+            return posted_depreciation_line_ids[-1].depreciation_date + \
+                relativedelta(months=+self.method_period)
+        if self.prorata:
+            return datetime.strptime(
+                str(last_depreciation_dates[self.id]), DF).date()
+        # depreciation_date = 1st of January of purchase year if annual
+        # valuation, 1st of purchase month in other cases
+        if self.method_period >= 12:
+            if self.company_id.fiscalyear_last_month:
+                return date(year=int(self.date.year),
+                            month=int(self.company_id.fiscalyear_last_month),
+                            day=int(self.company_id.fiscalyear_last_day)
+                            ) + relativedelta(days=1) + relativedelta(
+                    year=int(self.date.year))  # e.g. 2018-12-31 +1 -> 2019
+            return datetime.strptime(str(self.date)[:4] + '-01-01',
+                                     DF).date()
+        return datetime.strptime(str(self.date)[:7] + '-01', DF).date()
+
+    def _get_board_values(self, posted_depreciation_line_ids,
+                          last_depreciation_dates, schedules):
+        """
+        Compute the unposted depreciation lines of the asset.
+
+        :param posted_depreciation_line_ids: Posted lines of the asset,
+            sorted by date.
+        :param dict last_depreciation_dates: Result of
+            _get_last_depreciation_date for the prorata assets.
+        :param dict schedules: Schedules shared between the assets, see
+            _get_board_dates.
+        :return: The values of the depreciation lines to create.
+        :rtype: list
+        """
+        if self.value_residual == 0.0:
+            return []
+        amount_to_depr = residual_amount = self.value_residual
+        depreciation_date = self._get_board_start_date(
+            posted_depreciation_line_ids, last_depreciation_dates)
+        year = depreciation_date.year
+        total_days = (year % 4) and 365 or 366
+        undone_dotation_number = self._compute_board_undone_dotation_nb(
+            depreciation_date, total_days)
+        dates = self._get_board_dates(
+            depreciation_date,
+            undone_dotation_number - len(posted_depreciation_line_ids),
+            schedules)
+        vals_list = []
+        for x in range(len(posted_depreciation_line_ids),
+                       undone_dotation_number):
+            sequence = x + 1
+            # the date only moves to the next period once a line is added
+            depreciation_date = dates[len(vals_list)]
+            amount = self._compute_board_amount(sequence, residual_amount,
+                                                amount_to_depr,
+                                                undone_dotation_number,
+                                                posted_depreciation_line_ids,
+                                                total_days,
+                                                depreciation_date)
+            amount = self.currency_id.round(amount)
+            if float_is_zero(amount,
+                             precision_rounding=self.currency_id.rounding):
+                continue
+            residual_amount -= amount
+            vals_list.append({
+                'amount': amount,
+                'asset_id': self.id,
+                'sequence': sequence,
+                'name': (self.code or '') + '/' + str(sequence),
+                'remaining_value': residual_amount if residual_amount >= 0 else 0.0,
+                'depreciated_value': self.value - (
+                        self.salvage_value + residual_amount),
+                'depreciation_date': depreciation_date.strftime(DF),
+            })
+        return vals_list
+
     def compute_depreciation_board(self):
         """
-            Compute the depreciation schedule for the asset based on its current state and parameters.
-            This method calculates the depreciation amount for each period and generates depreciation entries accordingly.
+            Compute the depreciation schedule of the assets based on their current state and parameters.
+            The boards of the whole recordset are computed in one pass: the
+            stale unposted lines of all the assets are removed and the new
+            lines created with one call each, before generating the entries
+            of the new lines.
         """
-        self.ensure_one()
-        posted_depreciation_line_ids = self.depreciation_line_ids.filtered(
-            lambda x: x.move_check).sorted(key=lambda l: l.depreciation_date)
-        unposted_depreciation_line_ids = self.depreciation_line_ids.filtered(
-            lambda x: not x.move_check)
-
-        # Remove old unposted depreciation lines. We cannot use unlink() with One2many field
-        commands = [(2, line_id.id, False) for line_id in
-                    unposted_depreciation_line_ids]
-
-        if self.value_residual != 0.0:
-            amount_to_depr = residual_amount = self.value_residual
-            if self.prorata:
-                # if we already have some previous validated entries, starting date is last entry + method perio
-                if posted_depreciation_line_ids and \
-                        posted_depreciation_line_ids[-1].depreciation_date:
-                    last_depreciation_date = datetime.strptime(
-                        posted_depreciation_line_ids[-1].depreciation_date,
-                        DF).date()
-                    depreciation_date = last_depreciation_date + relativedelta(
-                        months=+self.method_period)
-                else:
-                    depreciation_date = datetime.strptime(
-                        str(self._get_last_depreciation_date()[self.id]),
-                        DF).date()
-            else:
-                # depreciation_date = 1st of January of purchase year if annual valuation, 1st of
-                # purchase month in other cases
-                if self.method_period >= 12:
-                    if self.company_id.fiscalyear_last_month:
-                        asset_date = date(year=int(self.date.year),
-                                          month=int(
-                                              self.company_id.fiscalyear_last_month),
-                                          day=int(
-                                              self.company_id.fiscalyear_last_day)) + relativedelta(
-                            days=1) + \
-                                     relativedelta(year=int(
-                                         self.date.year))  # e.g. 2018-12-31 +1 -> 2019
-                    else:
-                        asset_date = datetime.strptime(
-                            str(self.date)[:4] + '-01-01', DF).date()
-                else:
-                    asset_date = datetime.strptime(str(self.date)[:7] + '-01',
-                                                   DF).date()
-                # if we already have some previous validated entries, starting date isn't 1st January but last entry + method period
-                if posted_depreciation_line_ids and \
-                        posted_depreciation_line_ids[-1].depreciation_date:
-                    last_depreciation_date = datetime.strptime(str(
-                        posted_depreciation_line_ids[-1].depreciation_date),
-                        DF).date()
-                    depreciation_date = last_depreciation_date + relativedelta(
-                        months=+self.method_period)
-                else:
-                    depreciation_date = asset_date
-            day = depreciation_date.day
-            month = depreciation_date.month
-            year = depreciation_date.year
-            total_days = (year % 4) and 365 or 366
-
-            undone_dotation_number = self._compute_board_undone_dotation_nb(
-                depreciation_date, total_days)
-
-            for x in range(len(posted_depreciation_line_ids),
-                           undone_dotation_number):
-                sequence = x + 1
-                amount = self._compute_board_amount(sequence, residual_amount,
-                                                    amount_to_depr,
-                                                    undone_dotation_number,
-                                                    posted_depreciation_line_ids,
-                                                    total_days,
-                                                    depreciation_date)
-
-                amount = self.currency_id.round(amount)
-                if float_is_zero(amount,
-                                 precision_rounding=self.currency_id.rounding):
-                    continue
-                residual_amount -= amount
-                vals = {
-                    'amount': amount,
-                    'asset_id': self.id,
-                    'sequence': sequence,
-                    'name': (self.code or '') + '/' + str(sequence),
-                    'remaining_value': residual_amount if residual_amount >= 0 else 0.0,
-                    'depreciated_value': self.value - (
-                            self.salvage_value + residual_amount),
-                    'depreciation_date': depreciation_date.strftime(DF),
-                }
-                commands.append((0, False, vals))
-                # Considering Depr. Period as months
-                depreciation_date = date(year, month, day) + relativedelta(
-                    months=+self.method_period)
-                day = depreciation_date.day
-                month = depreciation_date.month
-                year = depreciation_date.year
-
-        self.write({'depreciation_line_ids': commands})
-        last_depr_date = None
-        if self.depreciation_line_ids:
-            last_depr_date = max(self.depreciation_line_ids.mapped('depreciation_date'))
-        if last_depr_date:
-            self._compute_entries(date=last_depr_date)
+        if not self:
+            return True
+        prorata_assets = self.filtered('prorata')
+        last_depreciation_dates = \
+            prorata_assets._get_last_depreciation_date() \
+            if prorata_assets else {}
+        schedules = {}
+        vals_list = []
+        for asset in self:
+            posted_depreciation_line_ids = asset.depreciation_line_ids.filtered(
+                lambda x: x.move_check).sorted(
+                key=lambda l: l.depreciation_date)
+            vals_list += asset._get_board_values(posted_depreciation_line_ids,
+                                                 last_depreciation_dates,
+                                                 schedules)
+        # Remove old unposted depreciation lines
+        self.depreciation_line_ids.filtered(
+            lambda x: not x.move_check).unlink()
+        depreciation_lines = self.env['account.asset.depreciation.line']
+        depreciation_lines.create(vals_list)
+        # the entries of an asset are generated up to its last line, that is
+        # for all of its lines having a date
+        depreciation_lines.search([
+            ('asset_id', 'in', self.ids), ('move_check', '=', False),
+            ('depreciation_date', '!=', False)]).create_move()
         return True
 
     def validate(self):
@@ -541,8 +614,7 @@ class AccountAssetAsset(models.Model):
         """Updates the records with the provided values and computes the depreciation board if necessary."""
         res = super(AccountAssetAsset, self).write(vals)
         if 'depreciation_line_ids' not in vals and 'state' not in vals:
-            for rec in self:
-                rec.compute_depreciation_board()
+            self.compute_depreciation_board()
         return res
 
     def open_entries(self):
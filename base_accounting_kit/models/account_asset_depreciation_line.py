@@ -19,10 +19,16 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+import logging
+
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
 from odoo.tools import float_compare
 
+_logger = logging.getLogger(__name__)
+
+DEPRECIATION_CHUNK_SIZE = 500
+
 
 class AccountAssetDepreciationLine(models.Model):
     """Model for managing asset depreciation lines in the accounting system."""
@@ -62,128 +68,190 @@ class AccountAssetDepreciationLine(models.Model):
         for line in self:
             line.move_posted_check = True if line.move_id and line.move_id.state == 'posted' else False
 
-    def create_move(self, post_move=True):
-        """Create accounting moves for asset depreciation lines."""
-        created_moves = self.env['account.move']
+    def _get_company_amounts(self):
+        """
+        Convert the amounts of the lines to the currency of the company of
+        their asset, the rate of each currency, company and date being
+        fetched once.
+
+        :return: The converted amount and the accounting date of each line.
+        :rtype: dict
+        """
+        rates = {}
+        amounts = {}
+        today = fields.Date.context_today(self)
+        for line in self:
+            asset = line.asset_id
+            depreciation_date = self.env.context.get(
+                'depreciation_date') or line.depreciation_date or today
+            company_currency = asset.company_id.currency_id
+            current_currency = asset.currency_id
+            key = (current_currency, asset.company_id, depreciation_date)
+            if key not in rates:
+                rates[key] = 1.0 if current_currency == company_currency \
+                    else current_currency._get_conversion_rate(
+                        current_currency, company_currency,
+                        asset.company_id, depreciation_date)
+            amounts[line] = (company_currency.round(line.amount * rates[key]),
+                             depreciation_date)
+        return amounts
+
+    def _prepare_move_values(self, amounts=None, line_counts=None):
+        """
+        Build the values of the depreciation entries of the lines, with their
+        final amounts.
+
+        :param dict amounts: Amounts and dates of the lines, as returned by
+            _get_company_amounts.
+        :param dict line_counts: Number of depreciation lines of each asset
+            id, read at once when not given.
+        :return: The values of the move of each line, in the order of the
+            lines.
+        :rtype: list
+        """
         prec = self.env['decimal.precision'].precision_get('Account')
-        if self.mapped('move_id'):
-            raise UserError(_(
-                'This depreciation is already linked to a journal entry! Please post or delete it.'))
+        if amounts is None:
+            amounts = self._get_company_amounts()
+        if line_counts is None:
+            line_counts = {asset.id: count for asset, count in self._read_group(
+                [('asset_id', 'in', self.asset_id.ids)], ['asset_id'],
+                ['__count'])}
+        vals_list = []
         for line in self:
             category_id = line.asset_id.category_id
-            depreciation_date = self.env.context.get(
-                'depreciation_date') or line.depreciation_date or fields.Date.context_today(
-                self)
-            company_currency = line.asset_id.company_id.currency_id
-            current_currency = line.asset_id.currency_id
-            amount = current_currency._convert(line.amount, company_currency,
-                                      line.asset_id.company_id,
-                                      depreciation_date)
-            asset_name = line.asset_id.name + ' (%s/%s)' % (line.sequence, len(line.asset_id.depreciation_line_ids))
-            partner = self.env['res.partner']._find_accounting_partner(line.asset_id.partner_id)
-            move_line_1 = {
-                'name': asset_name,
-                'account_id': category_id.account_depreciation_id.id,
-                'debit': 0.0 if float_compare(amount, 0.0,
-                                              precision_digits=prec) > 0 else -amount,
-                'credit': amount if float_compare(amount, 0.0,
-                                                  precision_digits=prec) > 0 else 0.0,
-                'journal_id': category_id.journal_id.id,
-                'partner_id': partner.id,
-                'currency_id': company_currency != current_currency and current_currency.id or company_currency.id,
-                'amount_currency': company_currency != current_currency and - 1.0 * line.amount or 0.0,
-            }
-            move_line_2 = {
-                'name': asset_name,
-                'account_id': category_id.account_depreciation_expense_id.id,
-                'credit': 0.0 if float_compare(amount, 0.0,
-                                               precision_digits=prec) > 0 else -amount,
-                'debit': amount if float_compare(amount, 0.0,
-                                                 precision_digits=prec) > 0 else 0.0,
-                'journal_id': category_id.journal_id.id,
-                'partner_id': partner.id,
-                'currency_id': company_currency != current_currency and current_currency.id or company_currency.id,
-                'amount_currency': company_currency != current_currency and line.amount or 0.0,
-            }
-            line_ids = [(0, 0, {
-                'account_id': category_id.account_depreciation_id.id,
-                'partner_id': partner.id,
-                'credit': amount if float_compare(amount, 0.0,
-                                                  precision_digits=prec) > 0 else 0.0,
-            }), (0, 0, {
-                'account_id': category_id.account_depreciation_expense_id.id,
-                'partner_id': partner.id,
-                'debit': amount if float_compare(amount, 0.0,
-                                                 precision_digits=prec) > 0 else 0.0,
-            })]
-            move = self.env['account.move'].create({
+            amount, depreciation_date = amounts[line]
+            asset_name = line.asset_id.name + ' (%s/%s)' % (
+                line.sequence, line_counts.get(line.asset_id.id, 0))
+            partner = self.env['res.partner']._find_accounting_partner(
+                line.asset_id.partner_id)
+            positive = float_compare(amount, 0.0, precision_digits=prec) > 0
+            vals_list.append({
                 'ref': line.asset_id.code,
                 'date': depreciation_date or False,
                 'journal_id': category_id.journal_id.id,
-                'line_ids': line_ids,
+                'line_ids': [(0, 0, {
+                    'name': asset_name,
+                    'account_id': category_id.account_depreciation_id.id,
+                    'partner_id': partner.id,
+                    'debit': 0.0 if positive else -amount,
+                    'credit': amount if positive else 0.0,
+                }), (0, 0, {
+                    'name': asset_name,
+                    'account_id': category_id.account_depreciation_expense_id.id,
+                    'partner_id': partner.id,
+                    'debit': amount if positive else 0.0,
+                    'credit': 0.0 if positive else -amount,
+                })],
             })
-            for move_line in move.line_ids:
-                if move_line.account_id.id == move_line_1['account_id']:
-                    move_line.write({'credit': move_line_1['credit'],
-                                     'debit': move_line_1['debit']})
-                elif move_line.account_id.id == move_line_2['account_id']:
-                    move_line.write({'debit': move_line_2['debit'],
-                                     'credit': move_line_2['credit']})
-            if move.line_ids.filtered(
-                    lambda x: x.name == 'Automatic Balancing Line'):
-                move.line_ids.filtered(
-                    lambda x: x.name == 'Automatic Balancing Line').unlink()
-            line.write({'move_id': move.id, 'move_check': True})
-            created_moves |= move
+        return vals_list
 
-        if post_move and created_moves:
-            created_moves.filtered(lambda m: any(
-                m.asset_depreciation_ids.mapped(
-                    'asset_id.category_id.open_asset'))).post()
-        return [x.id for x in created_moves]
+    def _get_depreciation_preview(self):
+        """
+        Preview the depreciation entries of the lines without creating
+        them.
+
+        :return: For each category and company of the assets, the number of
+            entries and assets and the total amount in the currency of the
+            company.
+        :rtype: dict
+        """
+        amounts = self._get_company_amounts()
+        preview = {}
+        for line in self:
+            company = line.asset_id.company_id
+            totals = preview.setdefault(
+                (line.asset_id.category_id, company), {
+                    'entries': 0, 'assets': set(), 'amount': 0.0,
+                    'currency': company.currency_id})
+            totals['entries'] += 1
+            totals['assets'].add(line.asset_id.id)
+            totals['amount'] += amounts[line][0]
+        for totals in preview.values():
+            totals['assets'] = len(totals['assets'])
+        return preview
+
+    def create_move(self, post_move=True, chunk_size=DEPRECIATION_CHUNK_SIZE):
+        """
+        Create accounting moves for asset depreciation lines.
+
+        The values of all the moves are built up front, the currency rates
+        and the number of lines of the assets being read once, and the moves
+        are created and posted by chunks, the progress being logged and
+        reported to the scheduled action running it, if any.
+
+        :param bool post_move: Post the moves of the open asset categories.
+        :param int chunk_size: Number of moves created and posted at once.
+        :return: Ids of the created moves, in the order of the lines.
+        :rtype: list
+        """
+        if self.mapped('move_id'):
+            raise UserError(_(
+                'This depreciation is already linked to a journal entry! Please post or delete it.'))
+        vals_list = self._prepare_move_values()
+        created_moves = self.env['account.move']
+        total = len(self)
+        for start in range(0, total, chunk_size):
+            lines = self[start:start + chunk_size]
+            moves = self.env['account.move'].create(
+                vals_list[start:start + chunk_size])
+            for line, move in zip(lines, moves):
+                line.move_id = move
+            if post_move:
+                moves.filtered(lambda m: any(
+                    m.asset_depreciation_ids.mapped(
+                        'asset_id.category_id.open_asset'))).post()
+            created_moves |= moves
+            done = min(start + chunk_size, total)
+            _logger.info("Created %s/%s depreciation entries", done, total)
+            self.env['ir.cron']._notify_progress(done=done,
+                                                 remaining=total - done)
+        return created_moves.ids
 
     def create_grouped_move(self, post_move=True):
-        """Create a grouped accounting move for asset depreciation lines."""
+        """Create a grouped accounting move for asset depreciation lines,
+        one per category of the lines, all the moves being created at
+        once."""
         if not self.exists():
             return []
-        created_moves = self.env['account.move']
-        category_id = self[
-            0].asset_id.category_id  # we can suppose that all lines have the same category
         depreciation_date = self.env.context.get(
             'depreciation_date') or fields.Date.context_today(self)
-        amount = 0.0
-        for line in self:
+        amounts = self.with_context(
+            depreciation_date=depreciation_date)._get_company_amounts()
+        categories = self.asset_id.category_id
+        vals_list = []
+        for category_id in categories:
             # Sum amount of all depreciation lines
-            company_currency = line.asset_id.company_id.currency_id
-            current_currency = line.asset_id.currency_id
-            amount += current_currency.compute(line.amount, company_currency)
-
-        name = category_id.name + _(' (grouped)')
-        move_line_1 = {
-            'name': name,
-            'account_id': category_id.account_depreciation_id.id,
-            'debit': 0.0,
-            'credit': amount,
-            'journal_id': category_id.journal_id.id,
-            'analytic_account_id': category_id.account_analytic_id.id if category_id.type == 'sale' else False,
-        }
-        move_line_2 = {
-            'name': name,
-            'account_id': category_id.account_depreciation_expense_id.id,
-            'credit': 0.0,
-            'debit': amount,
-            'journal_id': category_id.journal_id.id,
-            'analytic_account_id': category_id.account_analytic_id.id if category_id.type == 'purchase' else False,
-        }
-        move_vals = {
-            'ref': category_id.name,
-            'date': depreciation_date or False,
-            'journal_id': category_id.journal_id.id,
-            'line_ids': [(0, 0, move_line_1), (0, 0, move_line_2)],
-        }
-        move = self.env['account.move'].create(move_vals)
-        self.write({'move_id': move.id, 'move_check': True})
-        created_moves |= move
+            amount = sum(amounts[line][0] for line in self
+                         if line.asset_id.category_id == category_id)
+            name = category_id.name + _(' (grouped)')
+            analytic_distribution = {
+                str(category_id.account_analytic_id.id): 100
+            } if category_id.account_analytic_id else False
+            move_line_1 = {
+                'name': name,
+                'account_id': category_id.account_depreciation_id.id,
+                'debit': 0.0,
+                'credit': amount,
+                'analytic_distribution': analytic_distribution if category_id.type == 'sale' else False,
+            }
+            move_line_2 = {
+                'name': name,
+                'account_id': category_id.account_depreciation_expense_id.id,
+                'credit': 0.0,
+                'debit': amount,
+                'analytic_distribution': analytic_distribution if category_id.type == 'purchase' else False,
+            }
+            vals_list.append({
+                'ref': category_id.name,
+                'date': depreciation_date or False,
+                'journal_id': category_id.journal_id.id,
+                'line_ids': [(0, 0, move_line_1), (0, 0, move_line_2)],
+            })
+        created_moves = self.env['account.move'].create(vals_list)
+        for category_id, move in zip(categories, created_moves):
+            self.filtered(
+                lambda line: line.asset_id.category_id == category_id).write(
+                {'move_id': move.id, 'move_check': True})
 
         if post_move and created_moves:
             self.post_lines_and_close_asset()
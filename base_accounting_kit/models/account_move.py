@@ -22,6 +22,10 @@
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
 
+CREDIT_EXPOSURE_FIELDS = {'state', 'move_type', 'partner_id', 'company_id',
+                          'currency_id', 'date', 'invoice_date', 'line_ids',
+                          'invoice_line_ids'}
+
 
 class AccountMove(models.Model):
     """Inherits from the account.move model for adding the depreciation
@@ -32,7 +36,7 @@ class AccountMove(models.Model):
     is_warning = fields.Boolean(string='Is warning')
     due_amount = fields.Float(string="Due Amount",
                               related='partner_id.due_amount')
-    recurring_ref = fields.Char(string='Recurring Ref')
+    recurring_ref = fields.Char(string='Recurring Ref', index='btree_not_null')
     asset_depreciation_ids = fields.One2many('account.asset.depreciation.line',
                                              'move_id',
                                              string='Assets Depreciation Lines')
@@ -42,6 +46,56 @@ class AccountMove(models.Model):
                                    "checked again.",
                               )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Add the draft customer invoices to the credit exposure"""
+        moves = super(AccountMove, self.with_context(
+            credit_exposure_tracked=True)).create(vals_list).with_env(
+            self.env)
+        tracked = moves._get_credit_exposure_moves()
+        if tracked:
+            exposure = self.env['res.partner.credit.exposure']
+            exposure._add_amounts({}, exposure._get_amounts(tracked))
+        return moves
+
+    def write(self, vals):
+        """Move the credit exposure of the customers by what the write
+        changes in their receivable balance, draft invoices and orders left
+        to invoice"""
+        tracked = self._get_credit_exposure_moves() \
+            if CREDIT_EXPOSURE_FIELDS.intersection(vals) else self.browse()
+        if not tracked:
+            return super(AccountMove, self).write(vals)
+        exposure = self.env['res.partner.credit.exposure']
+        orders = tracked.line_ids.sale_line_ids.order_id
+        before = exposure._get_amounts(tracked, orders)
+        result = super(AccountMove, self.with_context(
+            credit_exposure_tracked=True)).write(vals)
+        orders.invalidate_recordset(['amount_to_invoice'])
+        exposure._add_amounts(before, exposure._get_amounts(tracked, orders))
+        return result
+
+    def unlink(self):
+        """Remove the deleted invoices from the credit exposure"""
+        tracked = self._get_credit_exposure_moves()
+        exposure = self.env['res.partner.credit.exposure']
+        before = exposure._get_amounts(tracked) if tracked else {}
+        result = super(AccountMove, self.with_context(
+            credit_exposure_tracked=True)).unlink()
+        exposure._add_amounts(before, {})
+        return result
+
+    def _get_credit_exposure_moves(self):
+        """Return the moves the credit exposure follows: the customer
+        documents and the entries, which hold the customer payments. None
+        when the credit limits are disabled or inside a tracked change."""
+        if self.env.context.get('credit_exposure_tracked') \
+                or not self.env['res.partner.credit.exposure']._is_enabled():
+            return self.browse()
+        return self.filtered(
+            lambda move: move.is_sale_document(include_receipts=True)
+            or move.move_type == 'entry')
+
     def button_cancel(self):
         """Button action to cancel the transfer"""
         for move in self:
@@ -79,3 +79,9 @@ class AccountCommonReport(models.Model):
         used_context = self._build_contexts(data)
         data['form']['used_context'] = dict(used_context, lang=get_lang(self.env).code)
         return self.with_context(discard_logo_check=True)._print_report(data)
+
+    def action_print_background(self):
+        """Render the report of the wizard in the background as a report
+        job instead of in the request"""
+        return self.env['account.report.job']._enqueue_report_action(
+            self.check_report(), self)
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import contextlib
+import io
+import json
+import logging
+import os
+import tempfile
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import json_default
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+_logger = logging.getLogger(__name__)
+
+JOB_BATCH_SIZE = 5
+PDF_CHUNK_SIZE = 20
+DEFAULT_RETENTION_DAYS = 7
+STALE_JOB_DELAY = timedelta(minutes=15)
+MAX_JOB_ATTEMPTS = 3
+
+
+class AccountReportJob(models.Model):
+    """Report rendered in the background.
+
+    Rendering big reports inside the HTTP request hits the worker time
+    limits, so the report action is stored on a job instead and rendered by
+    the ``Run Report Jobs`` scheduled action, records by chunks. Each chunk
+    is stored as an attachment and committed with the job progress, so a
+    job interrupted by a killed worker resumes after its last chunk when the
+    runner requeues it. The chunks are then merged through a temporary file
+    into the attachment of the job, that its user downloads once done. Old
+    jobs and
+    their attachments are removed by the ``Clean Report Jobs`` scheduled
+    action after the ``base_accounting_kit.report_job_retention_days``
+    system parameter."""
+    _name = 'account.report.job'
+    _description = 'Background Report Job'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Report', required=True, readonly=True,
+                       help='Name of the report.')
+    user_id = fields.Many2one('res.users', string='Requested By',
+                              required=True, readonly=True,
+                              default=lambda self: self.env.user,
+                              help='User the report is rendered for.')
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, readonly=True,
+                                 default=lambda self: self.env.company,
+                                 help='Company the report is rendered in.')
+    state = fields.Selection([('queued', 'Queued'),
+                              ('running', 'Running'),
+                              ('done', 'Done'),
+                              ('failed', 'Failed'),
+                              ('cancelled', 'Cancelled')],
+                             string='Status', required=True, readonly=True,
+                             default='queued', help='Status of the job.')
+    progress = fields.Float(string='Progress', readonly=True,
+                            help='Percentage of the report rendered.')
+    report_name = fields.Char(string='Report Reference', required=True,
+                              readonly=True,
+                              help='Technical name of the QWeb report.')
+    res_ids = fields.Json(string='Records', readonly=True,
+                          help='Ids of the records the report is printed '
+                               'for.')
+    data = fields.Json(string='Data', readonly=True,
+                       help='Data of the report action.')
+    report_context = fields.Json(string='Context', readonly=True,
+                                 help='Active model and records the report '
+                                      'is rendered with.')
+    attachment_id = fields.Many2one('ir.attachment', string='File',
+                                    readonly=True,
+                                    help='The rendered report.')
+    chunk_attachment_ids = fields.Many2many(
+        'ir.attachment', 'account_report_job_chunk_rel', 'job_id',
+        'attachment_id', string='Rendered Chunks', readonly=True,
+        help='Documents of the chunks rendered so far.')
+    attempt_count = fields.Integer(string='Attempts', readonly=True,
+                                   help='Number of times the job was '
+                                        'started.')
+    error = fields.Text(string='Error', readonly=True,
+                        help='Error raised while rendering the report.')
+    date_done = fields.Datetime(string='Completed On', readonly=True,
+                                help='Date the report was rendered.')
+
+    @api.model
+    def _enqueue_report_action(self, action, records):
+        """
+        Queue the report of a report action instead of rendering it.
+
+        :param dict action: An ``ir.actions.report`` action, as returned by
+            ``report_action``.
+        :param records: Records the action was run from, usually the report
+            wizard, that the web client would pass as active records.
+        :return: A client action notifying the user and closing the wizard.
+        :rtype: dict
+        """
+        if action.get('type') != 'ir.actions.report':
+            return action
+        context = action.get('context') or {}
+        active_ids = context.get('active_ids') or records.ids
+        report = self.env['ir.actions.report']._get_report_from_name(
+            action['report_name'])
+        job = self.create({
+            'name': report.name or action['report_name'],
+            'report_name': action['report_name'],
+            'res_ids': active_ids,
+            'data': self._to_json(action.get('data')),
+            'report_context': {
+                'active_model': records._name,
+                'active_id': records[:1].id,
+                'active_ids': active_ids,
+            },
+        })
+        return job._notify_queued()
+
+    @api.model
+    def _to_json(self, value):
+        """Return ``value`` as it would be sent to and back from the client,
+        dates becoming strings."""
+        return json.loads(json.dumps(value, default=json_default))
+
+    def _notify_queued(self):
+        """Wake the job runner up and tell the user where to find the
+        report."""
+        self.ensure_one()
+        self.env.ref('base_accounting_kit.ir_cron_run_report_jobs')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'info',
+                'message': _("%(report)s is rendered in the background, "
+                             "download it from Report Jobs when done.",
+                             report=self.name),
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    def action_cancel(self):
+        """Cancel the jobs not rendered yet; a running job stops at its next
+        chunk."""
+        self.filtered(lambda job: job.state in ('queued', 'running')).write(
+            {'state': 'cancelled'})
+
+    def action_download(self):
+        """Download the rendered report."""
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError(_("The report is not rendered yet."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{self.attachment_id.id}?download=true',
+            'target': 'self',
+        }
+
+    def unlink(self):
+        """Remove the rendered reports with the jobs."""
+        self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name), ('res_id', 'in', self.ids)
+        ]).unlink()
+        return super().unlink()
+
+    @api.model
+    def _cron_run_jobs(self):
+        """Requeue the interrupted jobs, render the oldest queued jobs, and
+        reschedule the runner while some remain."""
+        self._requeue_stale_jobs()
+        jobs = self.search([('state', '=', 'queued')], order='id',
+                           limit=JOB_BATCH_SIZE)
+        for job in jobs:
+            job._run(auto_commit=True)
+        self.env['ir.cron']._notify_progress(
+            done=len(jobs),
+            remaining=self.search_count([('state', '=', 'queued')]))
+
+    @api.model
+    def _requeue_stale_jobs(self):
+        """
+        Requeue the running jobs whose progress was not committed for
+        ``STALE_JOB_DELAY``, their worker having been killed, e.g. at its
+        time limit. The runner does not overlap itself, so such a job is
+        not being rendered anymore. A job interrupted ``MAX_JOB_ATTEMPTS``
+        times fails instead.
+        """
+        stale_jobs = self.search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - STALE_JOB_DELAY),
+        ])
+        failed_jobs = stale_jobs.filtered(
+            lambda job: job.attempt_count >= MAX_JOB_ATTEMPTS)
+        failed_jobs.write({
+            'state': 'failed',
+            'error': _("The report was interrupted %s times, e.g. by the "
+                       "time limit of the workers.", MAX_JOB_ATTEMPTS),
+        })
+        (stale_jobs - failed_jobs).write({'state': 'queued'})
+
+    @api.model
+    def _cron_cleanup_jobs(self):
+        """Remove the finished jobs older than the retention delay."""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.report_job_retention_days',
+            DEFAULT_RETENTION_DAYS))
+        self.search([
+            ('state', 'in', ('done', 'failed', 'cancelled')),
+            ('create_date', '<', fields.Datetime.now() - timedelta(days=days)),
+        ]).unlink()
+
+    def _commit(self, auto_commit):
+        """Commit the progress of the job when run by the scheduler."""
+        if auto_commit:
+            self.env.cr.commit()
+
+    def _is_cancelled(self):
+        """Return whether the job was cancelled by its user meanwhile."""
+        self.invalidate_recordset(['state'])
+        return self.state == 'cancelled'
+
+    def _run(self, auto_commit=False):
+        """
+        Render the report of the job and store it as an attachment.
+
+        :param bool auto_commit: Commit after each step so the progress is
+            visible and a failure does not lose the job.
+        """
+        self.ensure_one()
+        self.write({'state': 'running', 'error': False,
+                    'attempt_count': self.attempt_count + 1})
+        self._commit(auto_commit)
+        savepoint = (contextlib.nullcontext() if auto_commit
+                     else self.env.cr.savepoint())
+        try:
+            with savepoint:
+                content, extension, mimetype = self._render(auto_commit)
+        except Exception as error:
+            if auto_commit:
+                self.env.cr.rollback()
+            _logger.exception("Report job %s failed", self.id)
+            self.write({'state': 'failed', 'error': str(error)})
+            self._commit(auto_commit)
+            return
+        if content is None:
+            return
+        attachment = self.env['ir.attachment'].create({
+            'name': f'{self.name}.{extension}',
+            'raw': content,
+            'mimetype': mimetype,
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        self.write({
+            'state': 'done',
+            'progress': 100.0,
+            'attachment_id': attachment.id,
+            'date_done': fields.Datetime.now(),
+        })
+        self.chunk_attachment_ids.unlink()
+        self._commit(auto_commit)
+
+    def _render(self, auto_commit=False):
+        """
+        Render the report as the user who requested it, skipping the chunks
+        rendered by a previous attempt.
+
+        For the report wizards, the records are the wizard alone, so the
+        report is rendered as one chunk.
+
+        :return: ``(content, extension, mimetype)``, the content being None
+            when the job was cancelled.
+        :rtype: tuple
+        """
+        env = self.env(user=self.user_id, context=dict(
+            self.env.context, allowed_company_ids=self.company_id.ids,
+            **(self.report_context or {})))
+        report = env['ir.actions.report']._get_report_from_name(
+            self.report_name)
+        res_ids = self.res_ids or []
+        chunks = [res_ids[index:index + PDF_CHUNK_SIZE]
+                  for index in range(0, len(res_ids), PDF_CHUNK_SIZE)] or [[]]
+        for index in range(len(self.chunk_attachment_ids), len(chunks)):
+            pdf_content, _report_format = report._render_qweb_pdf(
+                self.report_name, chunks[index], data=self.data)
+            if self._is_cancelled():
+                return None, None, None
+            attachment = self.env['ir.attachment'].create({
+                'name': f'{self.name} ({index + 1}).pdf',
+                'raw': pdf_content,
+                'mimetype': 'application/pdf',
+                'res_model': self._name,
+                'res_id': self.id,
+            })
+            self.write({
+                'chunk_attachment_ids': [fields.Command.link(attachment.id)],
+                'progress': 100.0 * (index + 1) / len(chunks),
+            })
+            self._commit(auto_commit)
+            self.env.invalidate_all()
+        return self._merge_chunks(), 'pdf', 'application/pdf'
+
+    def _merge_chunks(self):
+        """
+        Merge the documents of the chunks through a temporary file, the
+        chunks stored in the filestore being read from their files.
+
+        :return: The merged document.
+        :rtype: bytes
+        """
+        attachments = self.chunk_attachment_ids.sorted('id')
+        if len(attachments) == 1:
+            return attachments.raw
+        file_descriptor, path = tempfile.mkstemp(suffix='.pdf')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as merged_file, \
+                    contextlib.ExitStack() as stack:
+                writer = PdfFileWriter()
+                for attachment in attachments:
+                    if attachment.store_fname:
+                        stream = stack.enter_context(open(
+                            attachment._full_path(attachment.store_fname),
+                            'rb'))
+                    else:
+                        stream = io.BytesIO(attachment.raw)
+                    reader = PdfFileReader(stream, strict=False)
+                    for page in range(reader.getNumPages()):
+                        writer.addPage(reader.getPage(page))
+                writer.write(merged_file)
+            with open(path, 'rb') as merged_file:
+                return merged_file.read()
+        finally:
+            os.unlink(path)
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import logging
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+from odoo.tools.safe_eval import safe_eval
+
+_logger = logging.getLogger(__name__)
+
+STATEMENT_BATCH_SIZE = 50
+STATEMENT_BATCHES_PER_RUN = 20
+
+
+class AccountStatementRun(models.Model):
+    """Customer statements generated and mailed for many partners at once.
+
+    Starting a run creates one line per partner matching its domain. The
+    ``Process Customer Statement Runs`` scheduled action then claims the
+    pending lines by batches, reads the statement data of a whole batch with
+    one query, renders the statements and queues their emails in the
+    outgoing mail queue instead of sending them inline. Each batch is
+    committed, so the status of every partner is kept; an interrupted run
+    resumes with its pending lines and the failed lines can be retried."""
+    _name = 'account.statement.run'
+    _description = 'Customer Statement Run'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Name', required=True,
+                       default=lambda self: _('Statements of %s',
+                                              fields.Date.today()),
+                       help='Name of the run.')
+    user_id = fields.Many2one('res.users', string='Responsible',
+                              required=True, readonly=True,
+                              default=lambda self: self.env.user,
+                              help='User the statements are generated for.')
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, readonly=True,
+                                 default=lambda self: self.env.company,
+                                 help='Company of the statements.')
+    partner_domain = fields.Char(string='Customers',
+                                 default="[('customer_rank', '>', 0)]",
+                                 help='Domain of the partners to send a '
+                                      'statement to.')
+    report_format = fields.Selection([('pdf', 'PDF'), ('xlsx', 'Excel')],
+                                     string='Format', required=True,
+                                     default='pdf',
+                                     help='Format of the statements.')
+    send_email = fields.Boolean(string='Send by Email', default=True,
+                                help='Queue an email with the statement to '
+                                     'each partner.')
+    state = fields.Selection([('draft', 'Draft'),
+                              ('running', 'Running'),
+                              ('done', 'Done'),
+                              ('cancelled', 'Cancelled')],
+                             string='Status', required=True, readonly=True,
+                             default='draft', help='Status of the run.')
+    line_ids = fields.One2many('account.statement.run.line', 'run_id',
+                               string='Partners', readonly=True,
+                               help='Statement of each partner.')
+    line_count = fields.Integer(compute='_compute_line_counts',
+                                string='Partners',
+                                help='Number of partners of the run.')
+    done_count = fields.Integer(compute='_compute_line_counts',
+                                string='Sent',
+                                help='Number of statements generated.')
+    failed_count = fields.Integer(compute='_compute_line_counts',
+                                  string='Failed',
+                                  help='Number of statements that failed.')
+    progress = fields.Float(compute='_compute_line_counts',
+                            string='Progress',
+                            help='Percentage of the partners processed.')
+    date_done = fields.Datetime(string='Completed On', readonly=True,
+                                help='Date the run was completed.')
+
+    @api.depends('line_ids.state')
+    def _compute_line_counts(self):
+        """Count the lines of the runs by status with one grouped query."""
+        counts = {(run.id, state): count for run, state, count in
+                  self.env['account.statement.run.line']._read_group(
+                      [('run_id', 'in', self.ids)], ['run_id', 'state'],
+                      ['__count'])}
+        for run in self:
+            run_counts = {state: counts.get((run.id, state), 0) for state in
+                          ('pending', 'done', 'skipped', 'failed')}
+            run.line_count = sum(run_counts.values())
+            run.done_count = run_counts['done']
+            run.failed_count = run_counts['failed']
+            run.progress = 100.0 * (
+                run.line_count - run_counts['pending']) / (
+                run.line_count or 1)
+
+    def action_start(self):
+        """Create the lines of the partners matching the domain and queue
+        the run."""
+        for run in self.filtered(lambda run: run.state == 'draft'):
+            partners = self.env['res.partner'].with_company(
+                run.company_id).search(safe_eval(run.partner_domain or '[]'))
+            if not partners:
+                raise UserError(_("No partner matches the customers of %s.",
+                                  run.name))
+            self.env['account.statement.run.line'].create([{
+                'run_id': run.id,
+                'partner_id': partner_id,
+            } for partner_id in partners.ids])
+            run.state = 'running'
+        self._trigger_processing()
+
+    def action_retry_failed(self):
+        """Queue the failed statements again."""
+        for run in self:
+            lines = run.line_ids.filtered(lambda line: line.state == 'failed')
+            if not lines:
+                continue
+            lines.write({'state': 'pending', 'error': False})
+            if run.state == 'done':
+                run.write({'state': 'running', 'date_done': False})
+        self._trigger_processing()
+
+    def action_cancel(self):
+        """Stop the runs, the statements already generated being kept."""
+        self.filtered(lambda run: run.state in ('draft', 'running')).write(
+            {'state': 'cancelled'})
+
+    def action_view_lines(self):
+        """Open the statement of each partner of the run."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': self.name,
+            'res_model': 'account.statement.run.line',
+            'view_mode': 'list,form',
+            'domain': [('run_id', '=', self.id)],
+            'context': {'search_default_group_by_state': 1},
+        }
+
+    def _trigger_processing(self):
+        """Wake the scheduled action processing the runs up."""
+        if self.filtered(lambda run: run.state == 'running'):
+            self.env.ref(
+                'base_accounting_kit.ir_cron_process_statement_runs'
+            )._trigger()
+
+    @api.model
+    def _cron_process_runs(self, batch_size=STATEMENT_BATCH_SIZE,
+                           batch_count=STATEMENT_BATCHES_PER_RUN):
+        """
+        Process the pending statements of the running runs by batches, and
+        reschedule the processing while some remain.
+
+        :param int batch_size: Number of statements processed at once.
+        :param int batch_count: Number of batches processed in this call.
+        """
+        for _index in range(batch_count):
+            lines = self.env['account.statement.run.line']._claim_pending(
+                batch_size)
+            if not lines:
+                break
+            lines._process()
+            self.env.cr.commit()
+            self.env.invalidate_all()
+        runs = self.search([('state', '=', 'running')])
+        finished = runs.filtered(lambda run: not run.line_ids.filtered(
+            lambda line: line.state == 'pending'))
+        finished.write({'state': 'done', 'date_done': fields.Datetime.now()})
+        remaining = self.env['account.statement.run.line'].search_count([
+            ('run_id.state', '=', 'running'), ('state', '=', 'pending')])
+        self.env['ir.cron']._notify_progress(done=len(finished),
+                                             remaining=remaining)
+
+
+class AccountStatementRunLine(models.Model):
+    """Statement of one partner in a customer statement run."""
+    _name = 'account.statement.run.line'
+    _description = 'Customer Statement Run Line'
+    _order = 'run_id, id'
+
+    run_id = fields.Many2one('account.statement.run', string='Run',
+                             required=True, ondelete='cascade', index=True,
+                             help='Run of the statement.')
+    company_id = fields.Many2one(related='run_id.company_id', store=True,
+                                 help='Company of the statement.')
+    partner_id = fields.Many2one('res.partner', string='Partner',
+                                 required=True, ondelete='cascade',
+                                 help='Partner the statement is sent to.')
+    state = fields.Selection([('pending', 'Pending'),
+                              ('done', 'Done'),
+                              ('skipped', 'Nothing Due'),
+                              ('failed', 'Failed')],
+                             string='Status', required=True, readonly=True,
+                             default='pending', index=True,
+                             help='Status of the statement; the partners '
+                                  'without unpaid invoice are skipped.')
+    attachment_id = fields.Many2one('ir.attachment', string='Statement',
+                                    readonly=True,
+                                    help='The generated statement.')
+    mail_id = fields.Many2one('mail.mail', string='Email', readonly=True,
+                              help='The queued email.')
+    error = fields.Text(string='Error', readonly=True,
+                        help='Error raised while generating the statement.')
+
+    @api.model
+    def _claim_pending(self, limit):
+        """
+        Lock pending lines of running runs, skipping the lines locked by
+        another worker, so that concurrent workers never process the same
+        statement.
+
+        :param int limit: Maximum number of lines to claim.
+        :return: The claimed lines.
+        """
+        self.flush_model(['run_id', 'state'])
+        self.env.cr.execute(SQL("""
+            SELECT line.id
+              FROM account_statement_run_line line
+              JOIN account_statement_run run ON run.id = line.run_id
+             WHERE line.state = 'pending' AND run.state = 'running'
+          ORDER BY line.run_id, line.id
+             LIMIT %s
+               FOR UPDATE OF line SKIP LOCKED
+        """, limit))
+        return self.browse(row[0] for row in self.env.cr.fetchall())
+
+    def _process(self):
+        """Generate the statements of the lines, by run, the data of all the
+        partners of a run being fetched at once."""
+        for run in self.run_id:
+            lines = self.filtered(lambda line: line.run_id == run)
+            env = self.env(user=run.user_id, context=dict(
+                self.env.context, allowed_company_ids=run.company_id.ids))
+            data = lines.partner_id.with_env(env)._get_statement_data()
+            for line in lines:
+                try:
+                    with self.env.cr.savepoint():
+                        line._generate(run, data[line.partner_id.id])
+                except Exception as error:
+                    _logger.exception("Statement of partner %s failed",
+                                      line.partner_id.id)
+                    line.write({'state': 'failed', 'error': str(error)})
+
+    def _generate(self, run, data):
+        """
+        Render the statement of the line and queue its email.
+
+        :param run: Run of the line.
+        :param dict data: Statement data of the partner.
+        """
+        if not data['my_data']:
+            self.state = 'skipped'
+            return
+        partner = self.partner_id.with_user(run.user_id).with_company(
+            run.company_id)
+        if run.send_email and not partner.email:
+            raise UserError(_("%s has no email address.",
+                              partner.display_name))
+        if run.report_format == 'xlsx':
+            content = partner._render_statement_xlsx(data)
+            extension = 'xlsx'
+            mimetype = ('application/vnd.openxmlformats-officedocument.'
+                        'spreadsheetml.sheet')
+        else:
+            content = partner._render_statement_pdf(data)
+            extension = 'pdf'
+            mimetype = 'application/pdf'
+        attachment = self.env['ir.attachment'].sudo().create({
+            'name': f'Statement Report - {partner.name}.{extension}',
+            'raw': content,
+            'mimetype': mimetype,
+            'res_model': 'res.partner',
+            'res_id': partner.id,
+        })
+        values = {'state': 'done', 'attachment_id': attachment.id,
+                  'error': False}
+        if run.send_email:
+            values['mail_id'] = self.env['mail.mail'].sudo().create(
+                partner._prepare_statement_mail_values(attachment)).id
+        self.write(values)
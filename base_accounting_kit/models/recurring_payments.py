@@ -19,9 +19,12 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from datetime import datetime, date
+from datetime import date
 from dateutil.relativedelta import relativedelta
 from odoo import api, models, fields
+from odoo.tools import SQL
+
+RECURRING_CHUNK_SIZE = 500
 
 
 class RecurringPayments(models.Model):
@@ -31,21 +34,14 @@ class RecurringPayments(models.Model):
 
     def _get_next_schedule(self):
         """Function for adding the schedule process"""
-        if self.date:
-            recurr_dates = []
-            today = datetime.today()
-            start_date = datetime.strptime(str(self.date), '%Y-%m-%d')
-            while start_date <= today:
-                recurr_dates.append(str(start_date.date()))
-                if self.recurring_period == 'days':
-                    start_date += relativedelta(days=self.recurring_interval)
-                elif self.recurring_period == 'weeks':
-                    start_date += relativedelta(weeks=self.recurring_interval)
-                elif self.recurring_period == 'months':
-                    start_date += relativedelta(months=self.recurring_interval)
-                else:
-                    start_date += relativedelta(years=self.recurring_interval)
-            self.next_date = start_date.date()
+        today = fields.Date.today()
+        for record in self:
+            record.next_date = False
+            if record.date and record.recurring_interval > 0:
+                start_date = record._get_schedule_start()
+                while start_date <= today:
+                    start_date = record._get_next_date(start_date)
+                record.next_date = start_date
 
     name = fields.Char(string='Name')
     debit_account = fields.Many2one('account.account', 'Debit Account',
@@ -58,6 +54,11 @@ class RecurringPayments(models.Model):
     date = fields.Date('Starting Date', required=True, default=date.today())
     next_date = fields.Date('Next Schedule', compute=_get_next_schedule,
                             readonly=True, copy=False)
+    last_generated_date = fields.Date('Last Generated', readonly=True,
+                                      copy=False,
+                                      help="Date of the last recurring "
+                                           "entry generated, the next "
+                                           "generation starts after it.")
     recurring_period = fields.Selection(selection=[('days', 'Days'),
                                                    ('weeks', 'Weeks'),
                                                    ('months', 'Months'),
@@ -87,73 +88,128 @@ class RecurringPayments(models.Model):
         if self.partner_id.property_account_receivable_id:
             self.credit_account = self.partner_id.property_account_payable_id
 
+    def write(self, vals):
+        """Restart the generation from the starting date when the schedule
+        changes, the entries already generated being skipped by their
+        reference"""
+        if {'date', 'recurring_period', 'recurring_interval'} & set(vals):
+            vals = dict(vals, last_generated_date=False)
+        return super(RecurringPayments, self).write(vals)
+
+    def _get_next_date(self, current_date):
+        """Return the date following current_date in the schedule"""
+        interval = self.recurring_interval
+        if self.recurring_period == 'days':
+            return current_date + relativedelta(days=interval)
+        if self.recurring_period == 'weeks':
+            return current_date + relativedelta(weeks=interval)
+        if self.recurring_period == 'months':
+            return current_date + relativedelta(months=interval)
+        return current_date + relativedelta(years=interval)
+
+    def _get_schedule_start(self):
+        """Return the first date of the schedule not generated yet"""
+        if self.last_generated_date:
+            return self._get_next_date(self.last_generated_date)
+        return self.date
+
+    def _get_recurring_ref(self, entry_date):
+        """Return the reference of the entry of the given date"""
+        return str(self.id) + '/' + str(entry_date)
+
+    def _get_due_entries(self, today):
+        """
+        List the entries of the running templates due until today, from
+        the last generated date of each template.
+
+        :param today: Last date to generate the entries for.
+        :return: The (template, date) of the entries not generated yet,
+            by template and date, and the last due date of each template.
+        :rtype: tuple
+        """
+        candidates = []
+        last_dates = {}
+        for template in self:
+            if not template.date or template.recurring_interval <= 0:
+                continue
+            entry_date = template._get_schedule_start()
+            while entry_date <= today:
+                candidates.append((template, entry_date))
+                last_dates[template] = entry_date
+                entry_date = template._get_next_date(entry_date)
+        existing = set()
+        refs = [template._get_recurring_ref(entry_date)
+                for template, entry_date in candidates]
+        self.env['account.move'].flush_model(['recurring_ref'])
+        for start in range(0, len(refs), RECURRING_CHUNK_SIZE):
+            self.env.cr.execute(SQL(
+                "SELECT recurring_ref FROM account_move "
+                "WHERE recurring_ref IN %s",
+                tuple(refs[start:start + RECURRING_CHUNK_SIZE])))
+            existing.update(row[0] for row in self.env.cr.fetchall())
+        return [(template, entry_date) for template, entry_date in candidates
+                if template._get_recurring_ref(entry_date) not in existing
+                ], last_dates
+
+    def _prepare_move_values(self, entry_date):
+        """Return the values of the recurring entry of the given date"""
+        return {
+            'date': entry_date,
+            'recurring_ref': self._get_recurring_ref(entry_date),
+            'company_id': self.company_id.id or self.env.company.id,
+            'journal_id': self.journal_id.id,
+            'ref': self.name,
+            'narration': 'Recurring entry',
+            'line_ids': [(0, 0, {
+                'account_id': self.credit_account.id,
+                'partner_id': self.partner_id.id,
+                'credit': self.amount,
+            }), (0, 0, {
+                'account_id': self.debit_account.id,
+                'partner_id': self.partner_id.id,
+                'debit': self.amount,
+            })],
+        }
+
+    def _generate_entries(self, auto_commit=False):
+        """
+        Generate the due recurring entries of the templates, by chunks of
+        RECURRING_CHUNK_SIZE entries created and posted at once, with the
+        recurring line of each generated date. The last generated date of
+        the templates is updated with each chunk, so that a failure does not
+        generate the chunks done again.
+
+        :param bool auto_commit: Commit after each chunk.
+        """
+        entries, last_dates = self._get_due_entries(fields.Date.today())
+        for start in range(0, len(entries), RECURRING_CHUNK_SIZE):
+            chunk = entries[start:start + RECURRING_CHUNK_SIZE]
+            self.env['account.recurring.entries.line'].create([{
+                'date': entry_date,
+                'template_name': template.name,
+                'amount': template.amount,
+                'tmpl_id': template.id,
+            } for template, entry_date in chunk])
+            moves = self.env['account.move'].create([
+                template._prepare_move_values(entry_date)
+                for template, entry_date in chunk])
+            moves.browse([
+                move.id for move, (template, _entry_date) in zip(moves, chunk)
+                if template.journal_state == 'posted']).post()
+            chunk_dates = {}
+            for template, entry_date in chunk:
+                chunk_dates[template] = entry_date
+            for template, last_date in chunk_dates.items():
+                template.last_generated_date = last_date
+            if auto_commit:
+                self.env.cr.commit()
+        # the entries found already generated move the watermark as well
+        for template, last_date in last_dates.items():
+            template.last_generated_date = last_date
+
     @api.model
     def _cron_generate_entries(self):
         """Generate recurring entries based on the defined schedule
         and create corresponding accounting moves."""
-        data = self.env['account.recurring.payments'].search(
-            [('state', '=', 'running')])
-        entries = self.env['account.move'].search(
-            [('recurring_ref', '!=', False)])
-        journal_dates = []
-        journal_codes = []
-        remaining_dates = []
-        for entry in entries:
-            journal_dates.append(str(entry.date))
-            if entry.recurring_ref:
-                journal_codes.append(str(entry.recurring_ref))
-        today = datetime.today()
-        for line in data:
-            if line.date:
-                recurr_dates = []
-                start_date = datetime.strptime(str(line.date), '%Y-%m-%d')
-                while start_date <= today:
-                    recurr_dates.append(str(start_date.date()))
-                    if line.recurring_period == 'days':
-                        start_date += relativedelta(
-                            days=line.recurring_interval)
-                    elif line.recurring_period == 'weeks':
-                        start_date += relativedelta(
-                            weeks=line.recurring_interval)
-                    elif line.recurring_period == 'months':
-                        start_date += relativedelta(
-                            months=line.recurring_interval)
-                    else:
-                        start_date += relativedelta(
-                            years=line.recurring_interval)
-                for rec in recurr_dates:
-                    recurr_code = str(line.id) + '/' + str(rec)
-                    if recurr_code not in journal_codes:
-                        remaining_dates.append({
-                            'date': rec,
-                            'template_name': line.name,
-                            'amount': line.amount,
-                            'tmpl_id': line.id,
-                        })
-        child_ids = self.recurring_lines.create(remaining_dates)
-        for line in child_ids:
-            tmpl_id = line.tmpl_id
-            recurr_code = str(tmpl_id.id) + '/' + str(line.date)
-            line_ids = [(0, 0, {
-                'account_id': tmpl_id.credit_account.id,
-                'partner_id': tmpl_id.partner_id.id,
-                'credit': line.amount,
-                # 'analytic_account_id': tmpl_id.analytic_account_id.id,
-            }), (0, 0, {
-                'account_id': tmpl_id.debit_account.id,
-                'partner_id': tmpl_id.partner_id.id,
-                'debit': line.amount,
-                # 'analytic_account_id': tmpl_id.analytic_account_id.id,
-            })]
-            vals = {
-                'date': line.date,
-                'recurring_ref': recurr_code,
-                'company_id': self.env.company.id,
-                'journal_id': tmpl_id.journal_id.id,
-                'ref': line.template_name,
-                'narration': 'Recurring entry',
-                'line_ids': line_ids
-            }
-            move_id = self.env['account.move'].create(vals)
-            if tmpl_id.journal_state == 'posted':
-                move_id.post()
+        self.search([('state', '=', 'running')])._generate_entries(
+            auto_commit=True)
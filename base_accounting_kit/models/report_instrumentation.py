@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from logging.handlers import RotatingFileHandler
+
+from odoo import api, fields, models
+from odoo.tools import config, str2bool
+
+_logger = logging.getLogger(__name__)
+_report_logger = logging.getLogger(f'{__name__}.calls')
+
+COMPANIES_PARAM = 'base_accounting_kit.report_instrumentation_company_ids'
+LOG_FILE_PARAM = 'base_accounting_kit.report_instrumentation_log_file'
+SIZE_PARAM = 'base_accounting_kit.report_instrumentation_size'
+MEMORY_PARAM = 'base_accounting_kit.report_instrumentation_memory'
+DEFAULT_SIZE = 1000
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Calls being measured in the current thread, a report method called by
+# another one is measured as part of its caller only.
+_measuring = threading.local()
+
+# Memory tracing is process wide: it is started by the first measured call
+# and stopped by the last one, and a peak is only kept for the calls which
+# ran alone, the peak of concurrent calls being shared.
+_tracing_lock = threading.Lock()
+_tracing = {'count': 0, 'calls': 0, 'started': False}
+
+
+def instrument_report(method):
+    """
+    Decorate a report entry point so that its calls are measured in
+    ``account.report.instrumentation`` when the instrumentation is enabled
+    for the current company.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self.env['account.report.instrumentation']
+        if getattr(_measuring, 'active', False) or \
+                not instrumentation._is_enabled():
+            return method(self, *args, **kwargs)
+        _measuring.active = True
+        try:
+            return instrumentation._measure(
+                self, method.__name__,
+                lambda: method(self, *args, **kwargs))
+        finally:
+            _measuring.active = False
+    return wrapper
+
+
+class AccountReportInstrumentation(models.Model):
+    """Measure of a call to a report entry point.
+
+    The entry points decorated with ``instrument_report`` are measured when
+    the id of the current company is listed, comma separated, in the
+    ``base_accounting_kit.report_instrumentation_company_ids`` system
+    parameter. When it is not, the only cost of the decorator is reading the
+    cached parameter. Each measure is written to a rotating log file and
+    stored, the last ``base_accounting_kit.report_instrumentation_size``
+    ones being kept.
+
+    Tracing the memory slows the calls down, so the peak memory is only
+    measured when the ``base_accounting_kit.report_instrumentation_memory``
+    system parameter is set."""
+    _name = 'account.report.instrumentation'
+    _description = 'Report Call Measure'
+    _order = 'id desc'
+
+    name = fields.Char(string='Call', required=True, readonly=True,
+                       help='Model and method called.')
+    res_model = fields.Char(string='Report', readonly=True,
+                            help='Model of the report.')
+    method = fields.Char(string='Method', readonly=True,
+                         help='Method of the report called.')
+    user_id = fields.Many2one('res.users', string='User', readonly=True,
+                              help='User who called the report.')
+    company_id = fields.Many2one('res.company', string='Company',
+                                 readonly=True,
+                                 help='Company the report was called in.')
+    duration = fields.Float(string='Duration (s)', readonly=True,
+                            digits=(16, 4), help='Wall time of the call.')
+    query_count = fields.Integer(string='Queries', readonly=True,
+                                 help='Number of SQL queries executed.')
+    query_time = fields.Float(string='Query Time (s)', readonly=True,
+                              digits=(16, 4),
+                              help='Time spent in the SQL queries.')
+    row_count = fields.Integer(string='Rows', readonly=True,
+                               help='Rows returned or affected by the SQL '
+                                    'queries.')
+    prefetch_count = fields.Integer(string='Prefetched Values',
+                                    readonly=True,
+                                    help='Field values loaded into the ORM '
+                                         'cache.')
+    peak_memory = fields.Integer(string='Peak Memory (KiB)', readonly=True,
+                                 help='Peak of the Python memory allocated '
+                                      'during the call, when traced and no '
+                                      'other measured call ran meanwhile.')
+    error = fields.Char(string='Error', readonly=True,
+                        help='Exception raised by the call.')
+
+    @api.model
+    def _is_enabled(self):
+        """Return whether the calls are measured for the current company."""
+        company_ids = self.env['ir.config_parameter'].sudo().get_param(
+            COMPANIES_PARAM, '')
+        return str(self.env.company.id) in company_ids.replace(
+            ' ', '').split(',')
+
+    @api.model
+    def _start_tracing(self):
+        """
+        Start tracing the memory for a measured call, unless it is already
+        traced.
+
+        :return: The number of measured calls started so far, or None when
+            the memory of the call is not traced alone.
+        """
+        with _tracing_lock:
+            _tracing['count'] += 1
+            _tracing['calls'] += 1
+            if _tracing['count'] == 1:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _tracing['started'] = True
+                tracemalloc.reset_peak()
+                return _tracing['calls']
+            return None
+
+    @api.model
+    def _stop_tracing(self, calls):
+        """
+        Stop tracing the memory after the last measured call.
+
+        :param calls: The value returned by ``_start_tracing``.
+        :return: The peak memory of the call, or False when other measured
+            calls ran meanwhile.
+        """
+        with _tracing_lock:
+            peak_memory = False
+            if calls is not None and calls == _tracing['calls']:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            _tracing['count'] -= 1
+            if not _tracing['count'] and _tracing['started']:
+                tracemalloc.stop()
+                _tracing['started'] = False
+            return peak_memory
+
+    def _get_prefetch_count(self):
+        """Return the number of field values in the ORM cache."""
+        return sum(len(values) for values in self.env.cache._data.values())
+
+    @api.model
+    def _measure(self, report, method_name, call):
+        """
+        Call a report entry point and record its measure.
+
+        :param report: The report model called.
+        :param str method_name: Name of the method called.
+        :param call: Function without argument calling the method.
+        :return: The result of the call.
+        """
+        cr = self.env.cr
+        thread = threading.current_thread()
+        if not hasattr(thread, 'query_time'):
+            # Only set for HTTP requests, the cursor updates them when set.
+            thread.query_count = 0
+            thread.query_time = 0
+        query_time = thread.query_time
+        query_count = cr.sql_log_count
+        prefetch_count = self._get_prefetch_count()
+        row_count = [0]
+        execute = cr.execute
+
+        def counting_execute(*args, **kwargs):
+            result = execute(*args, **kwargs)
+            row_count[0] += max(cr.rowcount, 0)
+            return result
+
+        cr.execute = counting_execute
+        trace_memory = str2bool(self.env['ir.config_parameter'].sudo(
+        ).get_param(MEMORY_PARAM, 'False'))
+        if trace_memory:
+            calls = self._start_tracing()
+        error = False
+        start = time.perf_counter()
+        try:
+            return call()
+        except Exception as exception:
+            error = repr(exception)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            peak_memory = trace_memory and self._stop_tracing(calls)
+            del cr.execute
+            self._record({
+                'name': f'{report._name}.{method_name}',
+                'res_model': report._name,
+                'method': method_name,
+                'user_id': self.env.uid,
+                'company_id': self.env.company.id,
+                'duration': duration,
+                'query_count': cr.sql_log_count - query_count,
+                'query_time': thread.query_time - query_time,
+                'row_count': row_count[0],
+                'prefetch_count': max(
+                    self._get_prefetch_count() - prefetch_count, 0),
+                'peak_memory': peak_memory and peak_memory // 1024,
+                'error': error,
+            })
+
+    @api.model
+    def _record(self, values):
+        """Write a measure to the log file and store it. It is stored from
+        another cursor, so that it is kept when the call fails or its
+        transaction is rolled back."""
+        self._get_report_logger().info(json.dumps(values))
+        try:
+            with self.env.registry.cursor() as cr:
+                measure = self.with_env(self.env(cr=cr, su=True)).create(
+                    values)
+                measure._gc_measures()
+        except Exception:
+            _logger.exception("Could not store the report call measure")
+
+    def _gc_measures(self):
+        """Only keep the last measures."""
+        size = int(self.env['ir.config_parameter'].get_param(
+            SIZE_PARAM, DEFAULT_SIZE))
+        if self.id % 100 == 0:
+            self.search([], offset=size).unlink()
+
+    @api.model
+    def _get_report_logger(self):
+        """Return the logger of the measures, writing to a rotating file set
+        by the ``base_accounting_kit.report_instrumentation_log_file``
+        system parameter, in the data directory by default."""
+        if not _report_logger.handlers:
+            path = self.env['ir.config_parameter'].sudo().get_param(
+                LOG_FILE_PARAM) or os.path.join(
+                config['data_dir'], 'report_instrumentation.log')
+            try:
+                handler = RotatingFileHandler(
+                    path, maxBytes=LOG_MAX_BYTES,
+                    backupCount=LOG_BACKUP_COUNT)
+            except OSError:
+                _logger.warning("Cannot write the report measures to %s",
+                                path)
+                handler = logging.NullHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            _report_logger.addHandler(handler)
+            _report_logger.propagate = False
+        return _report_logger
@@ -19,15 +19,20 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from datetime import date, timedelta
+from datetime import timedelta
 from odoo import api, fields, models, _
 import base64
 import io
 import json
 import xlsxwriter
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import SQL
 from odoo.tools.json import json_default
 
+FOLLOWUP_FIELDS = ['total_due', 'total_overdue', 'next_reminder_date',
+                   'followup_status']
+
+
 class ResPartner(models.Model):
     """Inheriting res.partner"""
     _inherit = "res.partner"
@@ -38,18 +43,19 @@ class ResPartner(models.Model):
                                    domain=(
                                    [('payment_state', '=', 'not_paid'),
                                     ('move_type', '=', 'out_invoice')]))
-    total_due = fields.Monetary(compute='_compute_for_followup', store=False,
-                                readonly=True)
-    next_reminder_date = fields.Date(compute='_compute_for_followup',
-                                     store=False, readonly=True)
-    total_overdue = fields.Monetary(compute='_compute_for_followup',
-                                    store=False, readonly=True)
+    # Follow-up values, stored per company by _refresh_followup
+    total_due = fields.Monetary(company_dependent=True, readonly=True,
+                                copy=False)
+    next_reminder_date = fields.Date(company_dependent=True, readonly=True,
+                                     copy=False)
+    total_overdue = fields.Monetary(company_dependent=True, readonly=True,
+                                    copy=False)
     followup_status = fields.Selection(
         [('in_need_of_action', 'In need of action'),
          ('with_overdue_invoices', 'With overdue invoices'),
          ('no_action_needed', 'No action needed')],
-        string='Followup status',
-        )
+        string='Followup status', company_dependent=True, readonly=True,
+        copy=False)
 
     warning_stage = fields.Float(string='Warning Amount',
                                  help="A warning message will appear once the "
@@ -84,75 +90,153 @@ class ResPartner(models.Model):
         help="currency related to Customer or Vendor")
 
 
-    def _compute_for_followup(self):
+    @api.model
+    def _get_followup_delays(self, companies):
+        """
+        Load the follow-up delay of the given companies at once.
+
+        :param companies: Companies to load the delay of.
+        :return: The smallest follow-up line delay of each company id, 0 for
+            the companies without follow-up lines.
+        :rtype: dict
+        """
+        self.env['followup.line'].flush_model(['delay', 'followup_id'])
+        self.env['account.followup'].flush_model(['company_id'])
+        self.env.cr.execute(SQL("""
+            SELECT af.company_id, MIN(fl.delay)
+              FROM followup_line fl
+              JOIN account_followup af ON fl.followup_id = af.id
+             WHERE af.company_id IN %s
+          GROUP BY af.company_id
+        """, tuple(companies.ids)))
+        delays = dict.fromkeys(companies.ids, 0)
+        delays.update(self.env.cr.fetchall())
+        return delays
+
+    def _get_followup_values(self, companies):
+        """
+        Compute the follow-up values of the partners for the given
+        companies, with one grouped query on the unpaid customer invoices.
+
+        :param companies: Companies to compute the values for.
+        :return: The values of 'total_due', 'total_overdue',
+            'next_reminder_date' and 'followup_status' by (partner id,
+            company id), for all the partners and companies.
+        :rtype: dict
+        """
+        today = fields.Date.context_today(self)
+        self.env['account.move'].flush_model([
+            'partner_id', 'company_id', 'move_type', 'payment_state',
+            'amount_residual', 'invoice_date_due', 'date'])
+        self.env.cr.execute(SQL("""
+            SELECT partner_id, company_id,
+                   SUM(amount_residual),
+                   SUM(amount_residual) FILTER (
+                       WHERE COALESCE(invoice_date_due, date) < %(today)s),
+                   MIN(invoice_date_due)
+              FROM account_move
+             WHERE move_type = 'out_invoice'
+               AND payment_state = 'not_paid'
+               AND partner_id IN %(partner_ids)s
+               AND company_id IN %(company_ids)s
+          GROUP BY partner_id, company_id
+        """, today=today, partner_ids=tuple(self.ids),
+            company_ids=tuple(companies.ids)))
+        totals = {(partner_id, company_id): rest for
+                  partner_id, company_id, *rest in self.env.cr.fetchall()}
+        delays = self._get_followup_delays(companies)
+        values = {}
+        for company in companies:
+            for partner in self:
+                total_due, total_overdue, min_date = totals.get(
+                    (partner.id, company.id), (0.0, 0.0, None))
+                total_overdue = total_overdue or 0.0
+                date_reminder = (min_date or today) + timedelta(
+                    days=delays[company.id])
+                if total_overdue > 0 and date_reminder > today:
+                    followup_status = 'with_overdue_invoices'
+                elif total_due > 0 and date_reminder <= today:
+                    followup_status = 'in_need_of_action'
+                else:
+                    followup_status = 'no_action_needed'
+                values[partner.id, company.id] = {
+                    'total_due': total_due,
+                    'total_overdue': total_overdue,
+                    'next_reminder_date': date_reminder,
+                    'followup_status': followup_status,
+                }
+        return values
+
+    def _refresh_followup(self, companies=None):
+        """
+        Compute and store the follow-up values of the partners.
+
+        The values are company dependent, they are written for all the given
+        companies with one update per company.
+
+        :param companies: Companies to refresh the values of, all the
+            companies by default.
+        """
+        if not self:
+            return
+        companies = companies or self.env['res.company'].sudo().search([])
+        values = self._get_followup_values(companies)
+        self.flush_model(FOLLOWUP_FIELDS)
+        for company in companies:
+            rows = SQL(', ').join(
+                SQL("(%s, %s::numeric, %s::numeric, %s::date, %s::text)",
+                    partner.id, value['total_due'], value['total_overdue'],
+                    value['next_reminder_date'], value['followup_status'])
+                for partner in self
+                for value in [values[partner.id, company.id]])
+            self.env.cr.execute(SQL("""
+                UPDATE res_partner partner
+                   SET %(assignments)s
+                  FROM (VALUES %(rows)s) AS followup(id, %(columns)s)
+                 WHERE partner.id = followup.id
+            """, rows=rows, columns=SQL(', ').join(
+                SQL.identifier(name) for name in FOLLOWUP_FIELDS),
+                assignments=SQL(', ').join(
+                    SQL("%(column)s = COALESCE(partner.%(column)s, '{}')"
+                        " || jsonb_build_object(%(company)s, followup.%(column)s)",
+                        column=SQL.identifier(name), company=str(company.id))
+                    for name in FOLLOWUP_FIELDS)))
+        self.invalidate_recordset(FOLLOWUP_FIELDS)
+
+    def action_refresh_followup(self):
+        """Refresh the follow-up values of the selected partners."""
+        self._refresh_followup()
+
+    @api.model
+    def _cron_refresh_followup(self, batch_size=1000, auto_commit=True):
         """
-        Compute the fields 'total_due', 'total_overdue' , 'next_reminder_date' and 'followup_status'
+        Refresh the follow-up values of the partners having customer
+        invoices or stored follow-up values, by batches committed one by
+        one.
+
+        :param int batch_size: Number of partners refreshed at once.
+        :param bool auto_commit: Commit after each batch, False when called
+            while installing or updating the module.
         """
-        for record in self:
-            total_due = 0
-            total_overdue = 0
-            today = fields.Date.today()
-            for am in record.invoice_list:
-                if am.company_id == self.env.company:
-                    amount = am.amount_residual
-                    total_due += amount
-
-                    is_overdue = today > am.invoice_date_due if am.invoice_date_due else today > am.date
-                    if is_overdue:
-                        total_overdue += amount or 0
-            min_date = record.get_min_date()
-            action = record.action_after()
-            if min_date:
-                date_reminder = min_date + timedelta(days=action)
-                if date_reminder:
-                    record.next_reminder_date = date_reminder
-            else:
-                date_reminder = today
-                record.next_reminder_date = date_reminder
-            if total_overdue > 0 and date_reminder > today:
-                followup_status = "with_overdue_invoices"
-            elif total_due > 0 and date_reminder <= today:
-                followup_status = "in_need_of_action"
-            else:
-                followup_status = "no_action_needed"
-            record.total_due = total_due
-            record.total_overdue = total_overdue
-            record.followup_status = followup_status
-
-    def get_min_date(self):
-        """Get the minimum invoice due date from the partner's invoice list."""
-        today = date.today()
-        for this in self:
-            if this.invoice_list:
-                min_list = this.invoice_list.mapped('invoice_date_due')
-                while False in min_list:
-                    min_list.remove(False)
-                return min(min_list)
-            else:
-                return today
-
-    def get_delay(self):
-        """Retrieve the delay information for follow-up lines associated with the company."""
-        delay = """SELECT fl.id, fl.delay
-                    FROM followup_line fl
-                    JOIN account_followup af ON fl.followup_id = af.id
-                    WHERE af.company_id = %s
-                    ORDER BY fl.delay;
-
-                    """
-        self._cr.execute(delay, [self.env.company.id])
-        record = self._cr.dictfetchall()
-
-        return record
-
-    def action_after(self):
-        """Retrieve the delay information for follow-up lines associated with the company and return the delay value if found."""
-        lines = self.env['followup.line'].search([(
-            'followup_id.company_id', '=', self.env.company.id)])
-        if lines:
-            record = self.get_delay()
-            for i in record:
-                return i['delay']
+        self.env['account.move'].flush_model(['partner_id', 'move_type'])
+        self.env.cr.execute("""
+            SELECT partner_id FROM account_move
+             WHERE move_type = 'out_invoice' AND partner_id IS NOT NULL
+             UNION
+            SELECT id FROM res_partner WHERE followup_status IS NOT NULL
+             ORDER BY 1
+        """)
+        partner_ids = [row[0] for row in self.env.cr.fetchall()]
+        companies = self.env['res.company'].sudo().search([])
+        for start in range(0, len(partner_ids), batch_size):
+            partners = self.browse(partner_ids[start:start + batch_size])
+            partners._refresh_followup(companies)
+            if auto_commit:
+                self.env['ir.cron']._notify_progress(
+                    done=min(start + batch_size, len(partner_ids)),
+                    remaining=max(len(partner_ids) - start - batch_size, 0))
+                self.env.cr.commit()
+            self.env.invalidate_all()
 
     def compute_due_amount(self):
         """Compute function to compute the due amount with the
@@ -221,32 +305,140 @@ class ResPartner(models.Model):
                    AND company_id = '%s' """ % (self.id, self.env.company.id)
         return amount_query
 
+    def _get_statement_data(self):
+        """
+        Fetch the customer statement data of the partners, the unpaid
+        customer invoices of all of them being read with one query.
+
+        :return: The data of the statement report of each partner id.
+        :rtype: dict
+        """
+        self.env['account.move'].flush_model([
+            'name', 'invoice_date', 'invoice_date_due', 'amount_total_signed',
+            'amount_residual_signed', 'amount_residual', 'payment_state',
+            'state', 'move_type', 'partner_id', 'company_id'])
+        rows = {partner.id: [] for partner in self}
+        if self:
+            self.env.cr.execute(SQL("""
+                SELECT partner_id, name, invoice_date, invoice_date_due,
+                       amount_total_signed AS sub_total,
+                       amount_residual_signed AS amount_due,
+                       amount_residual AS balance
+                  FROM account_move
+                 WHERE payment_state != 'paid'
+                   AND state = 'posted'
+                   AND move_type = 'out_invoice'
+                   AND partner_id IN %s
+                   AND company_id = %s
+              ORDER BY partner_id, invoice_date, id
+            """, tuple(self.ids), self.env.company.id))
+            for row in self.env.cr.dictfetchall():
+                rows[row.pop('partner_id')].append(row)
+        return {partner.id: {
+            'customer': partner.display_name,
+            'street': partner.street,
+            'street2': partner.street2,
+            'city': partner.city,
+            'state': partner.state_id.name,
+            'zip': partner.zip,
+            'my_data': rows[partner.id],
+            'total': (sum(row['sub_total'] for row in rows[partner.id])
+                      if rows[partner.id] else None),
+            'balance': (sum(row['balance'] for row in rows[partner.id])
+                        if rows[partner.id] else None),
+            'currency': partner.currency_id.symbol,
+        } for partner in self}
+
+    def _render_statement_pdf(self, data):
+        """ Render the PDF statement of the partner from its data """
+        return self.env['ir.actions.report'].sudo()._render_qweb_pdf(
+            'base_accounting_kit.res_partner_action', self.ids, data=data)[0]
+
+    def _render_statement_xlsx(self, data):
+        """ Render the XLSX statement of the partner from its data """
+        output = io.BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        sheet = workbook.add_worksheet()
+        cell_format = workbook.add_format({
+            'font_size': '14px', 'bold': True})
+        txt = workbook.add_format({'font_size': '13px'})
+        head = workbook.add_format(
+            {'align': 'center', 'bold': True, 'font_size': '22px'})
+        sheet.merge_range('B2:P4', 'Payment Statement Report', head)
+        date_style = workbook.add_format(
+            {'text_wrap': True, 'align': 'center',
+             'num_format': 'yyyy-mm-dd'})
+        if data['customer']:
+            sheet.write('B7:C7', 'Customer : ', cell_format)
+            sheet.merge_range('D7:G7', data['customer'], txt)
+        sheet.write('B9:C7', 'Address : ', cell_format)
+        if data['street']:
+            sheet.merge_range('D9:F9', data['street'], txt)
+        if data['street2']:
+            sheet.merge_range('D10:F10', data['street2'], txt)
+        if data['city']:
+            sheet.merge_range('D11:F11', data['city'], txt)
+        if data['state']:
+            sheet.merge_range('D12:F12', data['state'], txt)
+        if data['zip']:
+            sheet.merge_range('D13:F13', data['zip'], txt)
+        sheet.write('B15', 'Date', cell_format)
+        sheet.write('D15', 'Invoice/Bill Number', cell_format)
+        sheet.write('H15', 'Due Date', cell_format)
+        sheet.write('J15', 'Invoices/Debit', cell_format)
+        sheet.write('M15', 'Amount Due', cell_format)
+        sheet.write('P15', 'Balance Due', cell_format)
+        row = 16
+        column = 0
+        for record in data['my_data']:
+            sub_total = data['currency'] + str(record['sub_total'])
+            amount_due = data['currency'] + str(record['amount_due'])
+            balance = data['currency'] + str(record['balance'])
+            total = data['currency'] + str(data['total'])
+            remain_balance = data['currency'] + str(data['balance'])
+            sheet.merge_range(row, column + 1, row, column + 2,
+                              record['invoice_date'], date_style)
+            sheet.merge_range(row, column + 3, row, column + 5,
+                              record['name'], txt)
+            sheet.merge_range(row, column + 7, row, column + 8,
+                              record['invoice_date_due'], date_style)
+            sheet.merge_range(row, column + 9, row, column + 10,
+                              sub_total, txt)
+            sheet.merge_range(row, column + 12, row, column + 13,
+                              amount_due, txt)
+            sheet.merge_range(row, column + 15, row, column + 16,
+                              balance, txt)
+            row = row + 1
+        sheet.write(row + 2, column + 1, 'Total Amount : ', cell_format)
+        sheet.merge_range(row + 2, column + 4, row + 2, column + 5,
+                          total, txt)
+        sheet.write(row + 4, column + 1, 'Balance Due : ', cell_format)
+        sheet.merge_range(row + 4, column + 4, row + 4, column + 5,
+                          remain_balance, txt)
+        workbook.close()
+        output.seek(0)
+        content = output.read()
+        output.close()
+        return content
+
+    def _prepare_statement_mail_values(self, attachment):
+        """ Return the values of the mail sending the statement """
+        return {
+            'email_to': self.email,
+            'subject': 'Payment Statement Report',
+            'body_html': '<p>Dear <strong> Mr/Miss. ' + self.name +
+                         '</strong> </p> <p> We have attached your '
+                         'payment statement. Please check </p> '
+                         '<p>Best regards, </p> <p> ' + self.env.user.name,
+            'attachment_ids': [attachment.id],
+        }
+
     def action_share_pdf(self):
         """ Action for sharing customer pdf report """
         if self.customer_report_ids:
-            main_query = self.main_query()
-            main_query += """ AND move_type IN ('out_invoice')"""
-            amount = self.amount_query()
-            amount += """ AND move_type IN ('out_invoice')"""
-            self.env.cr.execute(main_query)
-            main = self.env.cr.dictfetchall()
-            self.env.cr.execute(amount)
-            amount = self.env.cr.dictfetchall()
-            data = {
-                'customer': self.display_name,
-                'street': self.street,
-                'street2': self.street2,
-                'city': self.city,
-                'state': self.state_id.name,
-                'zip': self.zip,
-                'my_data': main,
-                'total': amount[0]['total'],
-                'balance': amount[0]['balance'],
-                'currency': self.currency_id.symbol,
-            }
-            report = self.env['ir.actions.report'].sudo()._render_qweb_pdf(
-                'base_accounting_kit.res_partner_action', self, data=data)
-            data_record = base64.b64encode(report[0])
+            data = self._get_statement_data()[self.id]
+            report = self._render_statement_pdf(data)
+            data_record = base64.b64encode(report)
             ir_values = {
                 'name': 'Statement Report',
                 'type': 'binary',
@@ -255,15 +447,7 @@ class ResPartner(models.Model):
                 'res_model': 'res.partner'
             }
             attachment = self.env['ir.attachment'].sudo().create(ir_values)
-            email_values = {
-                'email_to': self.email,
-                'subject': 'Payment Statement Report',
-                'body_html': '<p>Dear <strong> Mr/Miss. ' + self.name +
-                             '</strong> </p> <p> We have attached your '
-                             'payment statement. Please check </p> '
-                             '<p>Best regards, </p> <p> ' + self.env.user.name,
-                'attachment_ids': [attachment.id],
-            }
+            email_values = self._prepare_statement_mail_values(attachment)
             mail = self.env['mail.mail'].sudo().create(email_values)
             mail.send()
             return {
@@ -281,26 +465,7 @@ class ResPartner(models.Model):
     def action_print_pdf(self):
         """ Action for printing pdf report """
         if self.customer_report_ids:
-            main_query = self.main_query()
-            main_query += """ AND move_type IN ('out_invoice')"""
-            amount = self.amount_query()
-            amount += """ AND move_type IN ('out_invoice')"""
-            self.env.cr.execute(main_query)
-            main = self.env.cr.dictfetchall()
-            self.env.cr.execute(amount)
-            amount = self.env.cr.dictfetchall()
-            data = {
-                'customer': self.display_name,
-                'street': self.street,
-                'street2': self.street2,
-                'city': self.city,
-                'state': self.state_id.name,
-                'zip': self.zip,
-                'my_data': main,
-                'total': amount[0]['total'],
-                'balance': amount[0]['balance'],
-                'currency': self.currency_id.symbol,
-            }
+            data = self._get_statement_data()[self.id]
             return self.env.ref('base_accounting_kit.res_partner_action'
                                 ).report_action(self, data=data)
         else:
@@ -309,26 +474,7 @@ class ResPartner(models.Model):
     def action_print_xlsx(self):
         """ Action for printing xlsx report of customers """
         if self.customer_report_ids:
-            main_query = self.main_query()
-            main_query += """ AND move_type IN ('out_invoice')"""
-            amount = self.amount_query()
-            amount += """ AND move_type IN ('out_invoice')"""
-            self.env.cr.execute(main_query)
-            main = self.env.cr.dictfetchall()
-            self.env.cr.execute(amount)
-            amount = self.env.cr.dictfetchall()
-            data = {
-                'customer': self.display_name,
-                'street': self.street,
-                'street2': self.street2,
-                'city': self.city,
-                'state': self.state_id.name,
-                'zip': self.zip,
-                'my_data': main,
-                'total': amount[0]['total'],
-                'balance': amount[0]['balance'],
-                'currency': self.currency_id.symbol,
-            }
+            data = self._get_statement_data()[self.id]
             return {
                 'type': 'ir.actions.report',
                 'data': {
@@ -410,92 +556,12 @@ class ResPartner(models.Model):
         response.stream.write(output.read())
         output.close()
 
+
     def action_share_xlsx(self):
         """ Action for sharing xlsx report via email """
         if self.customer_report_ids:
-            main_query = self.main_query()
-            main_query += """ AND move_type IN ('out_invoice')"""
-            amount = self.amount_query()
-            amount += """ AND move_type IN ('out_invoice')"""
-            self.env.cr.execute(main_query)
-            main = self.env.cr.dictfetchall()
-            self.env.cr.execute(amount)
-            amount = self.env.cr.dictfetchall()
-            data = {
-                'customer': self.display_name,
-                'street': self.street,
-                'street2': self.street2,
-                'city': self.city,
-                'state': self.state_id.name,
-                'zip': self.zip,
-                'my_data': main,
-                'total': amount[0]['total'],
-                'balance': amount[0]['balance'],
-                'currency': self.currency_id.symbol,
-            }
-            output = io.BytesIO()
-            workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-            sheet = workbook.add_worksheet()
-            cell_format = workbook.add_format({
-                'font_size': '14px', 'bold': True})
-            txt = workbook.add_format({'font_size': '13px'})
-            head = workbook.add_format(
-                {'align': 'center', 'bold': True, 'font_size': '22px'})
-            sheet.merge_range('B2:P4', 'Payment Statement Report', head)
-            date_style = workbook.add_format(
-                {'text_wrap': True, 'align': 'center',
-                 'num_format': 'yyyy-mm-dd'})
-            if data['customer']:
-                sheet.write('B7:C7', 'Customer : ', cell_format)
-                sheet.merge_range('D7:G7', data['customer'], txt)
-            sheet.write('B9:C7', 'Address : ', cell_format)
-            if data['street']:
-                sheet.merge_range('D9:F9', data['street'], txt)
-            if data['street2']:
-                sheet.merge_range('D10:F10', data['street2'], txt)
-            if data['city']:
-                sheet.merge_range('D11:F11', data['city'], txt)
-            if data['state']:
-                sheet.merge_range('D12:F12', data['state'], txt)
-            if data['zip']:
-                sheet.merge_range('D13:F13', data['zip'], txt)
-            sheet.write('B15', 'Date', cell_format)
-            sheet.write('D15', 'Invoice/Bill Number', cell_format)
-            sheet.write('H15', 'Due Date', cell_format)
-            sheet.write('J15', 'Invoices/Debit', cell_format)
-            sheet.write('M15', 'Amount Due', cell_format)
-            sheet.write('P15', 'Balance Due', cell_format)
-            row = 16
-            column = 0
-            for record in data['my_data']:
-                sub_total = data['currency'] + str(record['sub_total'])
-                amount_due = data['currency'] + str(record['amount_due'])
-                balance = data['currency'] + str(record['balance'])
-                total = data['currency'] + str(data['total'])
-                remain_balance = data['currency'] + str(data['balance'])
-                sheet.merge_range(row, column + 1, row, column + 2,
-                                  record['invoice_date'], date_style)
-                sheet.merge_range(row, column + 3, row, column + 5,
-                                  record['name'], txt)
-                sheet.merge_range(row, column + 7, row, column + 8,
-                                  record['invoice_date_due'], date_style)
-                sheet.merge_range(row, column + 9, row, column + 10,
-                                  sub_total, txt)
-                sheet.merge_range(row, column + 12, row, column + 13,
-                                  amount_due, txt)
-                sheet.merge_range(row, column + 15, row, column + 16,
-                                  balance, txt)
-                row = row + 1
-            sheet.write(row + 2, column + 1, 'Total Amount : ', cell_format)
-            sheet.merge_range(row + 2, column + 4, row + 2, column + 5,
-                              total, txt)
-            sheet.write(row + 4, column + 1, 'Balance Due : ', cell_format)
-            sheet.merge_range(row + 4, column + 4, row + 4, column + 5,
-                              remain_balance, txt)
-            workbook.close()
-            output.seek(0)
-            xlsx = base64.b64encode(output.read())
-            output.close()
+            data = self._get_statement_data()[self.id]
+            xlsx = base64.b64encode(self._render_statement_xlsx(data))
             ir_values = {
                 'name': "Statement Report.xlsx",
                 'type': 'binary',
@@ -503,15 +569,7 @@ class ResPartner(models.Model):
                 'store_fname': xlsx,
             }
             attachment = self.env['ir.attachment'].sudo().create(ir_values)
-            email_values = {
-                'email_to': self.email,
-                'subject': 'Payment Statement Report',
-                'body_html': '<p>Dear <strong> Mr/Miss. ' + self.name +
-                             '</strong> </p> <p> We have attached your'
-                             ' payment statement. Please check </p> '
-                             '<p>Best regards, </p> <p> ' + self.env.user.name,
-                'attachment_ids': [attachment.id],
-            }
+            email_values = self._prepare_statement_mail_values(attachment)
             mail = self.env['mail.mail'].sudo().create(email_values)
             mail.send()
             return {
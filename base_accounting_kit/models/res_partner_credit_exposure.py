@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from collections import defaultdict
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+
+class ResPartnerCreditExposure(models.Model):
+    """Credit exposure of a commercial partner in a company.
+
+    Reading the due amount of a partner sums its receivable and payable
+    lines each time, which confirming many orders at once pays for every
+    order. The exposure is kept per commercial partner and company instead:
+    the receivable balance, the confirmed sale orders not invoiced yet and
+    the draft customer invoices not coming from an order.
+
+    A row is computed the first time the limit of a customer is checked and
+    is then moved by the difference each change of a customer move, sale
+    order or order line makes, see ``_add_amounts``. Direct writes on the
+    journal items or on fields those hooks do not watch only reach the
+    exposure through the ``Refresh Credit Exposures`` scheduled action,
+    which recomputes the customers with a credit limit each night."""
+    _name = 'res.partner.credit.exposure'
+    _description = 'Partner Credit Exposure'
+    _rec_name = 'partner_id'
+
+    partner_id = fields.Many2one('res.partner', string='Partner',
+                                 required=True, readonly=True,
+                                 ondelete='cascade',
+                                 help='Commercial partner of the exposure.')
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, readonly=True,
+                                 ondelete='cascade',
+                                 help='Company of the exposure.')
+    currency_id = fields.Many2one(related='company_id.currency_id',
+                                  help='Currency of the company.')
+    receivable_amount = fields.Monetary(string='Receivable', readonly=True,
+                                        help='Balance of the posted '
+                                             'receivable items.')
+    unbilled_amount = fields.Monetary(string='Unbilled Orders',
+                                      readonly=True,
+                                      help='Amount of the confirmed sale '
+                                           'orders left to invoice.')
+    draft_invoice_amount = fields.Monetary(string='Draft Invoices',
+                                           readonly=True,
+                                           help='Amount of the draft '
+                                                'customer invoices not '
+                                                'coming from an order.')
+    exposure = fields.Monetary(string='Exposure', readonly=True,
+                               help='Total amount the partner owes or '
+                                    'will owe.')
+
+    _sql_constraints = [
+        ('partner_company_uniq', 'unique(partner_id, company_id)',
+         'A partner has one credit exposure per company.'),
+    ]
+
+    @api.model
+    def _get_exposures(self, partners, company):
+        """
+        Return the credit exposure of the commercial partners of
+        ``partners``, computing the missing ones.
+
+        :param partners: Partners to get the exposure of.
+        :param company: Company of the exposures.
+        :return: The exposure of each commercial partner id.
+        :rtype: dict
+        """
+        commercial_partners = partners.commercial_partner_id
+        self.flush_model()
+        query = SQL("""
+            SELECT partner_id, exposure
+              FROM res_partner_credit_exposure
+             WHERE partner_id IN %s AND company_id = %s
+        """, tuple(commercial_partners.ids) or (None,), company.id)
+        self.env.cr.execute(query)
+        exposures = dict(self.env.cr.fetchall())
+        missing = commercial_partners.filtered(
+            lambda partner: partner.id not in exposures)
+        if missing:
+            self._refresh(missing, company)
+            self.env.cr.execute(query)
+            exposures = dict(self.env.cr.fetchall())
+        return exposures
+
+    @api.model
+    def _is_enabled(self):
+        """Return whether the customer credit limits are enabled, the
+        exposures being only maintained then."""
+        return bool(self.env['ir.config_parameter'].sudo().get_param(
+            'customer_credit_limit', default=False))
+
+    @api.model
+    def _get_move_amounts(self, moves):
+        """
+        Return what moves add to the exposure of their customers: the
+        receivable balance of the posted moves and the total of the draft
+        customer invoices not coming from an order, the same amounts
+        ``_refresh`` sums.
+
+        :param moves: Journal entries to get the amounts of.
+        :return: The receivable, unbilled and draft invoice amounts of
+            each (commercial partner id, company id).
+        :rtype: dict
+        """
+        amounts = defaultdict(lambda: [0.0, 0.0, 0.0])
+        for move in moves.sudo():
+            if move.state == 'posted':
+                for line in move.line_ids:
+                    if line.account_type == 'asset_receivable' \
+                            and line.partner_id:
+                        amounts[line.partner_id.commercial_partner_id.id,
+                                line.company_id.id][0] += line.balance
+            elif move.state == 'draft' and move.partner_id \
+                    and move.move_type in ('out_invoice', 'out_refund') \
+                    and not move.line_ids.sale_line_ids:
+                amounts[move.partner_id.commercial_partner_id.id,
+                        move.company_id.id][2] += move.amount_total_signed
+        return amounts
+
+    @api.model
+    def _get_order_amounts(self, orders):
+        """
+        Return the amount the confirmed ``orders`` have left to invoice,
+        in the currency of their company.
+
+        :param orders: Sale orders to get the amounts of.
+        :return: The receivable, unbilled and draft invoice amounts of
+            each (commercial partner id, company id).
+        :rtype: dict
+        """
+        amounts = defaultdict(lambda: [0.0, 0.0, 0.0])
+        today = fields.Date.today()
+        for order in orders.sudo().filtered(
+                lambda order: order.state == 'sale'):
+            company = order.company_id
+            amounts[order.partner_id.commercial_partner_id.id, company.id][
+                1] += order.currency_id._convert(
+                order.amount_to_invoice, company.currency_id, company, today)
+        return amounts
+
+    @api.model
+    def _get_amounts(self, moves=None, orders=None):
+        """Return the amounts of ``moves`` and ``orders`` together, as
+        returned by ``_get_move_amounts``."""
+        amounts = defaultdict(lambda: [0.0, 0.0, 0.0])
+        for part in (self._get_move_amounts(moves or self.env['account.move']),
+                     self._get_order_amounts(orders or self.env['sale.order'])):
+            for key, values in part.items():
+                amounts[key] = [total + value for total, value
+                                in zip(amounts[key], values)]
+        return amounts
+
+    @api.model
+    def _add_amounts(self, before, after):
+        """
+        Move the stored exposures by the difference between two results of
+        ``_get_amounts``, taken before and after a change. Partners without
+        an exposure yet are left for ``_get_exposures`` to compute.
+
+        :param dict before: Amounts before the change.
+        :param dict after: Amounts after the change.
+        """
+        rows = []
+        for key in set(before) | set(after):
+            deltas = [new - old for old, new in zip(
+                before.get(key, (0.0, 0.0, 0.0)),
+                after.get(key, (0.0, 0.0, 0.0)))]
+            if any(deltas):
+                rows.append(SQL("(%s, %s, %s, %s, %s)", *key, *deltas))
+        if not rows:
+            return
+        self.flush_model()
+        self.env.cr.execute(SQL("""
+            UPDATE res_partner_credit_exposure exposure
+               SET receivable_amount = exposure.receivable_amount
+                       + delta.receivable,
+                   unbilled_amount = exposure.unbilled_amount + delta.unbilled,
+                   draft_invoice_amount = exposure.draft_invoice_amount
+                       + delta.draft,
+                   exposure = exposure.exposure + delta.receivable
+                       + delta.unbilled + delta.draft,
+                   write_date = now() AT TIME ZONE 'UTC'
+              FROM (VALUES %s) AS delta(partner_id, company_id, receivable,
+                                        unbilled, draft)
+             WHERE exposure.partner_id = delta.partner_id
+               AND exposure.company_id = delta.company_id
+        """, SQL(', ').join(rows)))
+        self.invalidate_model()
+
+    @api.model
+    def _refresh(self, partners, companies):
+        """
+        Compute and store the exposure of commercial partners, with one
+        grouped query per amount.
+
+        :param partners: Commercial partners to refresh.
+        :param companies: Companies to refresh the exposure in.
+        """
+        self.env['account.move.line'].flush_model(
+            ['balance', 'parent_state', 'account_id', 'partner_id',
+             'company_id'])
+        self.env['account.move'].flush_model(
+            ['state', 'move_type', 'amount_total_signed', 'partner_id',
+             'company_id'])
+        self.env['account.account'].flush_model(['account_type'])
+        self.env['res.partner'].flush_model(['commercial_partner_id'])
+        params = {'partner_ids': tuple(partners.ids),
+                  'company_ids': tuple(companies.ids)}
+        amounts = {(partner.id, company.id): [0.0, 0.0, 0.0]
+                   for partner in partners for company in companies}
+        self.env.cr.execute(SQL("""
+            SELECT partner.commercial_partner_id, line.company_id,
+                   SUM(line.balance)
+              FROM account_move_line line
+              JOIN account_account account ON account.id = line.account_id
+              JOIN res_partner partner ON partner.id = line.partner_id
+             WHERE line.parent_state = 'posted'
+               AND account.account_type = 'asset_receivable'
+               AND partner.commercial_partner_id IN %(partner_ids)s
+               AND line.company_id IN %(company_ids)s
+          GROUP BY partner.commercial_partner_id, line.company_id
+        """, **params))
+        for partner_id, company_id, amount in self.env.cr.fetchall():
+            amounts[partner_id, company_id][0] = amount
+        orders = self.env['sale.order'].sudo().search([
+            ('partner_id.commercial_partner_id', 'in', partners.ids),
+            ('company_id', 'in', companies.ids),
+            ('state', '=', 'sale'),
+            ('invoice_status', '!=', 'invoiced'),
+        ])
+        today = fields.Date.today()
+        for order in orders:
+            company = order.company_id
+            amounts[order.partner_id.commercial_partner_id.id, company.id][
+                1] += order.currency_id._convert(
+                order.amount_to_invoice, company.currency_id, company, today)
+        self.env.cr.execute(SQL("""
+            SELECT partner.commercial_partner_id, move.company_id,
+                   SUM(move.amount_total_signed)
+              FROM account_move move
+              JOIN res_partner partner ON partner.id = move.partner_id
+             WHERE move.state = 'draft'
+               AND move.move_type IN ('out_invoice', 'out_refund')
+               AND partner.commercial_partner_id IN %(partner_ids)s
+               AND move.company_id IN %(company_ids)s
+               AND NOT EXISTS (
+                   SELECT 1
+                     FROM account_move_line line
+                     JOIN sale_order_line_invoice_rel rel
+                       ON rel.invoice_line_id = line.id
+                    WHERE line.move_id = move.id)
+          GROUP BY partner.commercial_partner_id, move.company_id
+        """, **params))
+        for partner_id, company_id, amount in self.env.cr.fetchall():
+            amounts[partner_id, company_id][2] = amount
+        rows = SQL(', ').join(
+            SQL("(%s, %s, %s, %s, %s, %s, now() AT TIME ZONE 'UTC', "
+                "now() AT TIME ZONE 'UTC')", partner_id, company_id,
+                receivable, unbilled, draft, receivable + unbilled + draft)
+            for (partner_id, company_id), (receivable, unbilled, draft)
+            in amounts.items())
+        self.env.cr.execute(SQL("""
+            INSERT INTO res_partner_credit_exposure (
+                partner_id, company_id, receivable_amount, unbilled_amount,
+                draft_invoice_amount, exposure, create_date, write_date)
+            VALUES %s
+            ON CONFLICT (partner_id, company_id) DO UPDATE
+               SET receivable_amount = EXCLUDED.receivable_amount,
+                   unbilled_amount = EXCLUDED.unbilled_amount,
+                   draft_invoice_amount = EXCLUDED.draft_invoice_amount,
+                   exposure = EXCLUDED.exposure,
+                   write_date = EXCLUDED.write_date
+        """, rows))
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh_all(self, batch_size=1000):
+        """
+        Recompute the exposure of the customers with a credit limit by
+        committed batches, catching up on the changes no hook sees, and
+        drop the exposures no check reads anymore, all of them when the
+        credit limits are disabled.
+
+        :param int batch_size: Number of partners refreshed at once.
+        """
+        self.env['res.partner'].flush_model(
+            ['active_limit', 'commercial_partner_id'])
+        self.env.cr.execute("""
+            SELECT DISTINCT commercial_partner_id
+              FROM res_partner
+             WHERE active_limit
+             ORDER BY 1
+        """)
+        partner_ids = [row[0] for row in self.env.cr.fetchall()] \
+            if self._is_enabled() else []
+        self.env.cr.execute(SQL("""
+            DELETE FROM res_partner_credit_exposure
+             WHERE partner_id != ALL(%s::int[])
+        """, partner_ids))
+        self.env.cr.commit()
+        companies = self.env['res.company'].sudo().search([])
+        for start in range(0, len(partner_ids), batch_size):
+            self._refresh(self.env['res.partner'].browse(
+                partner_ids[start:start + batch_size]), companies)
+            self.env['ir.cron']._notify_progress(
+                done=min(start + batch_size, len(partner_ids)),
+                remaining=max(len(partner_ids) - start - batch_size, 0))
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+    @api.model
+    def _check_orders(self, orders, stage='blocking_stage'):
+        """
+        Check the credit limit of many sale orders at once, reading the
+        exposures of all their customers with one query per company.
+
+        :param orders: Sale orders to check.
+        :param str stage: Partner field holding the limit, 'blocking_stage'
+            or 'warning_stage'.
+        :return: The orders whose customer exposure reaches the limit, with
+            that exposure.
+        :rtype: list
+        """
+        orders = orders.filtered(
+            lambda order: order.partner_id.active_limit
+            and order.partner_id.enable_credit_limit
+            and order.partner_id[stage])
+        exceeded = []
+        for company in orders.company_id:
+            company_orders = orders.filtered(
+                lambda order: order.company_id == company)
+            exposures = self.sudo()._get_exposures(
+                company_orders.partner_id, company)
+            for order in company_orders:
+                exposure = exposures.get(
+                    order.partner_id.commercial_partner_id.id, 0.0)
+                if exposure >= order.partner_id[stage]:
+                    exceeded.append((order, exposure))
+        return exceeded
+
+    @api.model
+    def _raise_blocked_orders(self, orders):
+        """Raise an error listing the orders whose customer reached its
+        blocking stage."""
+        blocked = self._check_orders(orders)
+        if blocked:
+            raise UserError('\n'.join(_(
+                "%s is in  Blocking Stage and "
+                "has a due amount of %s %s to pay") % (
+                order.partner_id.name, exposure,
+                order.company_id.currency_id.symbol)
+                for order, exposure in blocked))
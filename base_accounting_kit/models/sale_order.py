@@ -20,8 +20,9 @@
 #
 #############################################################################
 from odoo import api, fields, models
-from odoo.exceptions import UserError
-from odoo.tools.translate import _
+
+CREDIT_EXPOSURE_FIELDS = {'state', 'partner_id', 'company_id', 'currency_id',
+                          'pricelist_id', 'order_line'}
 
 
 class SaleOrder(models.Model):
@@ -37,30 +38,44 @@ class SaleOrder(models.Model):
     def _action_confirm(self):
         """To check the selected customers due amount is exceed than
         blocking stage"""
-        if self.partner_id.active_limit \
-                and self.partner_id.enable_credit_limit:
-            if self.due_amount >= self.partner_id.blocking_stage:
-                if self.partner_id.blocking_stage != 0:
-                    raise UserError(_(
-                        "%s is in  Blocking Stage and "
-                        "has a due amount of %s %s to pay") % (
-                                        self.partner_id.name, self.due_amount,
-                                        self.currency_id.symbol))
+        self.env['res.partner.credit.exposure']._raise_blocked_orders(self)
         return super(SaleOrder, self)._action_confirm()
 
+    def write(self, vals):
+        """Move the credit exposure of the customers by what the write
+        changes in the amount the confirmed orders have left to invoice,
+        confirming and cancelling included"""
+        tracked = self._get_credit_exposure_orders() \
+            if CREDIT_EXPOSURE_FIELDS.intersection(vals) else self.browse()
+        if not tracked:
+            return super(SaleOrder, self).write(vals)
+        exposure = self.env['res.partner.credit.exposure']
+        before = exposure._get_amounts(orders=tracked)
+        result = super(SaleOrder, self.with_context(
+            credit_exposure_tracked=True)).write(vals)
+        tracked.invalidate_recordset(['amount_to_invoice'])
+        exposure._add_amounts(before, exposure._get_amounts(orders=tracked))
+        return result
+
+    def _get_credit_exposure_orders(self):
+        """Return the orders the credit exposure follows, none when the
+        credit limits are disabled or inside a tracked change"""
+        if self.env.context.get('credit_exposure_tracked') \
+                or not self.env['res.partner.credit.exposure']._is_enabled():
+            return self.browse()
+        return self
+
     @api.onchange('partner_id')
     def check_due(self):
         """To show the due amount and warning stage"""
-        if self.partner_id and self.partner_id.due_amount > 0 \
-                and self.partner_id.active_limit \
+        if self.partner_id and self.partner_id.active_limit \
                 and self.partner_id.enable_credit_limit:
-            self.has_due = True
+            exposure = self.env['res.partner.credit.exposure'].sudo(
+            )._get_exposures(self.partner_id, self.company_id).get(
+                self.partner_id.commercial_partner_id.id, 0.0)
+            self.has_due = exposure > 0
+            self.is_warning = bool(self.partner_id.warning_stage) \
+                and exposure >= self.partner_id.warning_stage
         else:
             self.has_due = False
-        if self.partner_id and self.partner_id.active_limit\
-                and self.partner_id.enable_credit_limit:
-            if self.due_amount >= self.partner_id.warning_stage:
-                if self.partner_id.warning_stage != 0:
-                    self.is_warning = True
-        else:
             self.is_warning = False
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, models
+
+CREDIT_EXPOSURE_FIELDS = {'product_id', 'product_uom', 'product_uom_qty',
+                          'price_unit', 'discount', 'tax_id'}
+
+
+class SaleOrderLine(models.Model):
+    """Inherits sale.order.line to keep the credit exposure of the
+    customers when the lines of confirmed orders change"""
+    _inherit = 'sale.order.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Add the new lines of confirmed orders to the credit exposure"""
+        orders = self.env['sale.order'].browse(
+            {vals['order_id'] for vals in vals_list if vals.get('order_id')})
+        return self._track_credit_exposure(
+            orders, lambda lines: super(SaleOrderLine, lines).create(
+                vals_list))
+
+    def write(self, vals):
+        """Move the credit exposure by the change of the amounts"""
+        if not CREDIT_EXPOSURE_FIELDS.intersection(vals):
+            return super(SaleOrderLine, self).write(vals)
+        return self._track_credit_exposure(
+            self.order_id, lambda lines: super(SaleOrderLine, lines).write(
+                vals))
+
+    def unlink(self):
+        """Remove the deleted lines from the credit exposure"""
+        return self._track_credit_exposure(
+            self.order_id, lambda lines: super(SaleOrderLine, lines).unlink())
+
+    def _track_credit_exposure(self, orders, change):
+        """
+        Run a change of the lines and move the credit exposure of the
+        customers by what it changes in the orders left to invoice.
+
+        :param orders: Orders the change touches.
+        :param change: Function making the change on the lines it gets.
+        :return: The result of the change.
+        """
+        tracked = orders._get_credit_exposure_orders().filtered(
+            lambda order: order.state == 'sale')
+        if not tracked:
+            return change(self)
+        exposure = self.env['res.partner.credit.exposure']
+        before = exposure._get_amounts(orders=tracked)
+        result = change(self.with_context(credit_exposure_tracked=True))
+        tracked.invalidate_recordset(['amount_to_invoice'])
+        exposure._add_amounts(before, exposure._get_amounts(orders=tracked))
+        if isinstance(result, models.BaseModel):
+            result = result.with_env(self.env)
+        return result
@@ -22,6 +22,7 @@
 from datetime import time
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from ..models.report_instrumentation import instrument_report
 
 
 class ReportBankBook(models.AbstractModel):
@@ -134,6 +135,7 @@ class ReportBankBook(models.AbstractModel):
         return account_res
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         if not data.get('form') or not self.env.context.get('active_model'):
             raise UserError(
@@ -23,6 +23,7 @@ import time
 from datetime import timedelta, datetime
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from ..models.report_instrumentation import instrument_report
 
 
 class DayBookPdfReport(models.AbstractModel):
@@ -79,6 +80,7 @@ class DayBookPdfReport(models.AbstractModel):
         return res
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         if not data.get('form') or not self.env.context.get('active_model'):
             raise UserError(
@@ -22,6 +22,7 @@
 import time
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from ..models.report_instrumentation import instrument_report
 
 
 class ReportFinancial(models.AbstractModel):
@@ -196,6 +197,7 @@ class ReportFinancial(models.AbstractModel):
         return lines
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         if not data.get('form') or not self.env.context.get(
                 'active_model') or not self.env.context.get('active_id'):
@@ -20,6 +20,7 @@
 #
 #############################################################################
 from odoo import api, models
+from ..models.report_instrumentation import instrument_report
 
 
 class ReportInvoiceMultiple(models.AbstractModel):
@@ -28,6 +29,7 @@ class ReportInvoiceMultiple(models.AbstractModel):
     _description = 'Report Invoice Multiple'
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         rslt = super()._get_report_values(docids, data)
 
@@ -25,6 +25,7 @@ from dateutil.relativedelta import relativedelta
 from odoo import api, models, _
 from odoo.exceptions import UserError
 from odoo.tools import float_is_zero
+from ..models.report_instrumentation import instrument_report
 
 
 class ReportAgedPartnerBalance(models.AbstractModel):
@@ -262,6 +263,7 @@ class ReportAgedPartnerBalance(models.AbstractModel):
         return res, total, lines
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         if not data.get('form') or not self.env.context.get(
                 'active_model') or not self.env.context.get('active_id'):
@@ -22,6 +22,7 @@
 import time
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from ..models.report_instrumentation import instrument_report
 
 
 class ReportJournal(models.AbstractModel):
@@ -131,6 +132,7 @@ class ReportJournal(models.AbstractModel):
             data['form'].get('used_context', {}))._query_get()
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         if not data.get('form'):
             raise UserError(
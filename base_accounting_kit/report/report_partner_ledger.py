@@ -22,6 +22,7 @@
 import time
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from ..models.report_instrumentation import instrument_report
 
 
 class ReportPartnerLedger(models.AbstractModel):
@@ -101,6 +102,7 @@ class ReportPartnerLedger(models.AbstractModel):
         return result
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         if not data.get('form'):
             raise UserError(
@@ -22,6 +22,7 @@
 from _datetime import datetime
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from ..models.report_instrumentation import instrument_report
 
 
 class ReportTax(models.AbstractModel):
@@ -29,6 +30,7 @@ class ReportTax(models.AbstractModel):
     _description = 'Tax Report'
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         if not data.get('form'):
             raise UserError(
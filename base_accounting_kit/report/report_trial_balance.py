@@ -22,6 +22,7 @@
 import time
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from ..models.report_instrumentation import instrument_report
 
 
 class ReportTrialBalance(models.AbstractModel):
@@ -88,6 +89,7 @@ class ReportTrialBalance(models.AbstractModel):
         return account_res
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         if not data.get('form') or not self.env.context.get('active_model'):
             raise UserError(
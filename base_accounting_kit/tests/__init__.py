@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from . import test_account_report_job
+from . import test_credit_exposure
+from . import test_depreciation_board
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAccountReportJob(AccountTestInvoicingCommon):
+
+    def test_background_report_is_rendered(self):
+        wizard = self.env['account.bank.book.report'].create({})
+        action = wizard.action_print_background()
+        self.assertEqual(action['type'], 'ir.actions.client')
+        job = self.env['account.report.job'].search([], limit=1)
+        self.assertEqual(job.report_context, {
+            'active_model': 'account.bank.book.report',
+            'active_id': wizard.id,
+            'active_ids': wizard.ids,
+        })
+        # The runner renders in its own context, without the active wizard
+        job.with_context(active_model=False, active_ids=False)._run()
+        self.assertEqual(job.state, 'done', job.error)
+        self.assertTrue(job.attachment_id.raw)
+        self.assertFalse(job.chunk_attachment_ids)
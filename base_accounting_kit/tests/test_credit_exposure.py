@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+EXPOSURE_FIELDS = ['receivable_amount', 'unbilled_amount',
+                   'draft_invoice_amount', 'exposure']
+
+
+@tagged('post_install', '-at_install')
+class TestCreditExposure(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param(
+            'customer_credit_limit', True)
+        cls.partner_a.write({'active_limit': True,
+                             'blocking_stage': 1000000.0})
+        cls.company = cls.company_data['company']
+        cls.exposure = cls.env['res.partner.credit.exposure'].sudo()
+        # The row updated by the hooks is created by the first check
+        cls.exposure._get_exposures(cls.partner_a, cls.company)
+        # The orders are converted at today's rate
+        currency = cls.env['res.currency'].create({
+            'name': 'XGD',
+            'symbol': 'XG',
+            'rate_ids': [Command.create({'name': '2000-01-01', 'rate': 2.0})],
+        })
+        cls.pricelist = cls.env['product.pricelist'].create({
+            'name': 'Foreign Pricelist',
+            'currency_id': currency.id,
+        })
+
+    def _read_exposure(self):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        return self.exposure.search([
+            ('partner_id', '=', self.partner_a.id),
+            ('company_id', '=', self.company.id),
+        ]).read(EXPOSURE_FIELDS)[0]
+
+    def _assert_exposure(self, step):
+        """Check that the row kept by the hooks equals a full recompute."""
+        stored = self._read_exposure()
+        self.exposure._refresh(self.partner_a, self.company)
+        computed = self._read_exposure()
+        for field in EXPOSURE_FIELDS:
+            self.assertAlmostEqual(stored[field], computed[field], places=2,
+                                   msg=f'{field} after {step}')
+        return computed
+
+    def test_exposure_follows_the_order_lifecycle(self):
+        order = self.env['sale.order'].create({
+            'partner_id': self.partner_a.id,
+            'pricelist_id': self.pricelist.id,
+            'order_line': [Command.create({
+                'product_id': self.product_a.id,
+                'product_uom_qty': 2.0,
+                'price_unit': 100.0,
+                'tax_id': False,
+            })],
+        })
+        self._assert_exposure('order creation')
+        order.action_confirm()
+        confirmed = self._assert_exposure('confirmation')
+        self.assertTrue(confirmed['unbilled_amount'])
+        order.order_line.product_uom_qty = 3.0
+        self._assert_exposure('quantity change')
+
+        invoice = order._create_invoices()
+        self._assert_exposure('invoicing')
+        invoice.action_post()
+        posted = self._assert_exposure('posting')
+        self.assertTrue(posted['receivable_amount'])
+        self.assertFalse(posted['unbilled_amount'])
+
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoice.ids).create({
+                'payment_date': invoice.invoice_date,
+            })._create_payments()
+        paid = self._assert_exposure('payment')
+        self.assertFalse(paid['receivable_amount'])
+
+        invoice.button_draft()
+        self._assert_exposure('reset to draft')
+        invoice.button_cancel()
+        self._assert_exposure('invoice cancellation')
+        order._action_cancel()
+        self._assert_exposure('order cancellation')
+
+    def test_exposure_follows_draft_invoices(self):
+        invoice = self.init_invoice(
+            'out_invoice', partner=self.partner_a, amounts=[100.0],
+            taxes=[])
+        created = self._assert_exposure('creation')
+        self.assertTrue(created['draft_invoice_amount'])
+        invoice.write({'invoice_line_ids': [Command.update(
+            invoice.invoice_line_ids.id, {'price_unit': 150.0})]})
+        self._assert_exposure('edition')
+        invoice.unlink()
+        removed = self._assert_exposure('removal')
+        self.assertFalse(removed['draft_invoice_amount'])
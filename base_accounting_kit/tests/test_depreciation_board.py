@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests import tagged
+from odoo.tools import float_is_zero
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestDepreciationBoard(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.category = cls.env['account.asset.category'].create({
+            'name': 'Equipment',
+            'company_id': cls.company_data['company'].id,
+            'account_asset_id': cls.company_data[
+                'default_account_assets'].id,
+            'account_depreciation_id': cls.company_data[
+                'default_account_assets'].id,
+            'account_depreciation_expense_id': cls.company_data[
+                'default_account_expense'].id,
+            'journal_id': cls.company_data['default_journal_misc'].id,
+        })
+
+    def _create_asset(self, asset_date, method_period, value=1200.0,
+                      prorata=False):
+        return self.env['account.asset.asset'].create({
+            'name': 'Asset %s' % asset_date,
+            'category_id': self.category.id,
+            'value': value,
+            'date': asset_date,
+            'method_number': 4,
+            'method_period': method_period,
+            'prorata': prorata,
+        })
+
+    def _keep_posted(self, assets, count):
+        """Unlink the entries of the lines of ``assets`` after the first
+        ``count`` ones, leaving these lines to be computed again."""
+        lines = self.env['account.asset.depreciation.line']
+        for asset in assets:
+            lines |= asset.depreciation_line_ids.sorted('sequence')[count:]
+        moves = lines.move_id
+        lines.move_id = False
+        moves.unlink()
+
+    def _get_expected_board(self, asset):
+        """Compute the unposted lines of ``asset`` on its own, the way the
+        board was computed for one asset at a time."""
+        posted = asset.depreciation_line_ids.filtered(
+            'move_check').sorted('depreciation_date')
+        if asset.value_residual == 0.0:
+            return []
+        amount_to_depr = residual_amount = asset.value_residual
+        if posted:
+            depreciation_date = posted[-1].depreciation_date + relativedelta(
+                months=+asset.method_period)
+        elif asset.prorata:
+            depreciation_date = fields.Date.to_date(
+                asset._get_last_depreciation_date()[asset.id])
+        elif asset.method_period >= 12:
+            company = asset.company_id
+            depreciation_date = date(
+                year=asset.date.year,
+                month=int(company.fiscalyear_last_month),
+                day=company.fiscalyear_last_day) + relativedelta(
+                days=1) + relativedelta(year=asset.date.year)
+        else:
+            depreciation_date = asset.date.replace(day=1)
+        total_days = (depreciation_date.year % 4) and 365 or 366
+        undone_dotation_number = asset._compute_board_undone_dotation_nb(
+            depreciation_date, total_days)
+        board = []
+        for sequence in range(len(posted) + 1, undone_dotation_number + 1):
+            amount = asset.currency_id.round(asset._compute_board_amount(
+                sequence, residual_amount, amount_to_depr,
+                undone_dotation_number, posted, total_days,
+                depreciation_date))
+            if float_is_zero(amount,
+                             precision_rounding=asset.currency_id.rounding):
+                continue
+            residual_amount -= amount
+            board.append((
+                sequence, depreciation_date, amount,
+                round(max(residual_amount, 0.0), 2),
+                round(asset.value - (asset.salvage_value + residual_amount),
+                      2)))
+            depreciation_date = date(
+                depreciation_date.year, depreciation_date.month,
+                depreciation_date.day) + relativedelta(
+                months=+asset.method_period)
+        return board
+
+    def _get_board(self, asset, posted_count=0):
+        return [(line.sequence, line.depreciation_date, line.amount,
+                 round(line.remaining_value, 2),
+                 round(line.depreciated_value, 2))
+                for line in asset.depreciation_line_ids.sorted('sequence')[
+                    posted_count:]]
+
+    def _assert_bulk_board(self, assets, posted_count=0):
+        """Compute the boards of ``assets`` at once and compare them to the
+        boards computed for each asset on its own."""
+        self._keep_posted(assets, posted_count)
+        expected = {asset: self._get_expected_board(asset)
+                    for asset in assets}
+        assets.compute_depreciation_board()
+        for asset in assets:
+            self.assertEqual(self._get_board(asset, posted_count),
+                             expected[asset], asset.name)
+
+    def test_month_end_start_dates(self):
+        assets = self._create_asset('2023-01-31', 1, prorata=True) \
+            | self._create_asset('2023-01-31', 1, value=600.0, prorata=True) \
+            | self._create_asset('2023-03-31', 1)
+        self._assert_bulk_board(assets)
+        # Each date is the previous one plus a month, so the day of month
+        # stays at 28 after February
+        self.assertEqual(
+            assets[0].depreciation_line_ids.sorted('sequence').mapped(
+                'depreciation_date'),
+            [date(2023, 1, 31), date(2023, 2, 28), date(2023, 3, 28),
+             date(2023, 4, 28), date(2023, 5, 28)])
+        self.assertEqual(
+            assets[0].depreciation_line_ids.sorted('sequence').mapped(
+                'amount'), [9.68, 300.0, 300.0, 300.0, 290.32])
+
+    def test_prorata_assets_with_posted_lines(self):
+        assets = self._create_asset('2023-01-31', 1, prorata=True) \
+            | self._create_asset('2023-02-15', 12, prorata=True) \
+            | self._create_asset('2023-02-15', 3)
+        self._assert_bulk_board(assets, posted_count=2)
+        self.assertEqual(
+            self._get_board(assets[0], 2)[0][:2], (3, date(2023, 3, 28)))
+
+    def test_zero_amount_skipped_periods(self):
+        assets = self._create_asset('2023-03-15', 1, value=0.02) \
+            | self._create_asset('2023-03-20', 1)
+        self._assert_bulk_board(assets)
+        # The skipped periods do not move the date of the remaining line
+        self.assertEqual(self._get_board(assets[0]),
+                         [(5, date(2023, 3, 1), 0.02, 0.0, 0.02)])
+        self.assertEqual(len(assets[1].depreciation_line_ids), 4)
+
+    def test_mixed_method_periods(self):
+        assets = self._create_asset('2023-01-01', 1) \
+            | self._create_asset('2023-01-01', 3) \
+            | self._create_asset('2023-01-01', 12) \
+            | self._create_asset('2023-01-01', 3, value=800.0)
+        self._assert_bulk_board(assets)
+        self.assertEqual(
+            assets[1].depreciation_line_ids.sorted('sequence').mapped(
+                'depreciation_date'),
+            [date(2023, 1, 1), date(2023, 4, 1), date(2023, 7, 1),
+             date(2023, 10, 1)])
+        self.assertEqual(
+            assets[2].depreciation_line_ids.sorted('sequence').mapped(
+                'depreciation_date'),
+            [date(2023, 1, 1), date(2024, 1, 1), date(2025, 1, 1),
+             date(2026, 1, 1)])
@@ -108,3 +108,9 @@ class CashBookWizard(models.TransientModel):
         return self.env.ref(
             'base_accounting_kit.action_report_cash_book').report_action(self,
                                                                          data=data)
+
+    def action_print_background(self):
+        """Render the report of the wizard in the background as a report
+        job instead of in the request"""
+        return self.env['account.report.job']._enqueue_report_action(
+            self.check_report(), self)
@@ -74,3 +74,9 @@ class DayBookWizard(models.TransientModel):
         return self.env.ref(
             'base_accounting_kit.day_book_pdf_report').report_action(self,
                                                                      data=data)
+
+    def action_print_background(self):
+        """Render the report of the wizard in the background as a report
+        job instead of in the request"""
+        return self.env['account.report.job']._enqueue_report_action(
+            self.check_report(), self)
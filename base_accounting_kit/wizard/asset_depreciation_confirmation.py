@@ -20,6 +20,7 @@
 #
 #############################################################################
 from odoo import fields, models, _
+from odoo.tools import format_amount, html_escape
 
 
 class AssetDepreciationConfirmationWizard(models.TransientModel):
@@ -30,21 +31,92 @@ class AssetDepreciationConfirmationWizard(models.TransientModel):
                        help="Choose the period for which you want to automatically "
                             "post the depreciation lines of running assets",
                        default=fields.Date.context_today)
+    preview = fields.Html(string='Preview', readonly=True, sanitize=False,
+                          help="Entries that would be generated, by "
+                               "category")
+    summary = fields.Html(string='Summary', readonly=True, sanitize=False,
+                          help="Entries generated, by category")
+    move_ids = fields.Many2many('account.move', string='Entries',
+                                readonly=True,
+                                help="Entries generated by the wizard")
+
+    def _render_category_totals(self, totals_by_category, with_moves=False):
+        """Render the totals of the entries of each category as an HTML
+        table, each amount in the currency of its company"""
+        several_companies = len({
+            company for _category, company in totals_by_category}) > 1
+        rows = ''.join(
+            '<tr><td>%s</td><td class="text-end">%s</td>'
+            '<td class="text-end">%s</td>%s<td class="text-end">%s</td>'
+            '</tr>' % (
+                html_escape('%s (%s)' % (category.display_name, company.name)
+                            if several_companies
+                            else category.display_name),
+                totals['assets'], totals['entries'],
+                '<td class="text-end">%s</td>' % totals['moves']
+                if with_moves else '',
+                html_escape(format_amount(self.env, totals['amount'],
+                                          totals['currency'])))
+            for (category, company), totals in sorted(
+                totals_by_category.items(),
+                key=lambda item: (item[0][0].display_name, item[0][1].name)))
+        if not rows:
+            return '<p>%s</p>' % _(
+                'No depreciation line to post at this date.')
+        return (
+            '<table class="table table-sm"><thead><tr><th>%s</th>'
+            '<th class="text-end">%s</th><th class="text-end">%s</th>%s'
+            '<th class="text-end">%s</th></tr></thead><tbody>%s</tbody>'
+            '</table>' % (_('Category'), _('Assets'), _('Entries'),
+                          '<th class="text-end">%s</th>' % _('Moves')
+                          if with_moves else '', _('Amount'), rows))
+
+    def _reopen(self):
+        """Return the action showing the wizard again"""
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+            'context': self._context,
+        }
+
+    def action_preview(self):
+        """Preview the totals of the entries by category without generating
+        them"""
+        self.ensure_one()
+        assets = self.env['account.asset.asset'].sudo()
+        summary = assets._get_depreciation_summary(
+            assets._get_depreciation_lines_to_post(
+                self.date, asset_type=self._context.get('asset_type')))[2]
+        self.preview = self._render_category_totals(summary)
+        return self._reopen()
 
     def asset_compute(self):
         self.ensure_one()
         context = self._context
-        created_move_ids = self.env['account.asset.asset'].sudo().compute_generated_entries(self.date, asset_type=context.get('asset_type'))
+        created_move_ids, summary = self.env['account.asset.asset'].sudo(
+        )._generate_depreciation_entries(
+            self.date, asset_type=context.get('asset_type'))
         moves = self.env['account.move'].browse(created_move_ids)
         auto_post_draft_moves = moves.filtered(lambda move: move.state == 'draft' and move.auto_post)
         auto_post_draft_moves.write({'auto_post': 'at_date'})
+        self.write({
+            'preview': False,
+            'summary': self._render_category_totals(summary, with_moves=True),
+            'move_ids': [(6, 0, created_move_ids)],
+        })
+        return self._reopen()
+
+    def action_view_moves(self):
+        """Open the entries generated by the wizard"""
+        self.ensure_one()
         return {
-            'name': _('Created Asset Moves') if context.get('asset_type') == 'purchase' else _('Created Revenue Moves'),
+            'name': _('Created Asset Moves') if self._context.get('asset_type') == 'purchase' else _('Created Revenue Moves'),
             'view_mode': 'list,form',
             'res_model': 'account.move',
             'view_id': False,
-            'domain': "[('id','in',[" + ','.join(str(id) for id in created_move_ids) + "])]",
+            'domain': [('id', 'in', self.move_ids.ids)],
             'type': 'ir.actions.act_window',
         }
-
-
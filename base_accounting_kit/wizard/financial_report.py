@@ -21,6 +21,7 @@
 #############################################################################
 import re
 from odoo import api, models, fields
+from ..models.report_instrumentation import instrument_report
 
 
 class FinancialReport(models.TransientModel):
@@ -426,6 +427,7 @@ class ProfitLossPdf(models.AbstractModel):
     _description = 'Financial Report'
 
     @api.model
+    @instrument_report
     def _get_report_values(self, docids, data=None):
         """ Provide report values to template """
         ctx = {
@@ -20,16 +20,20 @@
 #
 ###############################################################################
 import base64
-import codecs
+import csv
+import hashlib
+import io
 import openpyxl
 import os
+from collections import Counter
 from datetime import datetime
-from io import BytesIO
 from odoo import fields, models, _
 from odoo.exceptions import ValidationError
 from ofxparse import OfxParser
 from qifparse.parser import QifParser
 
+IMPORT_BATCH_SIZE = 1000
+
 
 class ImportBankStatement(models.TransientModel):
     """ A class to import files as bank statement """
@@ -45,282 +49,266 @@ class ImportBankStatement(models.TransientModel):
 
     def action_statement_import(self):
         """Function to import csv, xlsx, ofx and qif file format"""
-        split_tup = os.path.splitext(self.file_name)
-        if split_tup[1] == '.csv' or split_tup[1] == '.xlsx' or split_tup[
-            1] == '.ofx' or split_tup[1] == '.qif':
-            if split_tup[1] == '.csv':
-                # Reading csv file
-                try:
-                    file = base64.b64decode(self.attachment)
-                    file_string = file.decode('utf-8')
-                    file_string = file_string.split('\n')
-                except:
-                    raise ValidationError(_("Choose correct file"))
-                # Skipping the first line
-                firstline = True
-                for file_item in file_string:
-                    if firstline:
-                        firstline = False
-                        continue
-                    # Reading the content from csv file
-                    values = file_item.split(',')
-                    if len(values) >= 5:
-                        if values[0] and values[1] and values[4]:
-                            date_obj = str(fields.date.today()) if not values[
-                                3] else values[3]
-                            transaction_date = datetime.strptime(date_obj,
-                                                                 "%Y-%m-%d")
-                            partner = self.env['res.partner'].search(
-                                [('name', '=', values[4])])
-                            if partner:
-                                statement = self.env[
-                                    'account.bank.statement'].create({
-                                    'name': values[0],
-                                    'line_ids': [(0, 0, {
-                                        'date': transaction_date,
-                                        'payment_ref': 'csv file',
-                                        'partner_id': partner.id,
-                                        'journal_id': self.journal_id.id,
-                                        'amount': values[1],
-                                        'amount_currency': values[2],
-                                    })],
-                                })
-                            else:
-                                raise ValidationError(
-                                    _("Partner does not exist"))
-                        else:
-                            if not values[0]:
-                                raise ValidationError(
-                                    _("Account name is not set"))
-                            elif not values[1]:
-                                raise ValidationError(_("Amount is not set"))
-                            elif not values[4]:
-                                date_obj = str(fields.date.today()) if not \
-                                values[3] else values[3]
-                                transaction_date = datetime.strptime(date_obj,
-                                                                     "%Y-%m-%d")
-                                statement = self.env[
-                                    'account.bank.statement'].create({
-                                    'name': values[0],
-                                    'line_ids': [(0, 0, {
-                                        'date': transaction_date,
-                                        'payment_ref': 'csv file',
-                                        'journal_id': self.journal_id.id,
-                                        'amount': values[1],
-                                        'amount_currency': values[2],
-                                    })],
-                                })
-                    else:
-                        raise ValidationError(
-                            _("Invalid row format in CSV file. Ensure all required columns are present."))
-                return {
-                    'type': 'ir.actions.act_window',
-                    'name': 'Statements',
-                    'view_mode': 'list',
-                    'res_model': 'account.bank.statement',
-                    'res_id': statement.id,
-                }
-            elif split_tup[1] == '.xlsx':
-                # Reading xlsx file
-                try:
-                    order = openpyxl.load_workbook(
-                        filename=BytesIO(base64.b64decode(self.attachment)))
-                    xl_order = order.active
-                except:
-                    raise ValidationError(_("Choose correct file"))
-                for record in xl_order.iter_rows(min_row=2, max_row=None,
-                                                 min_col=None,
-                                                 max_col=None,
-                                                 values_only=True):
-                    line = list(record)
-                    # Reading the content from file
-                    if line[0] and line[1] and line[3]:
-                        partner = self.env['res.partner'].search(
-                            [('name', '=', line[3])])
-                        date_obj = fields.date.today() if not line[2] else \
-                            line[2].date()
-                        # Creating record
-                        if partner:
-                            statement = self.env[
-                                'account.bank.statement'].create({
-                                 'name': line[0],
-                                 'line_ids': [
-                                    (0, 0, {
-                                        'date': date_obj,
-                                        'payment_ref': 'xlsx file',
-                                        'partner_id': partner.id,
-                                        'journal_id': self.journal_id.id,
-                                        'amount': line[1],
-                                    }),
-                                 ],
-                                })
-                        else:
-                            raise ValidationError(_("Partner not exist"))
-                    else:
-                        if not line[0]:
-                            raise ValidationError(
-                                _("Account name is not set"))
-                        elif not line[1]:
-                            raise ValidationError(
-                                _("Amount is not set"))
-                        elif not line[3]:
-                            date_obj = fields.date.today() if not line[2] else \
-                                line[2].date()
-                            # Creating record
-                            statement = self.env[
-                                'account.bank.statement'].create({
-                                'name': line[0],
-                                'line_ids': [
-                                    (0, 0, {
-                                        'date': date_obj,
-                                        'payment_ref': 'xlsx file',
-                                        'journal_id': self.journal_id.id,
-                                        'amount': line[1],
-                                    }),
-                                ],
-                            })
-                return {
-                    'type': 'ir.actions.act_window',
-                    'name': 'Statements',
-                    'view_mode': 'list',
-                    'res_model': 'account.bank.statement',
-                    'res_id': statement.id,
-                }
-            elif split_tup[1] == '.ofx':
-                # Searching the path of the file
-                file_attachment = self.env["ir.attachment"].search(
-                    ['|', ('res_field', '!=', False),
-                     ('res_field', '=', False),
-                     ('res_id', '=', self.id),
-                     ('res_model', '=', 'import.bank.statement')],
-                    limit=1)
-                file_path = file_attachment._full_path(
-                    file_attachment.store_fname)
-                # Parsing the file
-                try:
-                    with codecs.open(file_path) as fileobj:
-                        ofx_file = OfxParser.parse(fileobj)
-                except:
-                    raise ValidationError(_("Wrong file format"))
-                if not ofx_file.account:
-                    raise ValidationError(
-                        _("No account information found in OFX file."))
-                if not ofx_file.account.statement:
+        split_tup = os.path.splitext(self.file_name or '')
+        parsers = {
+            '.csv': self._parse_csv,
+            '.xlsx': self._parse_xlsx,
+            '.ofx': self._parse_ofx,
+            '.qif': self._parse_qif,
+        }
+        if split_tup[1] not in parsers:
+            raise ValidationError(_("Choose correct file"))
+        content = base64.b64decode(self.attachment)
+        transactions = list(parsers[split_tup[1]](content))
+        if not transactions:
+            raise ValidationError(_("There is no data to import"))
+        statements = self._create_statements(transactions)
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Statements',
+            'view_mode': 'list',
+            'res_model': 'account.bank.statement',
+            'domain': [('id', 'in', statements.ids)],
+        }
+
+    def _parse_csv(self, content):
+        """
+        Read the transactions of a csv file row by row.
+
+        :param bytes content: Content of the file.
+        :return: The normalized transactions, see _create_statements.
+        :rtype: generator
+        """
+        try:
+            reader = csv.reader(io.StringIO(content.decode('utf-8')))
+            # Skipping the first line
+            next(reader, None)
+            for values in reader:
+                if not any(values):
+                    continue
+                if len(values) < 5:
                     raise ValidationError(
-                        _("No statement information found in OFX file."))
-                statement_list = []
-                # Reading the content from file
-                for transaction in ofx_file.account.statement.transactions:
-                    if transaction.type == "debit" and transaction.amount != 0:
-                        payee = transaction.payee
-                        amount = transaction.amount
-                        date = transaction.date
-                        if not date:
-                            date = fields.date.today()
-                        partner = self.env['res.partner'].search(
-                            [('name', '=', payee)])
-                        if partner:
-                            statement_list.append([partner.id, amount, date])
-                        else:
-                            raise ValidationError(_("Partner not exist"))
-                    if transaction.type == "credit" and transaction.amount != 0:
-                        payee = transaction.payee
-                        amount = transaction.amount
-                        date = transaction.date
-                        if not date:
-                            date = fields.date.today()
-                        partner = self.env['res.partner'].search(
-                            [('name', '=', payee)])
-                        if partner:
-                            statement_list.append([partner.id, amount, date])
-                        else:
-                            raise ValidationError(_("Partner not exist"))
-                # Creating record
-                if statement_list:
-                    for item in statement_list:
-                        statement = self.env['account.bank.statement'].create({
-                            'name': ofx_file.account.routing_number,
-                            'line_ids': [
-                                (0, 0, {
-                                    'date': item[2],
-                                    'payment_ref': 'ofx file',
-                                    'partner_id': item[0],
-                                    'journal_id': self.journal_id.id,
-                                    'amount': item[1],
-                                }),
-                            ],
-                        })
-                    return {
-                        'type': 'ir.actions.act_window',
-                        'name': 'Statements',
-                        'view_mode': 'list',
-                        'res_model': 'account.bank.statement',
-                        'res_id': statement.id,
-                    }
-                else:
-                    raise ValidationError(_("There is no data to import"))
-            elif split_tup[1] == '.qif':
-                # Searching the path of qif file
-                file_attachment = self.env["ir.attachment"].search(
-                    ['|', ('res_field', '!=', False),
-                     ('res_field', '=', False),
-                     ('res_id', '=', self.id),
-                     ('res_model', '=', 'import.bank.statement')],
-                    limit=1)
-                file_path = file_attachment._full_path(
-                    file_attachment.store_fname)
-                # Parsing the qif file
-                try:
-                    parser = QifParser()
-                    with open(file_path, 'r') as qiffile:
-                        qif = parser.parse(qiffile)
-                except:
-                    raise ValidationError(_("Wrong file format"))
-                file_string = str(qif)
-                file_item = file_string.split('^')
-                file_item[-1] = file_item[-1].rstrip('\n')
-                if file_item[-1] == '':
-                    file_item.pop()
-                statement_list = []
-                for item in file_item:
-                    if not item.startswith('!Type:Bank'):
-                        item = '!Type:Bank' + item
-                    data = item.split('\n')
-                    # Reading the file content
-                    date_entry = data[1][1:]
-                    amount = float(data[2][1:])
-                    payee = data[3][1:]
-                    if amount and payee:
-                        if not date_entry:
-                            date_entry = str(fields.date.today())
-                        date_object = datetime.strptime(date_entry, '%d/%m/%Y')
-                        date = date_object.strftime('%Y-%m-%d')
-                        statement_list.append([payee, amount, date])
-                    else:
-                        if not amount:
-                            raise ValidationError(_("Amount is not set"))
-                        elif not payee:
-                            raise ValidationError(_("Payee is not set"))
-                # Creating record
-                if statement_list:
-                    for item in statement_list:
-                        statement = self.env['account.bank.statement'].create({
-                            'name': item[0],
-                            'line_ids': [
-                                (0, 0, {
-                                    'date': item[2],
-                                    'payment_ref': 'qif file',
-                                    'journal_id': self.journal_id.id,
-                                    'amount': item[1],
-                                }),
-                            ],
-                        })
-                    return {
-                        'type': 'ir.actions.act_window',
-                        'name': 'Statements',
-                        'view_mode': 'list',
-                        'res_model': 'account.bank.statement',
-                        'res_id': statement.id,
-                    }
-        else:
+                        _("Invalid row format in CSV file. Ensure all required columns are present."))
+                if not values[0]:
+                    raise ValidationError(_("Account name is not set"))
+                if not values[1]:
+                    raise ValidationError(_("Amount is not set"))
+                yield {
+                    'statement': values[0],
+                    'date': datetime.strptime(values[3], "%Y-%m-%d").date()
+                    if values[3] else fields.Date.today(),
+                    'amount': float(values[1]),
+                    'amount_currency': float(values[2]) if values[2] else None,
+                    'partner': values[4] or None,
+                    'payment_ref': 'csv file',
+                }
+        except (UnicodeDecodeError, csv.Error):
+            raise ValidationError(_("Choose correct file"))
+
+    def _parse_xlsx(self, content):
+        """
+        Read the transactions of a xlsx file row by row, without loading the
+        whole sheet.
+
+        :param bytes content: Content of the file.
+        :return: The normalized transactions, see _create_statements.
+        :rtype: generator
+        """
+        try:
+            order = openpyxl.load_workbook(filename=io.BytesIO(content),
+                                           read_only=True)
+            xl_order = order.active
+        except Exception:
             raise ValidationError(_("Choose correct file"))
+        for record in xl_order.iter_rows(min_row=2, values_only=True):
+            line = list(record) + [None] * (4 - len(record))
+            if not any(line):
+                continue
+            if not line[0]:
+                raise ValidationError(_("Account name is not set"))
+            if not line[1]:
+                raise ValidationError(_("Amount is not set"))
+            yield {
+                'statement': line[0],
+                'date': line[2].date() if line[2] else fields.Date.today(),
+                'amount': line[1],
+                'amount_currency': None,
+                'partner': line[3] or None,
+                'payment_ref': 'xlsx file',
+            }
+        order.close()
+
+    def _parse_ofx(self, content):
+        """
+        Read the debit and credit transactions of an ofx file.
+
+        :param bytes content: Content of the file.
+        :return: The normalized transactions, see _create_statements.
+        :rtype: generator
+        """
+        try:
+            ofx_file = OfxParser.parse(io.BytesIO(content))
+        except Exception:
+            raise ValidationError(_("Wrong file format"))
+        if not ofx_file.account:
+            raise ValidationError(
+                _("No account information found in OFX file."))
+        if not ofx_file.account.statement:
+            raise ValidationError(
+                _("No statement information found in OFX file."))
+        for transaction in ofx_file.account.statement.transactions:
+            if transaction.type not in ('debit', 'credit') \
+                    or transaction.amount == 0:
+                continue
+            yield {
+                'statement': ofx_file.account.routing_number,
+                'date': transaction.date.date() if transaction.date
+                else fields.Date.today(),
+                'amount': float(transaction.amount),
+                'amount_currency': None,
+                'partner': transaction.payee or '',
+                'payment_ref': 'ofx file',
+                'import_id': transaction.id,
+            }
+
+    def _parse_qif(self, content):
+        """
+        Read the transactions of a qif file.
+
+        :param bytes content: Content of the file.
+        :return: The normalized transactions, see _create_statements.
+        :rtype: generator
+        """
+        try:
+            qif = QifParser().parse(io.StringIO(content.decode('utf-8')))
+        except Exception:
+            raise ValidationError(_("Wrong file format"))
+        file_item = str(qif).split('^')
+        file_item[-1] = file_item[-1].rstrip('\n')
+        if file_item[-1] == '':
+            file_item.pop()
+        for item in file_item:
+            if not item.startswith('!Type:Bank'):
+                item = '!Type:Bank' + item
+            data = item.split('\n')
+            # Reading the file content
+            date_entry = data[1][1:]
+            amount = float(data[2][1:])
+            payee = data[3][1:]
+            if not amount:
+                raise ValidationError(_("Amount is not set"))
+            if not payee:
+                raise ValidationError(_("Payee is not set"))
+            yield {
+                'statement': self.file_name,
+                'date': datetime.strptime(date_entry, '%d/%m/%Y').date()
+                if date_entry else fields.Date.today(),
+                'amount': amount,
+                'amount_currency': None,
+                'partner': None,
+                'payment_ref': payee,
+            }
+
+    def _get_partner_ids(self, names):
+        """
+        Resolve the partners of the transactions with one search.
+
+        :param set names: Names of the partners.
+        :return: The id of the partner of each name.
+        :rtype: dict
+        """
+        partner_ids = {}
+        if names:
+            for partner in self.env['res.partner'].search(
+                    [('name', 'in', list(names))], order='id desc'):
+                partner_ids[partner.name] = partner.id
+        missing = names - set(partner_ids)
+        if missing:
+            raise ValidationError(_("Partner does not exist: %s",
+                                    ', '.join(sorted(missing))))
+        return partner_ids
+
+    def _get_transaction_hashes(self, transactions):
+        """
+        Compute a hash identifying each transaction, to detect the
+        transactions already imported. Identical transactions of a file are
+        told apart by their rank in it.
+
+        :param list transactions: Normalized transactions.
+        :return: The hash of each transaction, in the same order.
+        :rtype: list
+        """
+        occurrences = Counter()
+        hashes = []
+        for transaction in transactions:
+            key = transaction.get('import_id') or '|'.join(str(value) for value in (
+                transaction['statement'], transaction['date'],
+                transaction['amount'], transaction['amount_currency'],
+                transaction['partner'], transaction['payment_ref']))
+            occurrences[key] += 1
+            hashes.append(hashlib.sha256(('%s|%s|%s' % (
+                self.journal_id.id, key, occurrences[key])).encode()
+            ).hexdigest())
+        return hashes
+
+    def _get_imported_hashes(self, hashes):
+        """Return the hashes already imported, looked up by batches on the
+        indexed import id of the statement lines."""
+        imported = set()
+        lines = self.env['account.bank.statement.line'].sudo()
+        for start in range(0, len(hashes), IMPORT_BATCH_SIZE):
+            imported.update(lines.search([
+                ('unique_import_id', 'in',
+                 hashes[start:start + IMPORT_BATCH_SIZE]),
+            ]).mapped('unique_import_id'))
+        return imported
+
+    def _create_statements(self, transactions):
+        """
+        Create the statements of the transactions, one per statement name
+        and date, skipping the transactions already imported.
+
+        A transaction is a dict of the statement name, date, amount, amount
+        in currency, partner name, payment reference and, for the formats
+        having one, unique import id.
+
+        :param list transactions: Normalized transactions.
+        :return: The created statements.
+        """
+        partner_ids = self._get_partner_ids({
+            transaction['partner'] for transaction in transactions
+            if transaction['partner'] is not None})
+        hashes = self._get_transaction_hashes(transactions)
+        imported = self._get_imported_hashes(hashes)
+        groups = {}
+        for transaction, transaction_hash in zip(transactions, hashes):
+            if transaction_hash in imported:
+                continue
+            values = {
+                'date': transaction['date'],
+                'payment_ref': transaction['payment_ref'],
+                'journal_id': self.journal_id.id,
+                'amount': transaction['amount'],
+                'unique_import_id': transaction_hash,
+            }
+            if transaction['partner'] is not None:
+                values['partner_id'] = partner_ids[transaction['partner']]
+            if transaction['amount_currency'] is not None:
+                values['amount_currency'] = transaction['amount_currency']
+            groups.setdefault(
+                (transaction['statement'], transaction['date']), []
+            ).append(values)
+        if not groups:
+            raise ValidationError(
+                _("All the transactions of this file are already imported"))
+        env = self.env(context=dict(self.env.context, tracking_disable=True,
+                                    mail_create_nolog=True))
+        statements = env['account.bank.statement'].create([
+            {'name': name} for name, _date in groups])
+        line_vals = [dict(values, statement_id=statement.id)
+                     for statement, lines in zip(statements, groups.values())
+                     for values in lines]
+        for start in range(0, len(line_vals), IMPORT_BATCH_SIZE):
+            env['account.bank.statement.line'].create(
+                line_vals[start:start + IMPORT_BATCH_SIZE])
+        return statements
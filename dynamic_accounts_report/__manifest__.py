@@ -35,6 +35,7 @@
     'depends': ['base_accounting_kit', 'stock'],
     'data': [
         'security/ir.model.access.csv',
+        'data/account_balance_snapshot_data.xml',
         'views/accounting_report_views.xml',
         'report/trial_balance.xml',
         'report/general_ledger_templates.xml',
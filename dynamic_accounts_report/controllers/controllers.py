@@ -20,10 +20,17 @@
 #
 ################################################################################
 import json
+import os
+import tempfile
+
+import xlsxwriter
+
 from odoo import http
 from odoo.http import content_disposition, request
 from odoo.tools import html_escape
 
+XLSX_CHUNK_SIZE = 64 * 1024
+
 
 class XLSXReportController(http.Controller):
     @http.route('/xlsx_report', type='http', auth='user', methods=['POST'],
@@ -48,7 +55,11 @@ class XLSXReportController(http.Controller):
         report_obj = request.env[model].with_user(uid)
         token = 'dummy-because-api-expects-one'
         try:
-            if output_format == 'xlsx':
+            if output_format == 'xlsx' and hasattr(report_obj,
+                                                   'write_xlsx_report'):
+                response = self._stream_xlsx_report(
+                    report_obj, data, report_name, report_action)
+            elif output_format == 'xlsx':
                 response = request.make_response(
                     None,
                     headers=[
@@ -69,3 +80,49 @@ class XLSXReportController(http.Controller):
                 'data': se
             }
             return request.make_response(html_escape(json.dumps(error)))
+
+    def _stream_xlsx_report(self, report_obj, data, report_name,
+                            report_action):
+        """Write the report into a temporary file with xlsxwriter in
+        ``constant_memory`` mode and stream the file back in chunks, so the
+        memory used no longer grows with the size of the report.
+            Args:
+                report_obj: The report model, implementing
+                ``write_xlsx_report(workbook, data, report_name,
+                report_action)``.
+                data (str): The data required for generating the report.
+                report_name (str): The name to be given to the generated report
+                file.
+            Returns:
+                Response: A response streaming the generated report file.
+            """
+        file_descriptor, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(file_descriptor)
+        try:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+            report_obj.write_xlsx_report(workbook, data, report_name,
+                                         report_action)
+            workbook.close()
+        except Exception:
+            os.unlink(path)
+            raise
+
+        def stream_file():
+            try:
+                with open(path, 'rb') as report_file:
+                    while chunk := report_file.read(XLSX_CHUNK_SIZE):
+                        yield chunk
+            finally:
+                os.unlink(path)
+
+        response = request.make_response(
+            stream_file(),
+            headers=[
+                ('Content-Type', 'application/vnd.ms-excel'),
+                ('Content-Disposition',
+                 content_disposition(report_name + '.xlsx')),
+                ('Content-Length', str(os.path.getsize(path))),
+            ]
+        )
+        response.direct_passthrough = True
+        return response
@@ -19,7 +19,12 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ################################################################################
+from . import account_account
+from . import account_analytic_account
+from . import account_balance_snapshot
 from . import account_general_ledger
+from . import account_journal
+from . import account_move
 from . import account_partner_ledger
 from . import account_trial_balance
 from . import aged_payable_report
@@ -27,4 +32,7 @@ from . import aged_receivable_report
 from . import bank_book_report
 from . import cash_book_report
 from . import dynamic_balance_sheet_report
+from . import dynamic_report_cache
+from . import dynamic_report_engine
+from . import res_company
 from . import tax_report
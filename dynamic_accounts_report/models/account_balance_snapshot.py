@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Bhagyadev KP (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+from collections import defaultdict
+from odoo import api, fields, models
+from odoo.tools import SQL, create_index
+
+
+class AccountBalanceSnapshot(models.Model):
+    """Closed monthly balances of journal items.
+
+    One row holds the debit, credit and balance of a month for a given
+    (company, account, journal, partner, analytic distribution, state). The
+    months before ``res.company.account_balance_snapshot_date`` are closed:
+    reports read them here and only scan journal items from that date on.
+    Rows are refreshed when journal items of a closed month change, and the
+    whole table can be rebuilt with ``_rebuild``."""
+    _name = 'account.balance.snapshot'
+    _description = 'Account Balance Snapshot'
+    _inherit = 'analytic.mixin'
+    _order = 'date, account_id'
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, readonly=True,
+                                 help='Company of the journal items.')
+    account_id = fields.Many2one('account.account', string='Account',
+                                 required=True, readonly=True,
+                                 ondelete='cascade',
+                                 help='Account of the journal items.')
+    journal_id = fields.Many2one('account.journal', string='Journal',
+                                 readonly=True, ondelete='cascade',
+                                 help='Journal of the journal items.')
+    partner_id = fields.Many2one('res.partner', string='Partner',
+                                 readonly=True, ondelete='cascade',
+                                 help='Partner of the journal items.')
+    parent_state = fields.Selection([('draft', 'Draft'),
+                                     ('posted', 'Posted')],
+                                    string='Status', required=True,
+                                    readonly=True,
+                                    help='State of the journal entries.')
+    date = fields.Date(string='Month', required=True, readonly=True,
+                       help='First day of the month summarised by the row.')
+    debit = fields.Monetary(string='Debit', readonly=True,
+                            currency_field='company_currency_id',
+                            help='Sum of the debits of the month.')
+    credit = fields.Monetary(string='Credit', readonly=True,
+                             currency_field='company_currency_id',
+                             help='Sum of the credits of the month.')
+    balance = fields.Monetary(string='Balance', readonly=True,
+                              currency_field='company_currency_id',
+                              help='Sum of the balances of the month.')
+    company_currency_id = fields.Many2one(related='company_id.currency_id',
+                                          string='Company Currency',
+                                          help='Currency of the company.')
+
+    def init(self):
+        """Index the columns used to sum the closed months of an account."""
+        super().init()
+        create_index(self.env.cr,
+                     'account_balance_snapshot_company_account_date_idx',
+                     self._table, ['company_id', 'account_id', 'date'])
+
+    @api.model
+    def _get_line_keys(self, lines):
+        """
+        Return the snapshot rows affected by the given journal items.
+
+        Only items of a closed month are considered, so changes in the
+        open period cost nothing.
+
+        :param lines: ``account.move.line`` recordset.
+        :return: Set of ``(company_id, month, account_id)`` tuples.
+        :rtype: set
+        """
+        keys = set()
+        for line in lines:
+            closed_date = line.company_id.account_balance_snapshot_date
+            if closed_date and line.date and line.account_id and \
+                    line.date < closed_date:
+                keys.add((line.company_id.id, line.date.replace(day=1),
+                          line.account_id.id))
+        return keys
+
+    @api.model
+    def _refresh_keys(self, keys):
+        """
+        Recompute the snapshot rows of the given keys from journal items.
+
+        :param keys: Set of ``(company_id, month, account_id)`` tuples as
+            returned by ``_get_line_keys``.
+        """
+        if not keys:
+            return
+        accounts_by_month = defaultdict(set)
+        for company_id, month, account_id in keys:
+            accounts_by_month[(company_id, month)].add(account_id)
+        self.env.flush_all()
+        for (company_id, month), account_ids in accounts_by_month.items():
+            month_end = fields.Date.end_of(month, 'month')
+            account_ids = tuple(account_ids)
+            self.env.cr.execute(SQL(
+                """
+                DELETE FROM account_balance_snapshot
+                 WHERE company_id = %s AND date = %s AND account_id IN %s
+                """, company_id, month, account_ids))
+            self._insert_snapshots(SQL(
+                "line.company_id = %s AND line.date BETWEEN %s AND %s "
+                "AND line.account_id IN %s",
+                company_id, month, month_end, account_ids))
+        self.invalidate_model()
+
+    @api.model
+    def _insert_snapshots(self, condition):
+        """
+        Insert the monthly sums of the journal items matching a condition.
+
+        :param condition: ``SQL`` condition on the ``line`` alias of
+            ``account_move_line``.
+        """
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO account_balance_snapshot
+                   (company_id, account_id, journal_id, partner_id,
+                    analytic_distribution, parent_state, date, debit, credit,
+                    balance, create_uid, create_date, write_uid, write_date)
+            SELECT line.company_id, line.account_id, line.journal_id,
+                   line.partner_id, line.analytic_distribution,
+                   line.parent_state,
+                   date_trunc('month', line.date)::date,
+                   SUM(line.debit), SUM(line.credit), SUM(line.balance),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC',
+                   %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM account_move_line line
+             WHERE %(condition)s
+               AND line.account_id IS NOT NULL
+               AND line.parent_state IN ('draft', 'posted')
+          GROUP BY line.company_id, line.account_id, line.journal_id,
+                   line.partner_id, line.analytic_distribution,
+                   line.parent_state, date_trunc('month', line.date)
+            """, uid=self.env.uid, condition=condition))
+
+    @api.model
+    def _rebuild(self, companies=None):
+        """
+        Rebuild the snapshots of every month closed before the current one.
+
+        :param companies: ``res.company`` recordset, all companies if None.
+        """
+        companies = companies or self.env['res.company'].sudo().search([])
+        closed_date = fields.Date.start_of(fields.Date.today(), 'month')
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            "DELETE FROM account_balance_snapshot WHERE company_id IN %s",
+            tuple(companies.ids)))
+        self._insert_snapshots(SQL(
+            "line.company_id IN %s AND line.date < %s",
+            tuple(companies.ids), closed_date))
+        companies.sudo().write({'account_balance_snapshot_date': closed_date})
+        self.invalidate_model()
+
+    @api.model
+    def _cron_close_months(self):
+        """
+        Snapshot the months elapsed since the last run.
+
+        Companies without snapshots yet are rebuilt from scratch.
+        """
+        closed_date = fields.Date.start_of(fields.Date.today(), 'month')
+        companies = self.env['res.company'].sudo().search([])
+        new_companies = companies.filtered(
+            lambda company: not company.account_balance_snapshot_date)
+        if new_companies:
+            self._rebuild(new_companies)
+        self.env.flush_all()
+        for company in companies - new_companies:
+            if company.account_balance_snapshot_date >= closed_date:
+                continue
+            self._insert_snapshots(SQL(
+                "line.company_id = %s AND line.date >= %s AND line.date < %s",
+                company.id, company.account_balance_snapshot_date,
+                closed_date))
+            company.account_balance_snapshot_date = closed_date
+        self.invalidate_model()
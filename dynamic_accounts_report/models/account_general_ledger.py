@@ -21,12 +21,17 @@
 ################################################################################
 import io
 import json
-import calendar
-from dateutil.relativedelta import relativedelta
+from collections import defaultdict
 import xlsxwriter
 from odoo import api, fields, models
-from datetime import datetime
-from odoo.tools import date_utils
+from odoo.addons.base_accounting_kit.models.report_instrumentation import \
+    instrument_report
+from .dynamic_report_cache import report_cache
+
+LINE_FIELDS = ['date', 'name', 'move_name', 'debit', 'credit', 'partner_id',
+               'account_id', 'journal_id', 'move_id', 'analytic_line_ids']
+PAGE_SIZE = 80
+XLSX_PAGE_SIZE = 2000
 
 
 class AccountGeneralLedger(models.TransientModel):
@@ -35,9 +40,11 @@ class AccountGeneralLedger(models.TransientModel):
     _description = 'General Ledger Report'
 
     @api.model
+    @instrument_report
+    @report_cache()
     def view_report(self, option, tag):
         """
-        Retrieve partner ledger report data based on options and tags.
+        Retrieve general ledger report data based on options and tags.
 
         :param option: The options to filter the report data.
         :type option: str
@@ -45,44 +52,18 @@ class AccountGeneralLedger(models.TransientModel):
         :param tag: The tag to filter the report data.
         :type tag: str
 
-        :return: A dictionary containing the partner ledger report data.
+        :return: A dictionary containing the general ledger report data.
         :rtype: dict
         """
-        account_dict = {}
-        account_totals = {}
-        move_line_ids = self.env['account.move.line'].search(
-            [('parent_state', '=', 'posted')])
-        account_ids = move_line_ids.mapped('account_id')
-        account_dict['journal_ids'] = self.env['account.journal'].search_read(
-            [], ['name'])
-        account_dict['analytic_ids'] = self.env[
-            'account.analytic.account'].search_read(
-            [], ['name'])
-        for account in account_ids:
-            move_line_id = move_line_ids.filtered(
-                lambda x: x.account_id == account)
-            move_line_list = []
-            for move_line in move_line_id:
-                move_line_data = move_line.read(
-                    ['date', 'name', 'move_name', 'debit', 'credit',
-                     'partner_id', 'account_id', 'journal_id', 'move_id',
-                     'analytic_line_ids'])
-                move_line_list.append(move_line_data)
-            account_dict[account.display_name] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            account_totals[account.display_name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
-                'currency_id': currency_id,
-                'account_id': account.id}
-            account_dict['account_totals'] = account_totals
-        return account_dict
+        return self._get_ledger_data([('parent_state', '=', 'posted')])
 
     @api.model
+    @instrument_report
+    @report_cache(date_arg=1, options_arg=2)
     def get_filter_values(self, journal_id, date_range, options, analytic,
-                          method):
+                          method, lazy=False):
         """
-        Retrieve filtered values for the partner ledger report.
+        Retrieve filtered values for the general ledger report.
 
         :param journal_id: The journal IDs to filter the report data.
         :type journal_id: list
@@ -99,16 +80,74 @@ class AccountGeneralLedger(models.TransientModel):
         :param analytic: The analytic IDs to filter the report data.
         :type analytic: list
 
-        :return: A dictionary containing the filtered values for the partner
+        :param lazy: Only return the account totals, the journal items of
+            an account being fetched page by page with
+            ``get_account_lines``.
+        :type lazy: bool
+
+        :return: A dictionary containing the filtered values for the general
         ledger report.
         :rtype: dict
         """
-        account_dict = {}
-        account_totals = {}
-        today = fields.Date.today()
-        quarter_start, quarter_end = date_utils.get_quarter(today)
-        previous_quarter_start = quarter_start - relativedelta(months=3)
-        previous_quarter_end = quarter_start - relativedelta(days=1)
+        domain = self._get_filter_domain(journal_id, date_range, options,
+                                         analytic, method)
+        return self._get_ledger_data(domain, lazy=lazy)
+
+    @api.model
+    def get_account_lines(self, account_id, journal_id, date_range, options,
+                          analytic, method, cursor=None, limit=PAGE_SIZE):
+        """
+        Return one page of the journal items of an account.
+
+        Pages are keyset paginated on ``(date, id)`` so fetching a page costs
+        the same whatever its position, and the running balance is carried
+        from one page to the next through the cursor.
+
+        :param int account_id: The account to expand.
+        :param cursor: The cursor returned with the previous page, or None
+            for the first page.
+        :type cursor: dict
+        :param int limit: Maximum number of journal items of the page.
+        :return: A dictionary with the ``lines`` of the page, shaped like
+            the lines of ``get_filter_values``, and the ``cursor`` of the
+            next page or False when the account has no more items.
+        :rtype: dict
+        """
+        domain = self._get_filter_domain(journal_id, date_range, options,
+                                         analytic, method)
+        domain += [('account_id', '=', account_id)]
+        balance = 0.0
+        if cursor:
+            domain += ['|', ('date', '>', cursor['date']),
+                       '&', ('date', '=', cursor['date']),
+                       ('id', '>', cursor['id'])]
+            balance = cursor['balance']
+        move_lines = self.env['account.move.line'].search_read(
+            domain, LINE_FIELDS, order='date, id', limit=limit + 1)
+        next_page = len(move_lines) > limit
+        move_lines = move_lines[:limit]
+        for move_line in move_lines:
+            balance += move_line['debit'] - move_line['credit']
+            move_line['balance'] = round(balance, 2)
+        next_cursor = next_page and {
+            'date': fields.Date.to_string(move_lines[-1]['date']),
+            'id': move_lines[-1]['id'],
+            'balance': balance,
+        }
+        return {
+            'lines': [[move_line] for move_line in move_lines],
+            'cursor': next_cursor,
+        }
+
+    @api.model
+    def _get_filter_domain(self, journal_id, date_range, options, analytic,
+                           method):
+        """
+        Build the journal item domain of the general ledger filters.
+
+        :return: A domain on ``account.move.line``.
+        :rtype: list
+        """
         if options == {}:
             options = None
         if options is None:
@@ -127,77 +166,86 @@ class AccountGeneralLedger(models.TransientModel):
             analytic_line = self.env['account.analytic.line'].search(
                 [('account_id', 'in', analytic)]).mapped('id')
             domain += [('analytic_line_ids', 'in', analytic_line)]
-        if date_range:
-            if date_range == 'month':
-                domain += [('date', '>=', today.replace(day=1)),
-                           ('date', '<=', today)]
-            elif date_range == 'year':
-                domain += [('date', '>=', today.replace(month=1, day=1)),
-                           ('date', '<=', today)]
-            elif date_range == 'quarter':
-                domain += [('date', '>=', quarter_start),
-                           ('date', '<=', quarter_end)]
-            elif date_range == 'last-month':
-                last_month_start = today.replace(day=1) - relativedelta(
-                    months=1)
-                last_month_end = last_month_start + relativedelta(
-                    day=calendar.monthrange(last_month_start.year,
-                                            last_month_start.month)[
-                        1])
-                domain += [('date', '>=', last_month_start),
-                           ('date', '<=', last_month_end)]
-            elif date_range == 'last-year':
-                last_year_start = today.replace(month=1,
-                                                day=1) - relativedelta(years=1)
-                last_year_end = last_year_start.replace(month=12, day=31)
-                domain += [('date', '>=', last_year_start),
-                           ('date', '<=', last_year_end)]
-            elif date_range == 'last-quarter':
-                domain += [('date', '>=', previous_quarter_start),
-                           ('date', '<=', previous_quarter_end)]
-            elif 'start_date' in date_range and 'end_date' in date_range:
-                start_date = datetime.strptime(date_range['start_date'],
-                                               '%Y-%m-%d').date()
-                end_date = datetime.strptime(date_range['end_date'],
-                                             '%Y-%m-%d').date()
-                domain += [('date', '>=', start_date),
-                           ('date', '<=', end_date)]
-            elif 'start_date' in date_range:
-                start_date = datetime.strptime(date_range['start_date'],
-                                               '%Y-%m-%d').date()
-                domain += [('date', '>=', start_date)]
-            elif 'end_date' in date_range:
-                end_date = datetime.strptime(date_range['end_date'],
-                                             '%Y-%m-%d').date()
-                domain += [('date', '<=', end_date)]
-        move_line_ids = self.env['account.move.line'].search(domain)
-        account_ids = move_line_ids.mapped('account_id')
+        domain += self.env['dynamic.report.engine']._get_date_range_domain(
+            date_range)
+        return domain
+
+    @api.model
+    def _get_ledger_data(self, domain, lazy=False):
+        """
+        Build the general ledger data of the journal items of a domain.
+
+        The account totals come from one grouped query. Unless ``lazy`` is
+        set, the journal items are read with a single ``search_read`` and
+        grouped by account in Python.
+
+        :param list domain: A domain on ``account.move.line``.
+        :param bool lazy: Leave the journal items of the accounts empty.
+        :return: A dictionary mapping every account display name to its
+            journal items, plus the ``account_totals``, ``journal_ids`` and
+            ``analytic_ids`` keys.
+        :rtype: dict
+        """
+        account_dict = {}
+        account_totals = {}
+        balances = self.env['dynamic.report.engine']._get_account_balances(
+            domain)
+        lines_by_account = defaultdict(list)
+        if not lazy:
+            for move_line in self.env['account.move.line'].search_read(
+                    domain + [('account_id', 'in', list(balances))],
+                    LINE_FIELDS):
+                lines_by_account[move_line['account_id'][0]].append(
+                    [move_line])
         account_dict['journal_ids'] = self.env['account.journal'].search_read(
             [], ['name'])
         account_dict['analytic_ids'] = self.env[
             'account.analytic.account'].search_read(
             [], ['name'])
-        for account in account_ids:
-            move_line_id = move_line_ids.filtered(
-                lambda x: x.account_id == account)
-            move_line_list = []
-            for move_line in move_line_id:
-                move_line_data = move_line.read(
-                    ['date', 'name', 'move_name', 'debit', 'credit',
-                     'partner_id', 'account_id', 'journal_id', 'move_id',
-                     'analytic_line_ids'])
-                move_line_list.append(move_line_data)
-            account_dict[account.display_name] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
+        currency_id = self.env.company.currency_id.symbol
+        for account in self.env['account.account'].search(
+                [('id', 'in', list(balances))]):
+            account_dict[account.display_name] = lines_by_account[account.id]
             account_totals[account.display_name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
+                'total_debit': round(balances[account.id]['debit'], 2),
+                'total_credit': round(balances[account.id]['credit'], 2),
                 'currency_id': currency_id,
                 'account_id': account.id}
-            account_dict['account_totals'] = account_totals
+        account_dict['account_totals'] = account_totals
         return account_dict
 
     @api.model
+    def _iter_account_lines(self, domain, account_id,
+                            page_size=XLSX_PAGE_SIZE):
+        """
+        Yield the journal items of an account ordered by date.
+
+        The items are read by keyset pages on ``(date, id)`` and the record
+        cache is dropped after each page, so only one page is held in memory
+        whatever the size of the ledger.
+
+        :param list domain: A domain on ``account.move.line``.
+        :param int account_id: The account whose items are yielded.
+        :param int page_size: Number of items read per query.
+        :return: A generator of dictionaries shaped like ``LINE_FIELDS``.
+        """
+        move_line_model = self.env['account.move.line']
+        domain = domain + [('account_id', '=', account_id)]
+        page_domain = domain
+        while True:
+            move_lines = move_line_model.search_read(
+                page_domain, LINE_FIELDS, order='date, id', limit=page_size)
+            move_line_model.invalidate_model()
+            yield from move_lines
+            if len(move_lines) < page_size:
+                return
+            last_date, last_id = move_lines[-1]['date'], move_lines[-1]['id']
+            page_domain = domain + ['|', ('date', '>', last_date),
+                                    '&', ('date', '=', last_date),
+                                    ('id', '>', last_id)]
+
+    @api.model
+    @instrument_report
     def get_xlsx_report(self, data, response, report_name, report_action):
         """
         Generate an XLSX report based on the provided data and write it to the
@@ -212,9 +260,36 @@ class AccountGeneralLedger(models.TransientModel):
         :param report_name: The name of the report.
         :type report_name: str
         """
-        data = json.loads(data)
         output = io.BytesIO()
         workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        self.write_xlsx_report(workbook, data, report_name, report_action)
+        workbook.close()
+        output.seek(0)
+        response.stream.write(output.read())
+        output.close()
+
+    @api.model
+    def write_xlsx_report(self, workbook, data, report_name, report_action):
+        """
+        Write the general ledger into a workbook, row after row, so it may
+        be opened in ``constant_memory`` mode and streamed by the
+        ``/xlsx_report`` controller.
+
+        When ``data`` holds the filters of the report under the 'query' key
+        instead of the journal items, the items are read here account by
+        account through ``_iter_account_lines``.
+
+        :param workbook: The ``xlsxwriter.Workbook`` to write to.
+        :param data: The data used to generate the report.
+        :type data: str (JSON format)
+        :param report_name: The name of the report.
+        :type report_name: str
+        """
+        data = json.loads(data)
+        domain = data.get('query') and self._get_filter_domain(
+            data['query']['journal_id'], data['query']['date_range'],
+            data['query']['options'], data['query']['analytic'],
+            data['query']['method'])
         start_date = data['filters']['start_date'] if \
             data['filters']['start_date'] else ''
         end_date = data['filters']['end_date'] if \
@@ -245,27 +320,20 @@ class AccountGeneralLedger(models.TransientModel):
         sheet.set_column(3, 3, 15)
         col = 0
         sheet.write('A1:b1', report_name, head)
-        sheet.write('B3:b4', 'Date Range', filter_head)
-        sheet.write('B4:b4', 'Journals', filter_head)
-        sheet.write('B5:b4', 'Analytic', filter_head)
-        sheet.write('B6:b4', 'Options', filter_head)
-        if start_date or end_date:
-            sheet.merge_range('C3:G3', f"{start_date} to {end_date}",
-                              filter_body)
-        if data['filters']['journal']:
-            display_names = [journal for
-                             journal in data['filters']['journal']]
-            display_names_str = ', '.join(display_names)
-            sheet.merge_range('C4:G4', display_names_str, filter_body)
-        if data['filters']['analytic']:
-            display_names = [analytic for
-                             analytic in data['filters']['analytic']]
-            account_keys_str = ', '.join(display_names)
-            sheet.merge_range('C5:G5', account_keys_str, filter_body)
-        if data['filters']['options']:
-            option_keys = list(data['filters']['options'].keys())
-            option_keys_str = ', '.join(option_keys)
-            sheet.merge_range('C6:G6', option_keys_str, filter_body)
+        # In constant_memory mode a row is flushed as soon as a later row is
+        # written, so each filter row is written whole before the next one.
+        filters = data['filters']
+        filter_rows = [
+            ('Date Range', (start_date or end_date)
+             and f"{start_date} to {end_date}"),
+            ('Journals', ', '.join(filters['journal'] or [])),
+            ('Analytic', ', '.join(filters['analytic'] or [])),
+            ('Options', ', '.join(filters['options'] or {})),
+        ]
+        for row, (label, value) in enumerate(filter_rows, start=2):
+            sheet.write(row, 1, label, filter_head)
+            if value:
+                sheet.merge_range(row, 2, row, 6, value, filter_body)
         if data:
             if report_action == 'dynamic_accounts_report.action_general_ledger':
                 sheet.write(8, col, ' ', sub_heading)
@@ -293,7 +361,16 @@ class AccountGeneralLedger(models.TransientModel):
                         sheet.merge_range(row, col + 11, row, col + 12,
                                           data['total'][account]['balance_display'],
                                           txt_name)
-                        for rec in data['data'][account]:
+                        if domain:
+                            account_lines = (
+                                [dict(move_line, date=fields.Date.to_string(
+                                    move_line['date']))]
+                                for move_line in self._iter_account_lines(
+                                    domain,
+                                    data['total'][account]['account_id']))
+                        else:
+                            account_lines = data['data'][account]
+                        for rec in account_lines:
                             row += 1
                             partner = rec[0]['partner_id']
                             name = partner[1] if partner else None
@@ -323,7 +400,3 @@ class AccountGeneralLedger(models.TransientModel):
                                       float(data['grand_total']['total_debit']) -
                                       float(data['grand_total']['total_credit']),
                                       filter_head)
-        workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Bhagyadev KP (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+from odoo import api, models
+
+
+class AccountJournal(models.Model):
+    """Drop the cached report results when a journal changes, the
+    reports listing the journals by name."""
+    _inherit = 'account.journal'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop the cached report results, which miss the new records."""
+        records = super().create(vals_list)
+        self.env['dynamic.report.cache']._invalidate_all()
+        return records
+
+    def write(self, vals):
+        """Drop the cached report results showing the records."""
+        res = super().write(vals)
+        self.env['dynamic.report.cache']._invalidate_all()
+        return res
+
+    def unlink(self):
+        """Drop the cached report results showing the records."""
+        res = super().unlink()
+        self.env['dynamic.report.cache']._invalidate_all()
+        return res
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Bhagyadev KP (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+from odoo import api, models
+
+SNAPSHOT_MOVE_FIELDS = {'state', 'date', 'journal_id', 'company_id'}
+# The residual amounts change on reconciliation, which
+# account.partial.reconcile already follows
+SNAPSHOT_LINE_FIELDS = {'debit', 'credit', 'balance', 'amount_currency',
+                        'account_id', 'partner_id', 'journal_id', 'date',
+                        'analytic_distribution', 'company_id'}
+
+
+class AccountMove(models.Model):
+    """Refresh the balance snapshots and drop the cached report results when
+    an entry changes state, e.g. when it is posted, reset to draft or
+    cancelled."""
+    _inherit = 'account.move'
+
+    def write(self, vals):
+        """Refresh the snapshots of the closed months touched by the
+        entries, and drop the cached report results depending on them, when
+        a field copied on their journal items changes."""
+        if not SNAPSHOT_MOVE_FIELDS.intersection(vals):
+            return super().write(vals)
+        snapshot = self.env['account.balance.snapshot']
+        cache = self.env['dynamic.report.cache']
+        keys = snapshot._get_line_keys(self.line_ids)
+        scopes = cache._get_line_scopes(self.line_ids)
+        res = super().write(vals)
+        snapshot._refresh_keys(keys | snapshot._get_line_keys(self.line_ids))
+        cache._invalidate_scopes(cache._get_line_scopes(self.line_ids, scopes))
+        return res
+
+
+class AccountMoveLine(models.Model):
+    """Refresh the balance snapshots when a journal item of a closed month
+    is created, modified or removed, and drop the cached report results
+    depending on it."""
+    _inherit = 'account.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Refresh the snapshots of the closed months of the new items."""
+        lines = super().create(vals_list)
+        snapshot = self.env['account.balance.snapshot']
+        snapshot._refresh_keys(snapshot._get_line_keys(lines))
+        self.env['dynamic.report.cache']._invalidate_lines(lines)
+        return lines
+
+    def write(self, vals):
+        """Refresh the snapshots of the closed months of the items, before
+        and after the change, when a field the reports read changes."""
+        if not SNAPSHOT_LINE_FIELDS.intersection(vals):
+            return super().write(vals)
+        snapshot = self.env['account.balance.snapshot']
+        cache = self.env['dynamic.report.cache']
+        keys = snapshot._get_line_keys(self)
+        scopes = cache._get_line_scopes(self)
+        res = super().write(vals)
+        snapshot._refresh_keys(keys | snapshot._get_line_keys(self))
+        cache._invalidate_scopes(cache._get_line_scopes(self, scopes))
+        return res
+
+    def unlink(self):
+        """Refresh the snapshots of the closed months of the removed
+        items."""
+        snapshot = self.env['account.balance.snapshot']
+        keys = snapshot._get_line_keys(self)
+        self.env['dynamic.report.cache']._invalidate_lines(self)
+        res = super().unlink()
+        snapshot._refresh_keys(keys)
+        return res
+
+
+class AccountPartialReconcile(models.Model):
+    """Drop the cached report results depending on journal items when they
+    are reconciled or unreconciled, their residual amounts changing."""
+    _inherit = 'account.partial.reconcile'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop the results depending on the newly reconciled items."""
+        partials = super().create(vals_list)
+        self.env['dynamic.report.cache']._invalidate_lines(
+            partials.debit_move_id | partials.credit_move_id)
+        return partials
+
+    def unlink(self):
+        """Drop the results depending on the unreconciled items."""
+        self.env['dynamic.report.cache']._invalidate_lines(
+            self.debit_move_id | self.credit_move_id)
+        return super().unlink()
@@ -21,13 +21,31 @@
 ################################################################################
 import io
 import json
+from collections import defaultdict
 from datetime import datetime
 
-from dateutil.relativedelta import relativedelta
 import xlsxwriter
 
-from odoo import api, fields, models
-from odoo.tools import date_utils
+from odoo import api, models
+
+from odoo.addons.base_accounting_kit.models.report_instrumentation import \
+    instrument_report
+from .dynamic_report_cache import report_cache
+
+INVOICE_TYPES = ('out_invoice', 'out_refund', 'in_invoice', 'in_refund')
+LINE_FIELDS = [
+    'date',
+    'move_name',
+    'account_type',
+    'debit',
+    'credit',
+    'date_maturity',
+    'account_id',
+    'journal_id',
+    'move_id',
+    'matching_number',
+    'amount_currency',
+]
 
 
 class AccountPartnerLedger(models.TransientModel):
@@ -36,37 +54,88 @@ class AccountPartnerLedger(models.TransientModel):
     _description = 'Partner Ledger Report'
 
     # -------------------------------------------------------------------------
-    # Helper: products / prices / quantities for one move
+    # Helper: products / prices / quantities for a batch of moves
     # -------------------------------------------------------------------------
-    def _get_move_products_info(self, move_line):
-        """Return 3 strings: products, prices, quantities for the move."""
-        move = move_line.move_id
+    def _get_moves_products_info(self, move_ids):
+        """Return ``{move_id: (products, prices, quantities)}`` strings for
+        the invoices among ``move_ids``, read with one grouped query so
+        each invoice is processed once whatever its number of ledger
+        lines."""
+        products_info = defaultdict(lambda: ([], [], []))
         # Only invoices / bills / refunds usually have products
-        if not move or move.move_type not in (
-            'out_invoice', 'out_refund', 'in_invoice', 'in_refund'
-        ):
-            return '', '', ''
-
-        product_names = []
-        product_prices = []
-        product_quantities = []
-
-        for il in move.invoice_line_ids:
-            product_names.append(il.product_id.display_name or il.name or '')
-            product_prices.append("{:,.2f}".format(il.price_unit or 0.0))
-            product_quantities.append("{:,.2f}".format(il.quantity or 0.0))
+        invoice_lines = self.env['account.move.line'].search_read(
+            [
+                ('move_id', 'in', list(move_ids)),
+                ('move_id.move_type', 'in', INVOICE_TYPES),
+                ('display_type', 'in', ('product', 'line_section',
+                                        'line_note')),
+            ],
+            ['move_id', 'product_id', 'name', 'price_unit', 'quantity'],
+            order='move_id, sequence, id',
+        )
+        for il in invoice_lines:
+            names, prices, quantities = products_info[il['move_id'][0]]
+            names.append(
+                (il['product_id'] and il['product_id'][1]) or il['name'] or '')
+            prices.append("{:,.2f}".format(il['price_unit'] or 0.0))
+            quantities.append("{:,.2f}".format(il['quantity'] or 0.0))
 
         # newline-separated so they look good in PDF/Excel with wrapping
-        return (
-            '\n'.join(product_names),
-            '\n'.join(product_prices),
-            '\n'.join(product_quantities),
+        return {
+            move_id: tuple('\n'.join(values) for values in info)
+            for move_id, info in products_info.items()
+        }
+
+    # -------------------------------------------------------------------------
+    # Helper: ledger lines of all partners in one pass
+    # -------------------------------------------------------------------------
+    def _get_partner_lines(self, domain):
+        """Read the ledger lines of ``domain`` in one ``search_read`` and
+        return them grouped by partner id, each line shaped like the result
+        of ``read()`` and completed with its journal/account codes and the
+        products of its invoice."""
+        move_lines = self.env['account.move.line'].search_read(
+            domain + [('partner_id', '!=', False)],
+            LINE_FIELDS + ['partner_id', 'invoice_date'],
         )
+        account_codes = {
+            account['id']: account['code']
+            for account in self.env['account.account'].search_read(
+                [('id', 'in', list({line['account_id'][0]
+                                    for line in move_lines}))], ['code'])
+        }
+        journal_codes = {
+            journal['id']: journal['code']
+            for journal in self.env['account.journal'].search_read(
+                [('id', 'in', list({line['journal_id'][0]
+                                    for line in move_lines}))], ['code'])
+        }
+        products_info = self._get_moves_products_info(
+            {line['move_id'][0] for line in move_lines})
+        lines_by_partner = defaultdict(list)
+        for move_line in move_lines:
+            account_code = account_codes.get(move_line['account_id'][0])
+            if account_code:
+                move_line['jrnl'] = journal_codes.get(
+                    move_line['journal_id'][0])
+                move_line['code'] = account_code
+
+            # add products info
+            products, prices, quantities = products_info.get(
+                move_line['move_id'][0], ('', '', ''))
+            move_line['products'] = products
+            move_line['product_prices'] = prices
+            move_line['product_quantities'] = quantities
+
+            lines_by_partner[move_line['partner_id'][0]].append([move_line])
+        return lines_by_partner
 
     # -------------------------------------------------------------------------
     # JSON data for initial load
     # -------------------------------------------------------------------------
     @api.model
+    @instrument_report
+    @report_cache(account_types=['asset_receivable', 'liability_payable'])
     def view_report(self, option, tag):
         fiscal_year = self.env['res.company'].search([]).mapped(
             'account_opening_date'
@@ -76,62 +145,31 @@ class AccountPartnerLedger(models.TransientModel):
         partner_dict = {}
         partner_totals = {}
 
-        move_line_ids = self.env['account.move.line'].search(
+        lines_by_partner = self._get_partner_lines(
             [
                 ('account_type', 'in', ['liability_payable', 'asset_receivable']),
                 ('parent_state', '=', 'posted'),
             ]
         )
-        partner_ids = move_line_ids.mapped('partner_id')
+        currency_id = self.env.company.currency_id.symbol
 
-        for partner in partner_ids:
+        for partner in self.env['res.partner'].browse(lines_by_partner):
+            move_line_list = lines_by_partner[partner.id]
             total_debit_balance = 0
             total_credit_balance = 0
             balance = 0
 
-            move_line_id = move_line_ids.filtered(lambda x: x.partner_id == partner)
-            move_line_list = []
-
-            for move_line in move_line_id:
-                if move_line.invoice_date and move_line.invoice_date < fiscal_year_start:
-                    total_debit_balance += move_line.debit
-                    total_credit_balance += move_line.credit
+            for move_line_data in move_line_list:
+                move_line = move_line_data[0]
+                if move_line['invoice_date'] and move_line['invoice_date'] < fiscal_year_start:
+                    total_debit_balance += move_line['debit']
+                    total_credit_balance += move_line['credit']
                     balance = total_debit_balance - total_credit_balance
 
-                move_line_data = move_line.read(
-                    [
-                        'date',
-                        'move_name',
-                        'account_type',
-                        'debit',
-                        'credit',
-                        'date_maturity',
-                        'account_id',
-                        'journal_id',
-                        'move_id',
-                        'matching_number',
-                        'amount_currency',
-                    ]
-                )
-                account_code = move_line.account_id.code
-                journal_code = move_line.journal_id.code
-                if account_code:
-                    move_line_data[0]['jrnl'] = journal_code
-                    move_line_data[0]['code'] = account_code
-
-                # add products info
-                products, prices, quantities = self._get_move_products_info(move_line)
-                move_line_data[0]['products'] = products
-                move_line_data[0]['product_prices'] = prices
-                move_line_data[0]['product_quantities'] = quantities
-
-                move_line_list.append(move_line_data)
-
             partner_dict[partner.name] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
             partner_totals[partner.name] = {
-                'total_debit': round(sum(move_line_id.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_id.mapped('credit')), 2),
+                'total_debit': round(sum(line[0]['debit'] for line in move_line_list), 2),
+                'total_credit': round(sum(line[0]['credit'] for line in move_line_list), 2),
                 'currency_id': currency_id,
                 'initial_balance': balance,
                 'partner_id': partner.id,
@@ -143,10 +181,32 @@ class AccountPartnerLedger(models.TransientModel):
 
         return partner_dict
 
+    # -------------------------------------------------------------------------
+    # Helper: period of the filtered view
+    # -------------------------------------------------------------------------
+    def _get_data_range_filter(self, data_range):
+        """Return ``(domain, date_start)`` of a date range option: the
+        indexed date terms selecting the ledger lines of the period, and
+        the date before which lines make the initial balance (None when
+        there is no range)."""
+        engine = self.env['dynamic.report.engine']
+        date_start, _date_end = engine._get_date_range(data_range)
+        domain = engine._get_date_range_domain(data_range)
+        if data_range and not date_start and domain:
+            # Only an end date: the initial balance stops at the opening
+            fiscal_year = self.env['res.company'].search([]).mapped(
+                'account_opening_date'
+            )[0].strftime('%Y-%m-%d')
+            date_start = datetime.strptime(fiscal_year, '%Y-%m-%d').date()
+        return domain, date_start or None
+
     # -------------------------------------------------------------------------
     # JSON data for filtered view
     # -------------------------------------------------------------------------
     @api.model
+    @instrument_report
+    @report_cache(account_types=['asset_receivable', 'liability_payable'],
+                  date_arg=1, options_arg=3)
     def get_filter_values(self, partner_id, data_range, account, options):
         if options == {}:
             options = None
@@ -169,259 +229,48 @@ class AccountPartnerLedger(models.TransientModel):
         partner_dict = {}
         partner_totals = {}
 
-        today = fields.Date.today()
-        quarter_start, quarter_end = date_utils.get_quarter(today)
-        previous_quarter_start = quarter_start - relativedelta(months=3)
-        previous_quarter_end = quarter_start - relativedelta(days=1)
+        base_domain = [
+            ('account_type', 'in', account_type_domain),
+            ('parent_state', 'in', option_domain),
+        ]
+        if partner_id:
+            base_domain.append(('partner_id', 'in', partner_id))
+        range_domain, date_start = self._get_data_range_filter(data_range)
+        lines_by_partner = self._get_partner_lines(base_domain + range_domain)
+
+        # ---- initial balances of all partners in one aggregate
+        initial_balances = {}
+        if date_start:
+            initial_balances = {
+                partner.id: (debit, credit)
+                for partner, debit, credit in self.env[
+                    'account.move.line']._read_group(
+                    base_domain + [('invoice_date', '<', date_start)],
+                    ['partner_id'], ['debit:sum', 'credit:sum'])
+                if partner
+            }
 
         if not partner_id:
-            partner_id = self.env['account.move.line'].search(
-                [
-                    ('account_type', 'in', account_type_domain),
-                    ('parent_state', 'in', option_domain),
-                ]
-            ).mapped('partner_id').ids
-
-        balance_move_line_ids = []
-
-        for partners in partner_id:
-            partner = self.env['res.partner'].browse(partners).name
-
-            # ---- original logic to compute move_line_ids + balance_move_line_ids
-            if data_range:
-                if data_range == 'month':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    ).filtered(lambda x: x.date.month == today.month)
-                    date_start = today.replace(day=1)
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-                elif data_range == 'year':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    ).filtered(lambda x: x.date.year == today.year)
-                    date_start = today.replace(month=1, day=1)
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-                elif data_range == 'quarter':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('date', '>=', quarter_start),
-                            ('date', '<=', quarter_end),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    )
-                    date_start = quarter_start
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-                elif data_range == 'last-month':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    ).filtered(lambda x: x.date.month == today.month - 1)
-                    date_start = today.replace(day=1, month=today.month - 1)
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-                elif data_range == 'last-year':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    ).filtered(lambda x: x.date.year == today.year - 1)
-                    date_start = today.replace(day=1, month=1)
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-                elif data_range == 'last-quarter':
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('date', '>=', previous_quarter_start),
-                            ('date', '<=', previous_quarter_end),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    )
-                    date_start = previous_quarter_start
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-                elif 'start_date' in data_range and 'end_date' in data_range:
-                    start_date = datetime.strptime(
-                        data_range['start_date'], '%Y-%m-%d'
-                    ).date()
-                    end_date = datetime.strptime(
-                        data_range['end_date'], '%Y-%m-%d'
-                    ).date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('date', '>=', start_date),
-                            ('date', '<=', end_date),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    )
-                    date_start = start_date
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-                elif 'start_date' in data_range:
-                    start_date = datetime.strptime(
-                        data_range['start_date'], '%Y-%m-%d'
-                    ).date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('date', '>=', start_date),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    )
-                    date_start = start_date
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-                elif 'end_date' in data_range:
-                    end_date = datetime.strptime(
-                        data_range['end_date'], '%Y-%m-%d'
-                    ).date()
-                    move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('date', '<=', end_date),
-                            ('parent_state', 'in', option_domain),
-                        ]
-                    )
-                    fiscal_year = self.env['res.company'].search([]).mapped(
-                        'account_opening_date'
-                    )[0].strftime('%Y-%m-%d')
-                    date_start = datetime.strptime(fiscal_year, '%Y-%m-%d').date()
-                    balance_move_line_ids = self.env['account.move.line'].search(
-                        [
-                            ('partner_id', '=', partners),
-                            ('account_type', 'in', account_type_domain),
-                            ('parent_state', 'in', option_domain),
-                            ('invoice_date', '<', date_start),
-                        ]
-                    )
-            else:
-                move_line_ids = self.env['account.move.line'].search(
-                    [
-                        ('partner_id', '=', partners),
-                        ('account_type', 'in', account_type_domain),
-                        ('parent_state', 'in', option_domain),
-                    ]
-                )
+            partner_id = [
+                partner.id for [partner] in self.env[
+                    'account.move.line']._read_group(
+                    base_domain, ['partner_id'])
+                if partner
+            ]
+        currency_id = self.env.company.currency_id.symbol
 
-            total_debit_balance = 0
-            total_credit_balance = 0
-            balance = 0
-            move_line_list = []
-
-            for move_line in move_line_ids:
-                move_line_data = move_line.read(
-                    [
-                        'date',
-                        'move_name',
-                        'account_type',
-                        'debit',
-                        'credit',
-                        'date_maturity',
-                        'account_id',
-                        'journal_id',
-                        'move_id',
-                        'matching_number',
-                        'amount_currency',
-                    ]
-                )
-                account_code = move_line.account_id.code
-                journal_code = move_line.journal_id.code
-                if account_code:
-                    move_line_data[0]['jrnl'] = journal_code
-                    move_line_data[0]['code'] = account_code
-
-                # add products info
-                products, prices, quantities = self._get_move_products_info(move_line)
-                move_line_data[0]['products'] = products
-                move_line_data[0]['product_prices'] = prices
-                move_line_data[0]['product_quantities'] = quantities
-
-                move_line_list.append(move_line_data)
-
-            for remaining_move in balance_move_line_ids:
-                if remaining_move.invoice_date and remaining_move.invoice_date < date_start:
-                    total_debit_balance += remaining_move.debit
-                    total_credit_balance += remaining_move.credit
-                    balance = total_debit_balance - total_credit_balance
+        for partner in self.env['res.partner'].browse(partner_id):
+            move_line_list = lines_by_partner.get(partner.id, [])
+            total_debit_balance, total_credit_balance = \
+                initial_balances.get(partner.id, (0, 0))
+            balance = total_debit_balance - total_credit_balance
 
-            partner_dict[partner] = move_line_list
-            currency_id = self.env.company.currency_id.symbol
-            partner_totals[partner] = {
-                'total_debit': round(sum(move_line_ids.mapped('debit')), 2),
-                'total_credit': round(sum(move_line_ids.mapped('credit')), 2),
+            partner_dict[partner.name] = move_line_list
+            partner_totals[partner.name] = {
+                'total_debit': round(sum(line[0]['debit'] for line in move_line_list), 2),
+                'total_credit': round(sum(line[0]['credit'] for line in move_line_list), 2),
                 'currency_id': currency_id,
-                'partner_id': partners,
+                'partner_id': partner.id,
                 'initial_balance': balance,
                 'move_name': 'Initial Balance',
                 'initial_debit': total_debit_balance,
@@ -435,6 +284,7 @@ class AccountPartnerLedger(models.TransientModel):
     # XLSX export
     # -------------------------------------------------------------------------
     @api.model
+    @instrument_report
     def get_xlsx_report(self, data, response, report_name, report_action):
         data = json.loads(data)
         output = io.BytesIO()
@@ -27,6 +27,9 @@ import xlsxwriter
 from odoo import api, fields, models
 from odoo.tools.date_utils import get_month, get_fiscal_year, \
     get_quarter_number, subtract
+from odoo.addons.base_accounting_kit.models.report_instrumentation import \
+    instrument_report
+from .dynamic_report_cache import report_cache
 
 
 class AccountTrialBalance(models.TransientModel):
@@ -35,57 +38,27 @@ class AccountTrialBalance(models.TransientModel):
     _description = 'Trial Balance Report'
 
     @api.model
+    @instrument_report
+    @report_cache()
     def view_report(self):
         """
         Generates a trial balance report for multiple accounts.
         Retrieves account information and calculates total debit and credit
-        amounts for each account within the specified date range. Returns a list
+        amounts for each account within the current month. Returns a list
         of dictionaries containing account details and transaction totals.
 
         :return: List of dictionaries representing the trial balance report.
         :rtype: list
         """
-        account_ids = self.env['account.move.line'].search([]).mapped(
-            'account_id')
         today = fields.Date.today()
-        move_line_list = []
-        for account_id in account_ids:
-            initial_move_line_ids = self.env['account.move.line'].search(
-                [('date', '<', get_month(today)[0]),
-                 ('account_id', '=', account_id.id),
-                 ('parent_state', '=', 'posted')])
-            initial_total_debit = round(
-                sum(initial_move_line_ids.mapped('debit')), 2)
-            initial_total_credit = round(
-                sum(initial_move_line_ids.mapped('credit')), 2)
-            move_line_ids = self.env['account.move.line'].search(
-                [('date', '>=', get_month(today)[0]),
-                 ('account_id', '=', account_id.id),
-                 ('date', '<=', get_month(today)[1]),
-                 ('parent_state', '=', 'posted')])
-            total_debit = round(sum(move_line_ids.mapped('debit')), 2)
-            total_credit = round(sum(move_line_ids.mapped('credit')), 2)
-            sum_debit = initial_total_debit + total_debit
-            sum_credit = initial_total_credit + total_credit
-            diff_credit_debit = sum_debit - sum_credit
-            if diff_credit_debit > 0:
-                end_total_debit = diff_credit_debit
-                end_total_credit = 0.0
-            else:
-                end_total_debit = 0.0
-                end_total_credit = abs(diff_credit_debit)
-            data = {
-                'account': account_id.display_name,
-                'account_id': account_id.id,
-                'journal_ids': self.env['account.journal'].search_read([], ['name']),
-                'initial_total_debit': "{:,.2f}".format(initial_total_debit),
-                'initial_total_credit': "{:,.2f}".format(initial_total_credit),
-                'total_debit': total_debit,
-                'total_credit': total_credit,
-                'end_total_debit': "{:,.2f}".format(end_total_debit),
-                'end_total_credit': "{:,.2f}".format(end_total_credit)
-            }
-            move_line_list.append(data)
+        month_start, month_end = get_month(today)
+        domain = [('parent_state', '=', 'posted')]
+        move_line_list = self._get_trial_balance_lines(
+            domain, month_start, month_end, [], month_start)
+        for data in move_line_list:
+            for key in ('initial_total_debit', 'initial_total_credit',
+                        'end_total_debit', 'end_total_credit'):
+                data[key] = "{:,.2f}".format(data[key])
         journal = {
             'journal_ids': self.env['account.journal'].search_read([], [
                 'name'])
@@ -93,29 +66,30 @@ class AccountTrialBalance(models.TransientModel):
         return move_line_list, journal
 
     @api.model
+    @instrument_report
+    @report_cache(date_arg=1, options_arg=6, comparison_arg=3)
     def get_filter_values(self, start_date, end_date, comparison_number,
                           comparison_type, journal_list, analytic, options,
                           method):
         """
         Retrieves and calculates filtered values for generating a financial
         report.
-        Retrieves and processes account movement data based on the provided
-        filters. Calculates initial, dynamic, and end total debit and credit
-        amounts for each account,considering date range, comparison type, and
-        other filter criteria.
+        Calculates initial, dynamic, and end total debit and credit amounts
+        for each account, considering date range, comparison type, and other
+        filter criteria. The figures of all accounts and comparison periods
+        come from a constant number of grouped queries.
 
         :param str start_date: Start date of the reporting period.
         :param str end_date: End date of the reporting period.
         :param int comparison_number: Number of periods for comparison.
         :param str comparison_type: Type of comparison (month, year, quarter).
         :param list[int] journal_list: List of selected journal IDs.
-        :param list[int] analytic: List of selected analytic line IDs.
+        :param list[int] analytic: List of selected analytic account IDs.
         :param dict options: Additional filtering options (e.g., 'draft').
         :param dict method: Find the method.
         :return: List of dictionaries representing the financial report.
         :rtype: list
         """
-
         if options == {}:
             options = None
         if options is None:
@@ -124,197 +98,129 @@ class AccountTrialBalance(models.TransientModel):
             option_domain = ['posted', 'draft']
         if method == {}:
             method = None
-        dynamic_total_debit = {}
-        dynamic_date_num = {}
-        dynamic_total_credit = {}
-        account_ids = self.env['account.move.line'].search([]).mapped(
-            'account_id')
-        move_line_list = []
-        start_date_first = \
-            get_fiscal_year(datetime.strptime(start_date, "%Y-%m-%d").date())[
-                0] if comparison_type == 'year' else datetime.strptime(
-                start_date, "%Y-%m-%d").date()
-        end_date_first = \
-            get_fiscal_year(datetime.strptime(end_date, "%Y-%m-%d").date())[
-                1] if comparison_type == 'year' else datetime.strptime(end_date,
-                                                                       "%Y-%m-%d").date()
-        for account_id in account_ids:
-            start_date = start_date_first
-            end_date = end_date_first
-            if comparison_number:
-                if comparison_type == 'month':
-                    initial_start_date = subtract(start_date, months=eval(
-                        comparison_number))
-                elif comparison_type == 'year':
-                    initial_start_date = subtract(start_date, years=eval(
-                        comparison_number))
-                else:
-                    initial_start_date = subtract(start_date, months=eval(
-                        comparison_number) * 3)
-            else:
-                initial_start_date = start_date
-            domain = [('date', '<', initial_start_date),
-                      ('account_id', '=', account_id.id),
-                      ('parent_state', 'in', option_domain), ]
-            if journal_list:
-                domain.append(
-                    ('journal_id', 'in', journal_list), )
-            if analytic:
-                domain.append(
-                    ('analytic_line_ids', 'in', analytic))
-            if method is not None and 'cash' in method:
-                domain.append(('journal_id', 'in',
-                               self.env.company.tax_cash_basis_journal_id.ids))
-            initial_move_line_ids = self.env['account.move.line'].search(
-                domain)
-            initial_total_debit = round(
-                sum(initial_move_line_ids.mapped('debit')), 2)
-            initial_total_credit = round(
-                sum(initial_move_line_ids.mapped('credit')), 2)
-            if comparison_number:
-                if comparison_type == 'year':
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, years=i)
-                        com_end_date = subtract(end_date, years=i)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain), ]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list), )
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids))
-                        move_lines = self.env['account.move.line'].search(
-                            domain)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
-                if comparison_type == 'month':
-                    dynamic_date_num[
-                        f"dynamic_date_num{0}"] = self.get_month_name(
-                        start_date) + ' ' + str(
-                        start_date.year)
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, months=i)
-                        com_end_date = subtract(end_date, months=i)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain)]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list), )
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids), )
-                        move_lines = self.env['account.move.line'].search(
-                            domain)
-                        dynamic_date_num[
-                            f"dynamic_date_num{i}"] = self.get_month_name(
-                            com_start_date) + ' ' + str(
-                            com_start_date.year)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
-                if comparison_type == 'quarter':
-                    dynamic_date_num[
-                        f"dynamic_date_num{0}"] = 'Q' + ' ' + str(
-                        get_quarter_number(start_date)) + ' ' + str(
-                        start_date.year)
-                    for i in range(1, eval(comparison_number) + 1):
-                        com_start_date = subtract(start_date, months=i * 3)
-                        com_end_date = subtract(end_date, months=i * 3)
-                        domain = [('date', '>=', com_start_date),
-                                  ('account_id', '=', account_id.id),
-                                  ('date', '<=', com_end_date),
-                                  ('parent_state', 'in', option_domain), ]
-                        if journal_list:
-                            domain.append(
-                                ('journal_id', 'in', journal_list))
-                        if analytic:
-                            domain.append(
-                                ('analytic_line_ids', 'in', analytic))
-                        if method is not None and 'cash' in method:
-                            domain.append(('journal_id', 'in',
-                                           self.env.company.tax_cash_basis_journal_id.ids))
-                        move_lines = self.env['account.move.line'].search(domain)
-                        dynamic_date_num[
-                            f"dynamic_date_num{i}"] = 'Q' + ' ' + str(
-                            get_quarter_number(com_start_date)) + ' ' + str(
-                            com_start_date.year)
-                        dynamic_total_debit[
-                            f"dynamic_total_debit_{i}"] = round(
-                            sum(move_lines.mapped('debit')), 2)
-                        dynamic_total_credit[
-                            f"dynamic_total_credit_{i}"] = round(
-                            sum(move_lines.mapped('credit')), 2)
-            domain = [('date', '>=', start_date),
-                      ('account_id', '=', account_id.id),
-                      ('date', '<=', end_date),
-                      ('parent_state', 'in', option_domain)]
+        comparison_number = int(comparison_number or 0)
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        if comparison_type == 'year':
+            start_date = get_fiscal_year(start_date)[0]
+            end_date = get_fiscal_year(end_date)[1]
+
+        def shift(date, count):
+            if comparison_type == 'month':
+                return subtract(date, months=count)
+            if comparison_type == 'year':
+                return subtract(date, years=count)
+            return subtract(date, months=count * 3)
+
+        comparison_periods = [(shift(start_date, i), shift(end_date, i))
+                              for i in range(1, comparison_number + 1)]
+        initial_start_date = comparison_periods[-1][0] if \
+            comparison_periods else start_date
+        journal_ids = journal_list
+        if method is not None and 'cash' in method:
+            journal_ids = self.env.company.tax_cash_basis_journal_id.ids
             if journal_list:
-                domain.append(
-                    ('journal_id', 'in', journal_list), )
-            if analytic:
-                domain.append(
-                    ('analytic_line_ids', 'in', analytic))
-            if method is not None and 'cash' in method:
-                domain.append(('journal_id', 'in',
-                               self.env.company.tax_cash_basis_journal_id.ids))
-            move_line_ids = self.env['account.move.line'].search(domain)
-            total_debit = round(sum(move_line_ids.mapped('debit')), 2)
-            total_credit = round(sum(move_line_ids.mapped('credit')), 2)
-            sum_debit = initial_total_debit + sum(
-                dynamic_total_debit.values()) + total_debit
-            sum_credit = initial_total_credit + sum(
-                dynamic_total_credit.values()) + total_credit
-            diff_credit_debit = sum_debit - sum_credit
-            if diff_credit_debit > 0:
-                end_total_debit = diff_credit_debit
-                end_total_credit = 0.0
-            else:
-                end_total_debit = 0.0
-                end_total_credit = abs(diff_credit_debit)
+                journal_ids = list(set(journal_ids) & set(journal_list))
+            journal_ids = journal_ids or [0]
+        domain = self.env['dynamic.report.engine']._get_move_line_domain(
+            target_move=option_domain, journal_ids=journal_ids,
+            analytic_ids=analytic)
+        move_line_list = self._get_trial_balance_lines(
+            domain, start_date, end_date, comparison_periods,
+            initial_start_date)
+        if comparison_number and comparison_type in ('month', 'quarter'):
+            dynamic_date_num = {
+                f"dynamic_date_num{i}": self._get_period_label(
+                    period_start, comparison_type)
+                for i, (period_start, _period_end) in enumerate(
+                    [(start_date, end_date)] + comparison_periods)
+            }
+            for data in move_line_list:
+                data['dynamic_date_num'] = dynamic_date_num
+        return move_line_list
+
+    @api.model
+    def _get_trial_balance_lines(self, domain, start_date, end_date,
+                                 comparison_periods, initial_start_date):
+        """
+        Compute the trial balance rows of every account in a set-based way.
+
+        The initial balances come from the balance snapshots and the current
+        and comparison periods from one bucketed query, so the number of
+        queries does not depend on the number of accounts or periods.
+
+        :param list domain: Journal item domain of the report filters.
+        :param date start_date: Start of the reported period.
+        :param date end_date: End of the reported period.
+        :param list comparison_periods: ``(date_from, date_to)`` of the
+            compared periods, most recent first.
+        :param date initial_start_date: Initial balances are summed before
+            this date.
+        :return: List of dictionaries with numeric amounts, one per account.
+        :rtype: list
+        """
+        engine = self.env['dynamic.report.engine']
+        opening_balances = engine._get_opening_balances(
+            domain, initial_start_date)
+        period_balances = engine._get_account_balances_by_period(
+            domain, [(start_date, end_date)] + comparison_periods)
+        journal_ids = self.env['account.journal'].search_read([], ['name'])
+        comparison_number = len(comparison_periods)
+        empty = {'debit': 0.0, 'credit': 0.0}
+        move_line_list = []
+        for account_id in self.env['account.account'].search(
+                [('used', '=', True)]):
+            opening = opening_balances.get(account_id.id, empty)
+            initial_total_debit = round(opening['debit'], 2)
+            initial_total_credit = round(opening['credit'], 2)
+            period = period_balances[0].get(account_id.id, empty)
+            total_debit = round(period['debit'], 2)
+            total_credit = round(period['credit'], 2)
             data = {
                 'account': account_id.display_name,
                 'account_id': account_id.id,
-                'journal_ids': self.env['account.journal'].search_read([], [
-                    'name']),
+                'journal_ids': journal_ids,
                 'initial_total_debit': initial_total_debit,
                 'initial_total_credit': initial_total_credit,
                 'total_debit': total_debit,
                 'total_credit': total_credit,
-                'end_total_debit': end_total_debit,
-                'end_total_credit': end_total_credit
             }
-            if comparison_number:
-                if dynamic_date_num:
-                    data['dynamic_date_num'] = dynamic_date_num
-                for i in range(1, eval(comparison_number) + 1):
-                    data[f'dynamic_total_debit_{i}'] = dynamic_total_debit.get(
-                        f"dynamic_total_debit_{eval(comparison_number) + 1 - i}",
-                        0.0)
-                    data[
-                        f'dynamic_total_credit_{i}'] = dynamic_total_credit.get(
-                        f"dynamic_total_credit_{eval(comparison_number) + 1 - i}",
-                        0.0)
+            sum_debit = initial_total_debit + total_debit
+            sum_credit = initial_total_credit + total_credit
+            for i in range(1, comparison_number + 1):
+                # Oldest period first, as displayed by the client
+                compared = period_balances[comparison_number + 1 - i].get(
+                    account_id.id, empty)
+                data[f'dynamic_total_debit_{i}'] = round(compared['debit'], 2)
+                data[f'dynamic_total_credit_{i}'] = round(
+                    compared['credit'], 2)
+                sum_debit += data[f'dynamic_total_debit_{i}']
+                sum_credit += data[f'dynamic_total_credit_{i}']
+            diff_credit_debit = sum_debit - sum_credit
+            if diff_credit_debit > 0:
+                data['end_total_debit'] = diff_credit_debit
+                data['end_total_credit'] = 0.0
+            else:
+                data['end_total_debit'] = 0.0
+                data['end_total_credit'] = abs(diff_credit_debit)
             move_line_list.append(data)
         return move_line_list
 
+    @api.model
+    def _get_period_label(self, date, comparison_type):
+        """
+        Return the column label of a comparison period.
+
+        :param date date: Start date of the period.
+        :param str comparison_type: 'month' or 'quarter'.
+        :return: Label such as 'Jan 2024' or 'Q 1 2024'.
+        :rtype: str
+        """
+        if comparison_type == 'quarter':
+            return 'Q' + ' ' + str(get_quarter_number(date)) + ' ' + str(
+                date.year)
+        return self.get_month_name(date) + ' ' + str(date.year)
+
     @api.model
     def get_month_name(self, date):
         """
@@ -328,6 +234,7 @@ class AccountTrialBalance(models.TransientModel):
         return month_names[date.month]
 
     @api.model
+    @instrument_report
     def get_xlsx_report(self, data, response, report_name, report_action):
         """
         Generate an XLSX report based on provided data and response stream.
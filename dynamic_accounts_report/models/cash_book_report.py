@@ -21,11 +21,11 @@
 ################################################################################
 import io
 import json
-from dateutil.relativedelta import relativedelta
 import xlsxwriter
-from datetime import datetime
-from odoo.tools import date_utils
-from odoo import api, fields, models
+from odoo import api, models
+from odoo.addons.base_accounting_kit.models.report_instrumentation import \
+    instrument_report
+from .dynamic_report_cache import report_cache
 
 
 class CashBookReport(models.TransientModel):
@@ -34,6 +34,8 @@ class CashBookReport(models.TransientModel):
     _description = 'Account Cash Book Report'
 
     @api.model
+    @instrument_report
+    @report_cache()
     def view_report(self):
         """
         Retrieves and formats data for the cash book report.
@@ -81,6 +83,8 @@ class CashBookReport(models.TransientModel):
         return data
 
     @api.model
+    @instrument_report
+    @report_cache(date_arg=1, options_arg=3)
     def get_filter_values(self, partner_id, data_range, account_list, options):
         """
         Retrieves and formats filtered data for the cash book report based on
@@ -117,10 +121,6 @@ class CashBookReport(models.TransientModel):
         """
         data = {}
         move_lines_total = {}
-        today = fields.Date.today()
-        quarter_start, quarter_end = date_utils.get_quarter(today)
-        previous_quarter_start = quarter_start - relativedelta(months=3)
-        previous_quarter_end = quarter_start - relativedelta(days=1)
         journals = self.env['account.journal'].search([('type', '=', 'cash')])
         option_domain = ['posted']
         if options is not None:
@@ -135,55 +135,9 @@ class CashBookReport(models.TransientModel):
                       ('journal_id', 'in', journals.ids), ]
         if account_list:
             domain += ('account_id', 'in', account_list),
-        if data_range:
-            if data_range == 'month':
-                account_move_lines = self.env['account.move.line'].search(
-                    domain).filtered(
-                    lambda x: x.date.month == fields.Date.today().month)
-            elif data_range == 'year':
-                account_move_lines = self.env['account.move.line'].search(
-                    domain).filtered(
-                    lambda x: x.date.year == fields.Date.today().year)
-            elif data_range == 'quarter':
-                domain += ('date', '>=', quarter_start), (
-                    'date', '<=', quarter_end)
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
-            elif data_range == 'last-month':
-                account_move_lines = self.env['account.move.line'].search(
-                    domain).filtered(
-                    lambda x: x.date.month == fields.Date.today().month - 1)
-            elif data_range == 'last-year':
-                account_move_lines = self.env['account.move.line'].search(
-                    domain).filtered(
-                    lambda x: x.date.year == fields.Date.today().year - 1)
-            elif data_range == 'last-quarter':
-                domain += ('date', '>=', previous_quarter_start), (
-                    'date', '<=', previous_quarter_end)
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
-            elif 'start_date' in data_range and 'end_date' in data_range:
-                start_date = datetime.strptime(data_range['start_date'],
-                                               '%Y-%m-%d').date()
-                end_date = datetime.strptime(data_range['end_date'],
-                                             '%Y-%m-%d').date()
-                domain += ('date', '>=', start_date), ('date', '<=', end_date),
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
-            elif 'start_date' in data_range:
-                start_date = datetime.strptime(data_range['start_date'],
-                                               '%Y-%m-%d').date()
-                domain.append(('date', '>=', start_date))
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
-            elif 'end_date' in data_range:
-                end_date = datetime.strptime(data_range['end_date'],
-                                             '%Y-%m-%d').date()
-                domain.append(('date', '<=', end_date))
-                account_move_lines = self.env['account.move.line'].search(
-                    domain)
-        else:
-            account_move_lines = self.env['account.move.line'].search(domain)
+        domain += self.env['dynamic.report.engine']._get_date_range_domain(
+            data_range)
+        account_move_lines = self.env['account.move.line'].search(domain)
         accounts = account_move_lines.mapped('account_id').read(
             ['display_name'])
         for account in accounts:
@@ -202,6 +156,7 @@ class CashBookReport(models.TransientModel):
         return data
 
     @api.model
+    @instrument_report
     def get_xlsx_report(self, data, response, report_name, report_action):
         """
         Generate an Excel report based on the provided data.
@@ -27,6 +27,22 @@ from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
 from odoo.tools.date_utils import get_month, get_fiscal_year, get_quarter, \
     subtract
+from odoo.addons.base_accounting_kit.models.report_instrumentation import \
+    instrument_report
+
+ACCOUNT_TYPES = [
+    'income', 'income_other', 'expense', 'expense_depreciation',
+    'expense_direct_cost', 'asset_receivable', 'asset_cash', 'asset_current',
+    'asset_non_current', 'asset_prepayments', 'asset_fixed',
+    'liability_payable', 'liability_credit_card', 'liability_current',
+    'liability_non_current', 'equity', 'equity_unaffected',
+]
+CREDIT_ACCOUNT_TYPES = [
+    'income', 'income_other', 'liability_payable', 'liability_current',
+    'liability_non_current', 'equity', 'equity_unaffected',
+]
+FILTER_FIELDS = ['company_id', 'journal_ids', 'account_ids', 'analytic_ids',
+                 'target_move', 'date_from', 'date_to']
 
 
 class ProfitLossReport(models.TransientModel):
@@ -63,259 +79,226 @@ class ProfitLossReport(models.TransientModel):
         return super(ProfitLossReport, self).create({})
 
     @api.model
+    @instrument_report
     def view_report(self, option, comparison, comparison_type):
-        datas = []
-        account_types = {
-            'income': 'income',
-            'income_other': 'income_other',
-            'expense': 'expense',
-            'expense_depreciation': 'expense_depreciation',
-            'expense_direct_cost': 'expense_direct_cost',
-            'asset_receivable': 'asset_receivable',
-            'asset_cash': 'asset_cash',
-            'asset_current': 'asset_current',
-            'asset_non_current': 'asset_non_current',
-            'asset_prepayments': 'asset_prepayments',
-            'asset_fixed': 'asset_fixed',
-            'liability_payable': 'liability_payable',
-            'liability_credit_card': 'liability_credit_card',
-            'liability_current': 'liability_current',
-            'liability_non_current': 'liability_non_current',
-            'equity': 'equity',
-            'equity_unaffected': 'equity_unaffected',
-        }
+        """
+        Compute the Profit and Loss / Balance Sheet figures.
+
+        The figures of every requested period come from a single grouped
+        query through ``dynamic.report.engine`` and are pivoted into one
+        data dictionary per period; amounts are summed as numbers and only
+        formatted once the report data is complete.
+
+        :param option: Id of the report wizard holding the filters.
+        :param comparison: Number of previous periods to compare with.
+        :param comparison_type: 'month' or 'year'.
+        :return: Data of the last computed period, the filter data and the
+            list of data for every period.
+        :rtype: tuple
+        """
         financial_report_id = self.browse(option)
+        filters = financial_report_id.read(FILTER_FIELDS)[0]
+        del filters['id']
+        date_to = not comparison and (
+            financial_report_id.date_to
+            or f'{fields.Date.today().year}-12-31')
+        return self.env['dynamic.report.cache']._get_result(
+            self._name, 'view_report', [filters, comparison, comparison_type],
+            lambda: self._get_report_data(financial_report_id, comparison,
+                                          comparison_type),
+            date_to=date_to,
+            include_draft=financial_report_id.target_move == 'draft')
+
+    def _get_report_data(self, financial_report_id, comparison,
+                         comparison_type):
+        """
+        Compute the figures of ``view_report``, bypassing the result cache.
+
+        :return: See ``view_report``.
+        :rtype: tuple
+        """
+        datas = []
         current_year = fields.Date.today().year
-        current_date = fields.Date.today()
         if financial_report_id.target_move == 'draft':
             target_move = ['posted', 'draft']
         else:
             target_move = ['posted']
+        accounts_by_type = self._get_accounts_by_type()
+        domain = self._get_report_domain(financial_report_id, target_move)
+        engine = self.env['dynamic.report.engine']
         if comparison:
-            for count in range(0, int(comparison) + 1):
-                if comparison_type == "month":
-                    account_move_lines = self.env['account.move.line'].search(
-                        [(
-                            'parent_state', 'in', target_move),
-                            ('date', '>=', (current_date - datetime.timedelta(
-                                days=30 * count)).strftime('%Y-%m-01')),
-                            ('date', '<=', (current_date - datetime.timedelta(
-                                days=30 * count)).strftime('%Y-%m-12'))])
-                elif comparison_type == "year":
-                    account_move_lines = self.env['account.move.line'].search(
-                        [(
-                            'parent_state', 'in', target_move),
-                            ('date', '>=', f'{current_year - count}-01-01'),
-                            ('date', '<=', f'{current_year - count}-12-31')])
-                lists = [{'id': rec.id, 'value': [eval(i) for i in
-                                                  rec.analytic_distribution.keys()]}
-                         for rec in account_move_lines if
-                         rec.analytic_distribution]
-                if financial_report_id.analytic_ids:
-                    account_move_lines = account_move_lines.filtered(lambda
-                                                                         rec: rec.id in [
-                        lst['id'] for lst in lists if lst['value'] and any(
-                            i in financial_report_id.analytic_ids.mapped('id')
-                            for i in lst['value'])])
-                account_move_lines = account_move_lines.filtered(lambda
-                                                                     a: not financial_report_id.journal_ids or a.journal_id in financial_report_id.journal_ids)
-                account_move_lines = account_move_lines.filtered(lambda
-                                                                     a: not financial_report_id.account_ids or a.account_id in financial_report_id.account_ids)
-                account_move_lines = account_move_lines.filtered(lambda
-                                                                     a: not financial_report_id.date_from or a.date >= financial_report_id.date_from)
-                account_move_lines = account_move_lines.filtered(lambda
-                                                                     a: not financial_report_id.date_to or a.date <= financial_report_id.date_to)
-                account_entries = {}
-                for account_type in account_types.values():
-                    account_entries[account_type] = self._get_entries(
-                        account_move_lines, self.env['account.account'].search(
-                            [('account_type', '=', account_type)]),
-                        account_type)
-                total_income = sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['income', 'income_other'] for entry in
-                    account_entries[account_type][0]) - sum(
-                    float(entry['amount'].replace(',', '')) for entry in
-                    account_entries['expense_direct_cost'][0])
-                total_expense = sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['expense', 'expense_depreciation'] for entry in
-                    account_entries[account_type][0])
-                total_current_asset = sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['asset_receivable', 'asset_current', 'asset_cash',
-                     'asset_prepayments'] for entry in
-                    account_entries[account_type][0])
-                total_assets = total_current_asset + sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['asset_fixed', 'asset_non_current'] for entry in
-                    account_entries[account_type][0])
-                total_current_liability = sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['liability_current', 'liability_payable'] for entry in
-                    account_entries[account_type][0])
-                total_liability = total_current_liability + sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['liability_non_current'] for entry in
-                    account_entries[account_type][0])
-                total_unallocated_earning = (
-                                                    total_income - total_expense) + sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['equity_unaffected'] for entry in
-                    account_entries[account_type][0])
-                total_equity = total_unallocated_earning + sum(
-                    float(entry['amount'].replace(',', '')) for account_type
-                    in
-                    ['equity'] for entry in
-                    account_entries[account_type][0])
-                total = total_liability + total_equity
-                data = {
-                    'total': total_income - total_expense,
-                    'total_expense': "{:,.2f}".format(total_expense),
-                    'total_income': "{:,.2f}".format(total_income),
-                    'total_current_asset': "{:,.2f}".format(
-                        total_current_asset),
-                    'total_assets': "{:,.2f}".format(total_assets),
-                    'total_current_liability': "{:,.2f}".format(
-                        total_current_liability),
-                    'total_liability': "{:,.2f}".format(total_liability),
-                    'total_earnings': "{:,.2f}".format(
-                        total_income - total_expense),
-                    'total_unallocated_earning': "{:,.2f}".format(
-                        total_unallocated_earning),
-                    'total_equity': "{:,.2f}".format(total_equity),
-                    'total_balance': "{:,.2f}".format(total),
-                    **account_entries}
-                datas.append(data)
+            periods = self._get_comparison_periods(int(comparison),
+                                                   comparison_type)
+            period_balances = engine._get_account_balances_by_period(
+                domain, periods)
         else:
-            current_year = fields.Date.today().year
             date_from = financial_report_id.date_from or f'{current_year}-01-01'
             date_to = financial_report_id.date_to or f'{current_year}-12-31'
-            account_move_lines = self.env['account.move.line'].search(
-                [('parent_state', 'in', target_move),
-                 ('date', '>=', date_from),
-                 ('date', '<=', date_to)])
-            lists = [{'id': rec.id,
-                      'value': [eval(i) for i in
-                                rec.analytic_distribution.keys()]}
-                     for rec in account_move_lines if
-                     rec.analytic_distribution]
-            if financial_report_id.analytic_ids:
-                account_move_lines = account_move_lines.filtered(
-                    lambda rec: rec.id in [lst['id'] for lst in lists if
-                                           lst['value'] and any(
-                                               i in financial_report_id.analytic_ids.mapped(
-                                                   'id') for i in
-                                               lst['value'])])
-            account_move_lines = account_move_lines.filtered(lambda
-                                                                 a: not financial_report_id.journal_ids or a.journal_id in financial_report_id.journal_ids)
-            account_move_lines = account_move_lines.filtered(lambda
-                                                                 a: not financial_report_id.account_ids or a.account_id in financial_report_id.account_ids)
-            account_move_lines = account_move_lines.filtered(lambda
-                                                                 a: not financial_report_id.date_from or a.date >= financial_report_id.date_from)
-            account_move_lines = account_move_lines.filtered(lambda
-                                                                 a: not financial_report_id.date_to or a.date <= financial_report_id.date_to)
-            account_entries = {}
-            for account_type in account_types.values():
-                account_entries[account_type] = self._get_entries(
-                    account_move_lines, self.env['account.account'].search(
-                        [('account_type', '=', account_type)]), account_type)
-            total_income = sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['income', 'income_other'] for entry in
-                account_entries[account_type][0]) - sum(
-                float(entry['amount'].replace(',', '')) for entry in
-                account_entries['expense_direct_cost'][0])
-            total_expense = sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['expense', 'expense_depreciation'] for entry in
-                account_entries[account_type][0])
-            total_current_asset = sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['asset_receivable', 'asset_current', 'asset_cash',
-                 'asset_prepayments'] for entry in
-                account_entries[account_type][0])
-            total_assets = total_current_asset + sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['asset_fixed', 'asset_non_current'] for entry in
-                account_entries[account_type][0])
-            total_current_liability = sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['liability_current', 'liability_payable'] for entry in
-                account_entries[account_type][0])
-            total_liability = total_current_liability + sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['liability_non_current'] for entry in
-                account_entries[account_type][0])
-            total_unallocated_earning = (total_income - total_expense) + sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['equity_unaffected'] for entry in
-                account_entries[account_type][0])
-            total_equity = total_unallocated_earning + sum(
-                float(entry['amount'].replace(',', '')) for account_type in
-                ['equity'] for entry in account_entries[account_type][0])
-            total = total_liability + total_equity
-            data = {
-                'total': total_income - total_expense,
-                'total_expense': "{:,.2f}".format(total_expense),
-                'total_income': "{:,.2f}".format(total_income),
-                'total_current_asset': "{:,.2f}".format(total_current_asset),
-                'total_assets': "{:,.2f}".format(total_assets),
-                'total_current_liability': "{:,.2f}".format(
-                    total_current_liability),
-                'total_liability': "{:,.2f}".format(total_liability),
-                'total_earnings': "{:,.2f}".format(
-                    total_income - total_expense),
-                'total_unallocated_earning': "{:,.2f}".format(
-                    total_unallocated_earning),
-                'total_equity': "{:,.2f}".format(total_equity),
-                'total_balance': "{:,.2f}".format(total),
-                **account_entries}
+            period_balances = [engine._get_account_balances(
+                domain + [('date', '>=', date_from), ('date', '<=', date_to)])]
+        for balances in period_balances:
+            data = self._get_period_data(balances, accounts_by_type)
             datas.append(data)
         filters = self._get_filter_data()
         return data, filters, datas
 
-    def _get_entries(self, account_move_lines, account_ids, account_type):
+    def _get_accounts_by_type(self):
+        """
+        Fetch the accounts of every reported account type in one search.
+
+        :return: A dictionary mapping each account type to its accounts.
+        :rtype: dict
+        """
+        accounts = self.env['account.account'].search(
+            [('account_type', 'in', ACCOUNT_TYPES)])
+        return {
+            account_type: accounts.filtered(
+                lambda account: account.account_type == account_type)
+            for account_type in ACCOUNT_TYPES
+        }
+
+    @api.model
+    def _get_comparison_periods(self, comparison, comparison_type):
+        """
+        Return the current period followed by the compared ones.
+
+        :param comparison: Number of previous periods to compare with.
+        :param comparison_type: 'month' or 'year'.
+        :return: List of ``(date_from, date_to)`` tuples, most recent first.
+        :rtype: list
+        """
+        today = fields.Date.today()
+        periods = []
+        for count in range(0, comparison + 1):
+            if comparison_type == 'month':
+                periods.append(get_month(subtract(today, months=count)))
+            else:
+                year = today.year - count
+                periods.append((datetime.date(year, 1, 1),
+                                datetime.date(year, 12, 31)))
+        return periods
+
+    def _get_report_domain(self, financial_report_id, target_move):
+        """
+        Build the journal item domain of the wizard filters.
+
+        The journals, accounts, analytic accounts and the wizard date range
+        are all applied in SQL; period bounds are added by the caller.
+
+        :param financial_report_id: The report wizard holding the filters.
+        :param target_move: List of move states to include.
+        :return: A domain on ``account.move.line``.
+        :rtype: list
+        """
+        return self.env['dynamic.report.engine']._get_move_line_domain(
+            date_from=financial_report_id.date_from,
+            date_to=financial_report_id.date_to, target_move=target_move,
+            journal_ids=financial_report_id.journal_ids.ids,
+            account_ids=financial_report_id.account_ids.ids,
+            analytic_ids=financial_report_id.analytic_ids.ids)
+
+    @api.model
+    def _get_period_data(self, balances, accounts_by_type):
+        """
+        Compute the report data of one period from its account balances.
+
+        :param balances: Per account sums of the period.
+        :param accounts_by_type: Accounts grouped by account type.
+        :return: The formatted report data of the period.
+        :rtype: dict
+        """
+        account_entries = {
+            account_type: self._get_entries(balances, accounts, account_type)
+            for account_type, accounts in accounts_by_type.items()
+        }
+        return self._format_period_data(
+            self._get_period_totals(account_entries), account_entries)
+
+    @api.model
+    def _get_period_totals(self, account_entries):
+        """
+        Compute the report totals from the per account type entries.
+
+        :param account_entries: Mapping of account type to the
+            ``(entries, total)`` tuple returned by ``_get_entries``.
+        :return: A dictionary of the numeric report totals.
+        :rtype: dict
+        """
+        def type_total(*account_types):
+            return sum(account_entries[account_type][1]
+                       for account_type in account_types)
+
+        total_income = type_total('income', 'income_other') - type_total(
+            'expense_direct_cost')
+        total_expense = type_total('expense', 'expense_depreciation')
+        total_current_asset = type_total(
+            'asset_receivable', 'asset_current', 'asset_cash',
+            'asset_prepayments')
+        total_assets = total_current_asset + type_total(
+            'asset_fixed', 'asset_non_current')
+        total_current_liability = type_total(
+            'liability_current', 'liability_payable')
+        total_liability = total_current_liability + type_total(
+            'liability_non_current')
+        total_unallocated_earning = (total_income - total_expense) + \
+            type_total('equity_unaffected')
+        total_equity = total_unallocated_earning + type_total('equity')
+        return {
+            'total_expense': total_expense,
+            'total_income': total_income,
+            'total_current_asset': total_current_asset,
+            'total_assets': total_assets,
+            'total_current_liability': total_current_liability,
+            'total_liability': total_liability,
+            'total_earnings': total_income - total_expense,
+            'total_unallocated_earning': total_unallocated_earning,
+            'total_equity': total_equity,
+            'total_balance': total_liability + total_equity,
+        }
+
+    @api.model
+    def _format_period_data(self, totals, account_entries):
+        """
+        Format the numeric totals and entries of a period for display.
+
+        :param totals: The numeric totals from ``_get_period_totals``.
+        :param account_entries: The numeric entries per account type.
+        :return: The report data as expected by the client templates.
+        :rtype: dict
+        """
+        def format_amount(value):
+            # ``or 0.0`` turns a negated zero into 0.0, not '-0.00'
+            return "{:,.2f}".format(value or 0.0)
+
+        data = {'total': totals['total_earnings']}
+        for key, value in totals.items():
+            data[key] = format_amount(value)
+        for account_type, (entries, total) in account_entries.items():
+            data[account_type] = ([
+                dict(entry, amount=format_amount(entry['amount']))
+                for entry in entries], format_amount(total))
+        return data
+
+    def _get_entries(self, balances, account_ids, account_type):
         """
             Get the entries for the specified account type.
-            :param account_move_lines: The account move lines to filter.
-            :param account_ids: The account IDs to filter.
+            :param balances: Per account sums from
+                ``dynamic.report.engine._get_account_balances``.
+            :param account_ids: The accounts of the account type.
             :param account_type: The account type.
             :return: A tuple containing the entries and the total amount.
             """
         entries = []
-        total = 0
+        total = 0.0
+        sign = -1 if account_type in CREDIT_ACCOUNT_TYPES else 1
         for account in account_ids:
-            filtered_lines = account_move_lines.filtered(
-                lambda line: line.account_id == account)
-            if filtered_lines:
-                if account_type in ['income', 'income_other',
-                                    'liability_payable', 'liability_current',
-                                    'liability_non_current', 'equity',
-                                    'equity_unaffected']:
-                    amount = -(sum(filtered_lines.mapped('debit')) - sum(
-                        filtered_lines.mapped('credit')))
-                else:
-                    amount = sum(filtered_lines.mapped('debit')) - sum(
-                        filtered_lines.mapped('credit'))
-                entries.append({
-                    'name': "{} - {}".format(account.code, account.name),
-                    'amount': "{:,.2f}".format(amount),
-                })
-                total += amount
-            else:
-                entries.append({
-                    'name': "{} - {}".format(account.code, account.name),
-                    'amount': "{:,.2f}".format(0),
-                })
-        return entries, "{:,.2f}".format(total)
+            amount = sign * balances.get(account.id, {}).get('balance', 0.0)
+            entries.append({
+                'name': "{} - {}".format(account.code, account.name),
+                'amount': amount,
+            })
+            total += amount
+        return entries, total
 
     def filter(self, vals):
         """
@@ -451,6 +434,7 @@ class ProfitLossReport(models.TransientModel):
         return last_year_date_list
 
     @api.model
+    @instrument_report
     def get_xlsx_report(self, data, response, report_name, report_action):
         """Generate and return an XLSX report based on the provided data.
             :param data: The report data in JSON format.
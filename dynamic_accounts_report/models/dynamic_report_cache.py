@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Bhagyadev KP (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+import functools
+import hashlib
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from psycopg2 import IntegrityError
+
+from odoo import api, fields, models
+from odoo.tools import SQL, json_default
+from odoo.tools.date_utils import get_fiscal_year
+
+DEFAULT_CACHE_SIZE = 200
+DEFAULT_RESULT_SIZE = 1024 * 1024
+LAST_USED_RESOLUTION = timedelta(minutes=10)
+DATE_PRESETS = ('month', 'quarter', 'year', 'last-month', 'last-quarter',
+                'last-year')
+
+
+def report_cache(account_types=None, date_arg=None, options_arg=None,
+                 comparison_arg=None):
+    """
+    Decorate a report method so its result is served from
+    ``dynamic.report.cache`` when the same filters are requested again.
+
+    :param account_types: Account types the report reads, or None when it
+        may read any account; entries are only invalidated by journal items
+        of those types.
+    :param date_arg: Index of the positional argument holding the end date
+        or the date range option of the report; entries are only
+        invalidated by journal items dated on or before it.
+    :param options_arg: Index of the positional argument holding the
+        options of the report; entries whose options include 'draft' are
+        also invalidated by draft journal items.
+    :param comparison_arg: Index of the positional argument holding the
+        comparison type of the report; a 'year' comparison reads up to the
+        end of the fiscal year of the end date, which becomes the last date
+        of the entry.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = self.env['dynamic.report.cache']
+            date_to = False
+            if date_arg is not None and len(args) > date_arg:
+                date_to = cache._get_scope_date(args[date_arg])
+                if date_to and comparison_arg is not None \
+                        and len(args) > comparison_arg \
+                        and args[comparison_arg] == 'year':
+                    date_to = get_fiscal_year(date_to)[1]
+            include_draft = bool(
+                options_arg is not None and len(args) > options_arg
+                and args[options_arg] and 'draft' in args[options_arg])
+            return cache._get_result(
+                self._name, method.__name__, [args, kwargs],
+                lambda: method(self, *args, **kwargs), date_to=date_to,
+                account_types=account_types, include_draft=include_draft)
+        return wrapper
+    return decorator
+
+
+class DynamicReportCache(models.Model):
+    """Results of the dynamic reports, keyed by a fingerprint of the report,
+    method, filters, companies and access groups of the user.
+
+    An entry records the scope of journal items it depends on: companies,
+    last date, account types and whether draft entries are included. It is
+    removed as soon as a journal item in that scope is created, modified,
+    removed or reconciled, or when its entry is posted, reset to draft or
+    cancelled. All the entries are removed when an account, journal or
+    analytic account is created, modified or removed. Only the most recently used entries are kept, up to the
+    ``dynamic_accounts_report.report_cache_size`` system parameter, and
+    results larger than ``dynamic_accounts_report.report_cache_result_size``
+    bytes, e.g. a whole ledger printed at once, are not stored."""
+    _name = 'dynamic.report.cache'
+    _description = 'Dynamic Report Result Cache'
+    _order = 'last_used desc'
+
+    fingerprint = fields.Char(string='Fingerprint', required=True,
+                              readonly=True, index=True,
+                              help='Hash of the report, filters and access '
+                                   'context of the result.')
+    report_model = fields.Char(string='Report', required=True, readonly=True,
+                               help='Technical name of the report model.')
+    company_ids = fields.Json(string='Companies', readonly=True,
+                              help='Ids of the companies of the report.')
+    date_to = fields.Date(string='Last Date', readonly=True,
+                          help='Last date of the journal items the result '
+                               'depends on, empty when unbounded.')
+    account_types = fields.Json(string='Account Types', readonly=True,
+                                help='Account types the result depends on, '
+                                     'empty for every account.')
+    include_draft = fields.Boolean(string='Include Draft', readonly=True,
+                                   help='Whether draft entries are part of '
+                                        'the result.')
+    result = fields.Json(string='Result', readonly=True,
+                         help='Result of the report method.')
+    last_used = fields.Datetime(string='Last Used', readonly=True,
+                                default=fields.Datetime.now,
+                                help='Last time the result was served.')
+
+    _sql_constraints = [
+        ('fingerprint_uniq', 'unique(fingerprint)',
+         'A report result is cached only once.'),
+    ]
+
+    @api.model
+    def _get_scope_date(self, value):
+        """
+        Return the last date of an end date or date range option.
+
+        :param value: A date string, a date range preset or a dictionary
+            with an optional 'end_date' key.
+        :return: The last date, or False when unbounded.
+        """
+        if isinstance(value, str) and value not in DATE_PRESETS:
+            return fields.Date.to_date(value) or False
+        return self.env['dynamic.report.engine']._get_date_range(value)[1]
+
+    @api.model
+    def _get_fingerprint(self, report_model, method_name, args):
+        """
+        Hash a report call together with the context its result depends on.
+
+        :return: A hexadecimal digest.
+        :rtype: str
+        """
+        key = json.dumps({
+            'report': report_model,
+            'method': method_name,
+            'args': args,
+            'companies': sorted(self.env.companies.ids),
+            'groups': sorted(self.env.user.groups_id.ids),
+            'lang': self.env.lang,
+            'today': fields.Date.context_today(self),
+        }, sort_keys=True, default=json_default)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @api.model
+    def _get_result(self, report_model, method_name, args, compute,
+                    date_to=False, account_types=None, include_draft=False):
+        """
+        Return the cached result of a report call, computing and storing it
+        when missing.
+
+        The result is returned as it would be serialized to the client, so
+        a cached and a freshly computed result are identical.
+
+        :param compute: Callable computing the result.
+        :return: The result of the report call.
+        """
+        fingerprint = self._get_fingerprint(report_model, method_name, args)
+        cache = self.sudo()
+        entry = cache.search([('fingerprint', '=', fingerprint)], limit=1)
+        if entry:
+            # Refreshed coarsely, so that serving a result seldom writes
+            now = fields.Datetime.now()
+            if entry.last_used < now - LAST_USED_RESOLUTION:
+                entry.last_used = now
+            return entry.result
+        payload = json.dumps(compute(), default=json_default)
+        result = json.loads(payload)
+        max_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'dynamic_accounts_report.report_cache_result_size',
+            DEFAULT_RESULT_SIZE))
+        if len(payload) > max_size:
+            return result
+        try:
+            with self.env.cr.savepoint():
+                cache.create({
+                    'fingerprint': fingerprint,
+                    'report_model': report_model,
+                    'company_ids': self.env.companies.ids,
+                    'date_to': date_to,
+                    'account_types': account_types and list(account_types),
+                    'include_draft': include_draft,
+                    'result': result,
+                })
+        except IntegrityError:
+            # Computed concurrently by another transaction
+            return result
+        cache._gc_entries()
+        return result
+
+    @api.model
+    def _gc_entries(self):
+        """Remove the least recently used entries above the cache size."""
+        size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'dynamic_accounts_report.report_cache_size', DEFAULT_CACHE_SIZE))
+        self.sudo().search([], offset=size).unlink()
+
+    @api.model
+    def _get_line_scopes(self, lines, scopes=None):
+        """
+        Collect the scope of journal items: per company, their first date,
+        their account types and whether any of them is posted.
+
+        :param lines: ``account.move.line`` records.
+        :param scopes: Scopes to extend, e.g. the scopes of the same items
+            before a change.
+        :return: The scopes by company id.
+        :rtype: dict
+        """
+        if scopes is None:
+            scopes = defaultdict(lambda: {'date': None,
+                                          'account_types': set(),
+                                          'posted': False})
+        for line in lines:
+            scope = scopes[line.company_id.id]
+            if line.date and (not scope['date'] or line.date < scope['date']):
+                scope['date'] = line.date
+            scope['account_types'].add(line.account_type)
+            scope['posted'] |= line.parent_state == 'posted'
+        return scopes
+
+    @api.model
+    def _invalidate_scopes(self, scopes):
+        """
+        Remove the entries depending on journal items of the given scopes,
+        selected by one query.
+
+        :param dict scopes: Scopes by company id, see ``_get_line_scopes``.
+        """
+        if not scopes:
+            return
+        conditions = []
+        for company_id, scope in scopes.items():
+            condition = [SQL("company_ids @> %s::jsonb",
+                             json.dumps([company_id]))]
+            if not scope['posted']:
+                condition.append(SQL("include_draft"))
+            if scope['date']:
+                condition.append(SQL("(date_to IS NULL OR date_to >= %s)",
+                                     scope['date']))
+            account_types = [account_type for account_type
+                             in scope['account_types'] if account_type]
+            condition.append(SQL(
+                "(account_types IS NULL OR account_types ?| %s::text[])",
+                account_types))
+            conditions.append(SQL("(%s)", SQL(" AND ").join(condition)))
+        cache = self.sudo()
+        cache.flush_model()
+        self.env.cr.execute(SQL(
+            "SELECT id FROM dynamic_report_cache WHERE %s",
+            SQL(" OR ").join(conditions)))
+        stale_ids = [row[0] for row in self.env.cr.fetchall()]
+        if stale_ids:
+            cache.browse(stale_ids).unlink()
+
+    @api.model
+    def _invalidate_all(self):
+        """Remove all the entries, e.g. when master data shown by the
+        reports, like the names of the accounts, changes."""
+        self.sudo().search([]).unlink()
+
+    @api.model
+    def _invalidate_lines(self, lines):
+        """
+        Remove the entries depending on journal items.
+
+        :param lines: ``account.move.line`` records about to change or that
+            just changed.
+        """
+        if lines:
+            self._invalidate_scopes(self._get_line_scopes(lines))
@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+################################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Bhagyadev KP (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+################################################################################
+from odoo import api, fields, models
+from odoo.osv import expression
+from odoo.tools import SQL, date_utils
+
+AGING_BOUNDARIES = (0, 30, 60, 90, 120)
+AGED_LINE_FIELDS = ['name', 'move_name', 'date', 'amount_currency',
+                    'account_id', 'date_maturity', 'currency_id', 'move_id']
+
+
+class DynamicReportEngine(models.AbstractModel):
+    """Aggregation helpers shared by the dynamic accounting reports.
+
+    The helpers push filtering and summing of journal items down to the
+    database so a report costs a fixed number of grouped queries instead of
+    loading every ``account.move.line`` of the period into Python. Amounts
+    are returned as plain floats; formatting is left to the caller."""
+    _name = 'dynamic.report.engine'
+    _description = 'Dynamic Report Aggregation Engine'
+
+    @api.model
+    def _get_move_line_domain(self, date_from=False, date_to=False,
+                              target_move=('posted',), journal_ids=None,
+                              account_ids=None, analytic_ids=None):
+        """
+        Build the journal item domain matching the common report filters.
+
+        :param date_from: Lower date bound (inclusive), or False.
+        :param date_to: Upper date bound (inclusive), or False.
+        :param target_move: Iterable of move states to include.
+        :param journal_ids: Optional list of journal ids.
+        :param account_ids: Optional list of account ids.
+        :param analytic_ids: Optional list of analytic account ids; a line
+            matches when its analytic distribution uses any of them.
+        :return: A domain on ``account.move.line``.
+        :rtype: list
+        """
+        domain = [('parent_state', 'in', list(target_move))]
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+        if journal_ids:
+            domain.append(('journal_id', 'in', list(journal_ids)))
+        if account_ids:
+            domain.append(('account_id', 'in', list(account_ids)))
+        if analytic_ids:
+            domain.append(('analytic_distribution', 'in', list(analytic_ids)))
+        return domain
+
+    @api.model
+    def _get_date_range(self, date_range):
+        """
+        Resolve a date range option of the report filters to its bounds.
+
+        :param date_range: One of the presets 'month', 'quarter', 'year',
+            'last-month', 'last-quarter' and 'last-year', or a dictionary
+            with optional 'start_date' and 'end_date' keys.
+        :return: ``(date_from, date_to)``, either being False when unbounded.
+        :rtype: tuple
+        """
+        today = fields.Date.today()
+        if not date_range:
+            return False, False
+        if date_range == 'month':
+            return date_utils.get_month(today)
+        if date_range == 'quarter':
+            return date_utils.get_quarter(today)
+        if date_range == 'year':
+            return (date_utils.start_of(today, 'year'),
+                    date_utils.end_of(today, 'year'))
+        if date_range == 'last-month':
+            return date_utils.get_month(date_utils.subtract(today, months=1))
+        if date_range == 'last-quarter':
+            return date_utils.get_quarter(
+                date_utils.subtract(today, months=3))
+        if date_range == 'last-year':
+            last_year = date_utils.subtract(today, years=1)
+            return (date_utils.start_of(last_year, 'year'),
+                    date_utils.end_of(last_year, 'year'))
+        if isinstance(date_range, dict):
+            return (fields.Date.to_date(date_range.get('start_date')) or False,
+                    fields.Date.to_date(date_range.get('end_date')) or False)
+        return False, False
+
+    @api.model
+    def _get_date_range_domain(self, date_range, field_name='date'):
+        """
+        Return the domain terms selecting the dates of a date range option.
+
+        :param date_range: A date range option, see ``_get_date_range``.
+        :param field_name: The date field to filter on.
+        :return: A list of ``>=`` / ``<=`` domain terms.
+        :rtype: list
+        """
+        date_from, date_to = self._get_date_range(date_range)
+        domain = []
+        if date_from:
+            domain.append((field_name, '>=', date_from))
+        if date_to:
+            domain.append((field_name, '<=', date_to))
+        return domain
+
+    @api.model
+    def _get_account_balances(self, domain, model_name='account.move.line'):
+        """
+        Sum debit, credit and balance per account in a single grouped query.
+
+        Access rules of the model are applied through ``_search`` so the
+        result matches what the user may read.
+
+        :param domain: A domain on ``model_name``.
+        :param model_name: ``account.move.line`` or a model with the same
+            ``account_id``, ``debit``, ``credit`` and ``balance`` columns
+            such as ``account.balance.snapshot``.
+        :return: ``{account_id: {'debit': float, 'credit': float,
+            'balance': float}}`` for every account having journal items.
+        :rtype: dict
+        """
+        query = self.env[model_name]._search(domain)
+        table = query.table
+        self.env.cr.execute(SQL(
+            """
+            SELECT %(account)s AS account_id,
+                   COALESCE(SUM(%(debit)s), 0) AS debit,
+                   COALESCE(SUM(%(credit)s), 0) AS credit,
+                   COALESCE(SUM(%(balance)s), 0) AS balance
+              FROM %(from_clause)s
+             WHERE %(where_clause)s
+               AND %(account)s IS NOT NULL
+          GROUP BY %(account)s
+            """,
+            account=SQL.identifier(table, 'account_id'),
+            debit=SQL.identifier(table, 'debit'),
+            credit=SQL.identifier(table, 'credit'),
+            balance=SQL.identifier(table, 'balance'),
+            from_clause=query.from_clause,
+            where_clause=query.where_clause or SQL('TRUE'),
+        ))
+        return {
+            row['account_id']: {
+                'debit': row['debit'],
+                'credit': row['credit'],
+                'balance': row['balance'],
+            } for row in self.env.cr.dictfetchall()
+        }
+
+    @api.model
+    def _get_account_balances_by_period(self, domain, periods):
+        """
+        Sum debit, credit and balance per account for several periods at once.
+
+        Journal items are bucketed with a ``CASE`` on their date and grouped
+        by ``(account, period)`` so comparing twelve periods costs the same
+        single query as one period. Periods are expected not to overlap; a
+        line falling in several periods is counted in the first one.
+
+        :param domain: A domain on ``account.move.line`` without the period
+            bounds, which are added here.
+        :param periods: List of ``(date_from, date_to)`` inclusive bounds.
+        :return: One ``{account_id: {'debit', 'credit', 'balance'}}``
+            dictionary per period, in the order of ``periods``.
+        :rtype: list
+        """
+        periods = [
+            (fields.Date.to_date(date_from), fields.Date.to_date(date_to))
+            for date_from, date_to in periods]
+        result = [{} for _period in periods]
+        if not periods:
+            return result
+        domain = list(domain) + [
+            ('date', '>=', min(date_from for date_from, _date_to in periods)),
+            ('date', '<=', max(date_to for _date_from, date_to in periods)),
+        ]
+        query = self.env['account.move.line']._search(domain)
+        table = query.table
+        date = SQL.identifier(table, 'date')
+        period_key = SQL("CASE %s END", SQL(" ").join(
+            SQL("WHEN %s BETWEEN %s AND %s THEN %s",
+                date, date_from, date_to, index)
+            for index, (date_from, date_to) in enumerate(periods)))
+        self.env.cr.execute(SQL(
+            """
+            SELECT %(account)s AS account_id,
+                   %(period_key)s AS period,
+                   COALESCE(SUM(%(debit)s), 0) AS debit,
+                   COALESCE(SUM(%(credit)s), 0) AS credit,
+                   COALESCE(SUM(%(balance)s), 0) AS balance
+              FROM %(from_clause)s
+             WHERE %(where_clause)s
+               AND %(account)s IS NOT NULL
+          GROUP BY 1, 2
+            """,
+            account=SQL.identifier(table, 'account_id'),
+            period_key=period_key,
+            debit=SQL.identifier(table, 'debit'),
+            credit=SQL.identifier(table, 'credit'),
+            balance=SQL.identifier(table, 'balance'),
+            from_clause=query.from_clause,
+            where_clause=query.where_clause or SQL('TRUE'),
+        ))
+        for row in self.env.cr.dictfetchall():
+            if row['period'] is None:
+                continue
+            result[row['period']][row['account_id']] = {
+                'debit': row['debit'],
+                'credit': row['credit'],
+                'balance': row['balance'],
+            }
+        return result
+
+    @api.model
+    def _get_tax_base_amounts(self, domain, periods):
+        """
+        Sum the base amounts of the taxed journal items in a single query.
+
+        Journal items are joined to their taxes through
+        ``account_move_line_account_tax_rel`` and to the periods through a
+        ``VALUES`` list, then grouped by ``(tax, account, period)``. Unlike
+        ``_get_account_balances_by_period``, a line falling in overlapping
+        periods is counted in each of them.
+
+        :param domain: A domain on ``account.move.line`` without the period
+            bounds, which are added here.
+        :param periods: List of ``(date_from, date_to)`` inclusive bounds.
+        :return: ``{(tax_id, account_id, period_index): amount}`` where the
+            amount is the sum of the debit and credit of the lines.
+        :rtype: dict
+        """
+        periods = [
+            (fields.Date.to_date(date_from), fields.Date.to_date(date_to))
+            for date_from, date_to in periods]
+        if not periods:
+            return {}
+        domain = list(domain) + [
+            ('date', '>=', min(date_from for date_from, _date_to in periods)),
+            ('date', '<=', max(date_to for _date_from, date_to in periods)),
+        ]
+        query = self.env['account.move.line']._search(domain)
+        table = query.table
+        self.env.cr.execute(SQL(
+            """
+            SELECT tax_rel.account_tax_id AS tax_id,
+                   %(account)s AS account_id,
+                   period.period_index AS period,
+                   COALESCE(SUM(%(debit)s + %(credit)s), 0) AS amount
+              FROM %(from_clause)s
+              JOIN account_move_line_account_tax_rel tax_rel
+                ON tax_rel.account_move_line_id = %(id)s
+              JOIN (VALUES %(periods)s) AS period(period_index, date_from, date_to)
+                ON %(date)s BETWEEN period.date_from AND period.date_to
+             WHERE %(where_clause)s
+          GROUP BY 1, 2, 3
+            """,
+            account=SQL.identifier(table, 'account_id'),
+            debit=SQL.identifier(table, 'debit'),
+            credit=SQL.identifier(table, 'credit'),
+            id=SQL.identifier(table, 'id'),
+            date=SQL.identifier(table, 'date'),
+            periods=SQL(", ").join(
+                SQL("(%s, %s::date, %s::date)", index, date_from, date_to)
+                for index, (date_from, date_to) in enumerate(periods)),
+            from_clause=query.from_clause,
+            where_clause=query.where_clause or SQL('TRUE'),
+        ))
+        return {
+            (row['tax_id'], row['account_id'], row['period']): row['amount']
+            for row in self.env.cr.dictfetchall()
+        }
+
+    @api.model
+    def _get_aged_amounts(self, domain, amount_field, as_of_date=False,
+                          boundaries=AGING_BOUNDARIES):
+        """
+        Bucket journal items by age in a single query.
+
+        The age of a line is the number of days between ``as_of_date`` and
+        its maturity date (lines without one are not due). Bucket ``0``
+        holds the lines aged ``boundaries[0]`` days or less, bucket ``i``
+        the ones aged up to ``boundaries[i]`` days and the last bucket every
+        older line. Per-partner sums are computed by window functions of
+        the same statement.
+
+        :param domain: A domain on ``account.move.line``; only lines dated
+            on or before ``as_of_date`` are kept.
+        :param amount_field: Column summed in the buckets, e.g. ``debit``.
+        :param as_of_date: Date the ages are computed at, today by default.
+        :param boundaries: Increasing upper bounds, in days, of every bucket
+            but the last one.
+        :return: One dictionary per line, ordered by partner, with the keys
+            ``id``, ``partner_id``, ``amount``, ``period`` (the bucket index),
+            ``partner_amount`` and ``partner_periods`` (a list of the
+            partner's sums per bucket).
+        :rtype: list
+        """
+        as_of_date = (fields.Date.to_date(as_of_date)
+                      or fields.Date.context_today(self))
+        query = self.env['account.move.line']._search(expression.AND([
+            domain, [('date', '<=', as_of_date)]]))
+        table = query.table
+        age = SQL("%s - COALESCE(%s, %s)", as_of_date,
+                  SQL.identifier(table, 'date_maturity'), as_of_date)
+        period = SQL("CASE %s ELSE %s END", SQL(" ").join(
+            SQL("WHEN %s <= %s THEN %s", age, boundary, index)
+            for index, boundary in enumerate(boundaries)), len(boundaries))
+        period_sums = SQL(", ").join(
+            SQL("COALESCE(SUM(amount) FILTER (WHERE period = %s) OVER "
+                "partner, 0) AS %s", index, SQL.identifier(f'period_{index}'))
+            for index in range(len(boundaries) + 1))
+        self.env.cr.execute(SQL(
+            """
+            WITH aged AS (
+                SELECT %(id)s AS id,
+                       %(partner)s AS partner_id,
+                       %(date)s AS date,
+                       %(period)s AS period,
+                       COALESCE(%(amount)s, 0) AS amount
+                  FROM %(from_clause)s
+                 WHERE %(where_clause)s
+            )
+            SELECT id, partner_id, period, amount,
+                   SUM(amount) OVER partner AS partner_amount,
+                   %(period_sums)s
+              FROM aged
+            WINDOW partner AS (PARTITION BY partner_id)
+          ORDER BY partner_id, date, id
+            """,
+            id=SQL.identifier(table, 'id'),
+            partner=SQL.identifier(table, 'partner_id'),
+            date=SQL.identifier(table, 'date'),
+            period=period,
+            amount=SQL.identifier(table, amount_field),
+            period_sums=period_sums,
+            from_clause=query.from_clause,
+            where_clause=query.where_clause or SQL('TRUE'),
+        ))
+        result = []
+        for row in self.env.cr.dictfetchall():
+            result.append({
+                'id': row['id'],
+                'partner_id': row['partner_id'],
+                'amount': row['amount'],
+                'period': row['period'],
+                'partner_amount': row['partner_amount'],
+                'partner_periods': [
+                    row[f'period_{index}']
+                    for index in range(len(boundaries) + 1)],
+            })
+        return result
+
+    @api.model
+    def _get_aged_data(self, account_type, amount_field, as_of_date=False,
+                       partner_ids=None, boundaries=AGING_BOUNDARIES):
+        """
+        Age the open lines of an account type of the partners in a single
+        query, as shown by the aged receivable and payable reports.
+
+        :param account_type: Account type of the lines, e.g.
+            ``asset_receivable``.
+        :param amount_field: Column aged, ``debit`` or ``credit``.
+        :param as_of_date: Date the lines are aged at, today by default.
+        :param partner_ids: Optional list of partner ids to restrict to.
+        :param boundaries: Upper bounds in days of the age buckets but the
+            last, see ``_get_aged_amounts``.
+        :return: The move lines of every partner name, each with its raw
+            ``diff<bucket>`` amounts, and their ``diff<bucket>_sum`` and
+            ``<amount_field>_sum`` totals under the 'partner_totals' key.
+        :rtype: dict
+        """
+        domain = [('parent_state', '=', 'posted'),
+                  ('account_type', '=', account_type),
+                  ('reconciled', '=', False),
+                  ('partner_id', '!=', False)]
+        if partner_ids:
+            domain.append(('partner_id', 'in', partner_ids))
+        aged_lines = self._get_aged_amounts(
+            domain, amount_field, as_of_date, boundaries)
+        move_lines = self.env['account.move.line'].browse(
+            [aged_line['id'] for aged_line in aged_lines])
+        line_data = {line['id']: line for line in move_lines.read(
+            AGED_LINE_FIELDS + [amount_field])}
+        partners = self.env['res.partner'].browse(
+            partner_ids or dict.fromkeys(
+                aged_line['partner_id'] for aged_line in aged_lines))
+        partner_names = {partner.id: partner.name for partner in partners}
+        currency_id = self.env.company.currency_id.symbol
+        move_line_list = {partner.name: [] for partner in partners}
+        partner_total = {
+            partner.name: dict(
+                {f'diff{index}_sum': 0.0
+                 for index in range(len(boundaries) + 1)},
+                **{f'{amount_field}_sum': 0.0},
+                currency_id=currency_id, partner_id=partner.id)
+            for partner in partners
+        }
+        for aged_line in aged_lines:
+            partner_name = partner_names[aged_line['partner_id']]
+            val = line_data[aged_line['id']]
+            for index in range(len(boundaries) + 1):
+                val[f'diff{index}'] = (aged_line['amount']
+                                       if aged_line['period'] == index
+                                       else 0.0)
+            move_line_list[partner_name].append(val)
+            totals = partner_total[partner_name]
+            totals[f'{amount_field}_sum'] = aged_line['partner_amount']
+            for index, amount in enumerate(aged_line['partner_periods']):
+                totals[f'diff{index}_sum'] = amount
+        move_line_list['partner_totals'] = partner_total
+        return move_line_list
+
+    @api.model
+    def _get_opening_balances(self, domain, date):
+        """
+        Sum debit, credit and balance per account before a date.
+
+        Closed months are read from ``account.balance.snapshot`` and only
+        the journal items dated after the last snapshot are scanned, so the
+        cost no longer grows with the age of the ledger. Companies without
+        snapshots fall back to scanning their journal items.
+
+        :param domain: A domain on ``account.move.line`` restricted to fields
+            also stored on the snapshots: ``company_id``, ``account_id``,
+            ``journal_id``, ``partner_id``, ``analytic_distribution`` and
+            ``parent_state``.
+        :param date: Opening date; items dated on that day are excluded.
+        :return: ``{account_id: {'debit', 'credit', 'balance'}}``.
+        :rtype: dict
+        """
+        date = fields.Date.to_date(date)
+        month_start = date.replace(day=1)
+        snapshot_domains = []
+        line_domains = []
+        for company in self.env.companies:
+            closed_date = company.account_balance_snapshot_date
+            if closed_date:
+                closed_date = min(closed_date, month_start)
+                snapshot_domains.append([('company_id', '=', company.id),
+                                         ('date', '<', closed_date)])
+                line_domains.append([('company_id', '=', company.id),
+                                     ('date', '>=', closed_date),
+                                     ('date', '<', date)])
+            else:
+                line_domains.append([('company_id', '=', company.id),
+                                     ('date', '<', date)])
+        balances = self._get_account_balances(
+            expression.AND([domain, expression.OR(line_domains)]))
+        if snapshot_domains:
+            snapshot_balances = self._get_account_balances(
+                expression.AND([domain, expression.OR(snapshot_domains)]),
+                model_name='account.balance.snapshot')
+            for account_id, values in snapshot_balances.items():
+                account_balance = balances.setdefault(
+                    account_id, dict.fromkeys(values, 0.0))
+                for key, value in values.items():
+                    account_balance[key] += value
+        return balances
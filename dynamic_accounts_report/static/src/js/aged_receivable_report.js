@@ -60,6 +60,7 @@ class AgedReceivable extends owl.Component {
                 } else {
                     move_lines_total = value;
                     for (const moveLine of Object.values(move_lines_total)) {
+                        this.formatPartnerTotal(moveLine);
                         currency = moveLine.currency_id;
                         // Use raw values for summation
                         diff0Sum += moveLine.diff0_sum || 0;
@@ -82,14 +83,7 @@ class AgedReceivable extends owl.Component {
             self.state.diff3_sum = diff3Sum;
             self.state.diff4_sum = diff4Sum;
             self.state.diff5_sum = diff5Sum;
-            // Format totals for display
-            self.state.total_debit_display = formatFloat(TotalDebit, { digits: [0, 2] });
-            self.state.diff0_sum_display = formatFloat(diff0Sum, { digits: [0, 2] });
-            self.state.diff1_sum_display = formatFloat(diff1Sum, { digits: [0, 2] });
-            self.state.diff2_sum_display = formatFloat(diff2Sum, { digits: [0, 2] });
-            self.state.diff3_sum_display = formatFloat(diff3Sum, { digits: [0, 2] });
-            self.state.diff4_sum_display = formatFloat(diff4Sum, { digits: [0, 2] });
-            self.state.diff5_sum_display = formatFloat(diff5Sum, { digits: [0, 2] });
+            self.formatTotals();
         } catch (el) {
             window.location.href;
         }
@@ -286,6 +280,7 @@ class AgedReceivable extends owl.Component {
             } else {
                 move_lines_total = value;
                 for (const moveLine of Object.values(move_lines_total)) {
+                    this.formatPartnerTotal(moveLine);
                     diff0Sum += moveLine.diff0_sum || 0;
                     diff1Sum += moveLine.diff1_sum || 0;
                     diff2Sum += moveLine.diff2_sum || 0;
@@ -306,6 +301,37 @@ class AgedReceivable extends owl.Component {
         this.state.diff3_sum = diff3Sum
         this.state.diff4_sum = diff4Sum
         this.state.diff5_sum = diff5Sum
+        this.formatTotals();
+    }
+    formatAmount(value) {
+        /**
+         * Formats a raw amount of the report with thousand separators.
+         *
+         * @param {number} value - The amount to format.
+         * @returns {string} - The formatted amount.
+         */
+        return formatFloat(value || 0, { digits: [0, 2] });
+    }
+    formatPartnerTotal(partnerTotal) {
+        /**
+         * Adds the display values of the raw sums of a partner.
+         *
+         * @param {Object} partnerTotal - The sums of a partner.
+         */
+        for (const key of ['debit_sum', 'diff0_sum', 'diff1_sum', 'diff2_sum',
+                           'diff3_sum', 'diff4_sum', 'diff5_sum']) {
+            partnerTotal[`${key}_display`] = this.formatAmount(partnerTotal[key]);
+        }
+    }
+    formatTotals() {
+        /**
+         * Sets the display values of the grand totals.
+         */
+        this.state.total_debit_display = this.formatAmount(this.state.total_debit);
+        for (const key of ['diff0_sum', 'diff1_sum', 'diff2_sum', 'diff3_sum',
+                           'diff4_sum', 'diff5_sum']) {
+            this.state[`${key}_display`] = this.formatAmount(this.state[key]);
+        }
     }
     getDomain() {
         return [];
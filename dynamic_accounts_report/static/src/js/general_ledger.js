@@ -38,6 +38,8 @@ class GeneralLedger extends owl.Component {
             method: {
                         'accural': true
                     },
+            cursors: {},
+            expanded: {},
         });
         this.load_data(self.initial_render = true);
     }
@@ -52,58 +54,97 @@ class GeneralLedger extends owl.Component {
         });
     }
     async load_data() {
-        let account_list = []
-        let account_totals = ''
-        let totalDebitSum = 0;
-        let totalCreditSum = 0;
-        let currency;
         var self = this;
         var action_title = self.props.action.display_name;
         try {
-            var self = this;
-            let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [self.state.selected_journal_list, self.state.date_range, self.state.options, self.state.selected_analytic_list,self.state.method]);
+            let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [self.state.selected_journal_list, self.state.date_range, self.state.options, self.state.selected_analytic_list, self.state.method, true]);
             self.state.journals = filtered_data['journal_ids']
             self.state.analytics = filtered_data['analytic_ids']
-            account_totals = filtered_data['account_totals']
-            self.state.account_data = await self.orm.call("account.general.ledger", "view_report", [self.wizard_id, action_title,]);
-            for (const [index, value] of Object.entries(self.state.account_data)){
-                if (index !== 'account_totals' && index !== 'journal_ids' && index !== 'analytic_ids') {
-                    account_list.push(index)
-                } else if (index == 'journal_ids') {
-                    self.state.journals = value
-                }
-                else if (index == 'analytic_ids') {
-                    self.state.analytics = value
-                }
-                else {
-                    account_totals = value
-                    Object.values(account_totals).forEach(account_list => {
-                        currency = account_list.currency_id
-                        totalDebitSum += account_list.total_debit || 0;
-                        account_list.total_debit_display = this.formatNumberWithSeparators(account_list.total_debit || 0);
-                        totalCreditSum += account_list.total_credit || 0;
-                        account_list.total_credit_display = this.formatNumberWithSeparators(account_list.total_credit || 0);
-                        let balance = account_list.total_debit - account_list.total_credit;
-                        account_list.balance_display = this.formatNumberWithSeparators(balance);
-                    });
-                }
-            }
-            self.state.account = account_list
-            self.state.account_list = account_list
+            self.processLedgerData(filtered_data)
+            self.state.account_list = self.state.account
             self.state.account_data_list = self.state.account_data
-            self.state.account_total_list = account_totals
-            self.state.account_total = account_totals
-            self.state.currency = currency
-            self.state.total_debit = totalDebitSum.toFixed(2)
-            self.state.total_debit_display = this.formatNumberWithSeparators(self.state.total_debit)
-            self.state.total_credit = totalCreditSum.toFixed(2)
-            self.state.total_credit_display = this.formatNumberWithSeparators(self.state.total_credit)
+            self.state.account_total_list = self.state.account_total
             self.state.title = action_title
         }
         catch (el) {
             window.location.href;
         }
     }
+    processLedgerData(ledger_data) {
+        /**
+         * Stores the general ledger data in the state, computing the display
+         * values of the account totals and of the grand total.
+         *
+         * @param {Object} ledger_data - The data returned by get_filter_values.
+         */
+        let account_list = []
+        let account_totals = {}
+        let totalDebitSum = 0;
+        let totalCreditSum = 0;
+        let currency;
+        for (const [index, value] of Object.entries(ledger_data)) {
+            if (index !== 'account_totals' && index !== 'journal_ids' && index !== 'analytic_ids') {
+                account_list.push(index)
+            }
+            else if (index == 'account_totals') {
+                account_totals = value
+                Object.values(account_totals).forEach(account_total => {
+                    currency = account_total.currency_id
+                    totalDebitSum += account_total.total_debit || 0;
+                    account_total.total_debit_display = this.formatNumberWithSeparators(account_total.total_debit || 0);
+                    totalCreditSum += account_total.total_credit || 0;
+                    account_total.total_credit_display = this.formatNumberWithSeparators(account_total.total_credit || 0);
+                    let balance = account_total.total_debit - account_total.total_credit;
+                    account_total.balance_display = this.formatNumberWithSeparators(balance);
+                });
+            }
+        }
+        this.state.account = account_list
+        this.state.account_data = ledger_data
+        this.state.account_total = account_totals
+        this.state.currency = currency
+        this.state.cursors = {}
+        this.state.expanded = {}
+        this.state.total_debit = totalDebitSum.toFixed(2)
+        this.state.total_debit_display = this.formatNumberWithSeparators(this.state.total_debit)
+        this.state.total_credit = totalCreditSum.toFixed(2)
+        this.state.total_credit_display = this.formatNumberWithSeparators(this.state.total_credit)
+    }
+    async loadAccountLines(account) {
+        /**
+         * Fetches the next page of journal items of an account and appends it
+         * to the lines already displayed.
+         *
+         * @param {string} account - Display name of the account.
+         */
+        const cursor = this.state.cursors[account];
+        if (cursor === false) {
+            return;
+        }
+        const page = await this.orm.call("account.general.ledger", "get_account_lines", [this.state.account_total[account].account_id, this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list, this.state.method, cursor || null]);
+        this.state.account_data[account] = [...this.state.account_data[account], ...page.lines];
+        this.state.cursors[account] = page.cursor;
+    }
+    async toggleAccount(account) {
+        /**
+         * Expands or collapses an account, fetching its first page of journal
+         * items the first time it is expanded.
+         *
+         * @param {string} account - Display name of the account.
+         */
+        this.state.expanded[account] = !this.state.expanded[account];
+        if (this.state.expanded[account] && !(account in this.state.cursors)) {
+            await this.loadAccountLines(account);
+        }
+    }
+    async getPrintData() {
+        /**
+         * Fetches the complete general ledger, journal items included, for
+         * the PDF export; the XLSX export reads the items on the server.
+         */
+        let ledger_data = await this.orm.call("account.general.ledger", "get_filter_values", [this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list, this.state.method]);
+        return ledger_data;
+    }
     async printPdf(ev) {
         ev.preventDefault();
         var self = this;
@@ -115,6 +156,7 @@ class GeneralLedger extends owl.Component {
             'currency':this.state.currency  || false,
         }
         var action_title = self.props.action.display_name;
+        let account_data = await this.getPrintData();
         return self.action.doAction({
             'type': 'ir.actions.report',
             'report_type': 'qweb-pdf',
@@ -122,7 +164,7 @@ class GeneralLedger extends owl.Component {
             'report_file': 'dynamic_accounts_report.general_ledger',
             'data': {
                 'account': self.state.account,
-                'account_data': self.state.account_data,
+                'account_data': account_data,
                 'total': self.state.account_total,
                 'title': action_title,
                 'filters': this.filter(),
@@ -144,7 +186,13 @@ class GeneralLedger extends owl.Component {
         var action_title = self.props.action.display_name;
         var datas = {
             'account': self.state.account,
-            'data': self.state.account_data,
+            'query': {
+                'journal_id': self.state.selected_journal_list,
+                'date_range': self.state.date_range,
+                'options': self.state.options,
+                'analytic': self.state.selected_analytic_list,
+                'method': self.state.method,
+            },
             'total': self.state.account_total,
             'title': action_title,
             'filters': this.filter(),
@@ -190,10 +238,6 @@ class GeneralLedger extends owl.Component {
         return [];
     }
     async applyFilter(val, ev, is_delete = false) {
-        let account_list = []
-        let account_totals = ''
-        let totalDebitSum = 0;
-        let totalCreditSum = 0;
         this.state.account = null
         this.state.account_data = null
         this.state.account_total = null
@@ -306,41 +350,22 @@ class GeneralLedger extends owl.Component {
                 }
             }
         }
-        let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list,this.state.method]);
-        for (let index in filtered_data) {
-             const value = filtered_data[index];
-            if (index !== 'account_totals' && index !== 'journal_ids' && index !== 'analytic_ids') {
-                account_list.push(index)
-            }
-            else {
-                account_totals = value
-                Object.values(account_totals).forEach(account_list => {
-                        totalDebitSum += account_list.total_debit || 0;
-                        totalCreditSum += account_list.total_credit || 0;
-                    });
-            }
-        }
-        this.state.account = account_list
-        this.state.account_data = filtered_data
-        this.state.account_total = account_totals
-        this.state.total_debit = totalDebitSum.toFixed(2)
-        this.state.total_credit = totalCreditSum.toFixed(2)
+        let filtered_data = await this.orm.call("account.general.ledger", "get_filter_values", [this.state.selected_journal_list, this.state.date_range, this.state.options, this.state.selected_analytic_list, this.state.method, true]);
+        this.processLedgerData(filtered_data)
         if (this.unfoldButton.el.classList.contains("selected-filter")) {
             this.unfoldButton.el.classList.remove("selected-filter");
         }
     }
     async unfoldAll(ev) {
-        if (!ev.target.classList.contains("selected-filter")) {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                this.tbody.el.children[length].classList.add('show')
-            }
-            ev.target.classList.add("selected-filter");
-        } else {
-            for (var length = 0; length < this.tbody.el.children.length; length++) {
-                this.tbody.el.children[length].classList.remove('show')
-            }
-            ev.target.classList.remove("selected-filter");
+        const unfold = !ev.target.classList.contains("selected-filter");
+        const accounts = Object.keys(this.state.account_total);
+        if (unfold) {
+            await Promise.all(accounts.filter(account => !(account in this.state.cursors)).map(account => this.loadAccountLines(account)));
+        }
+        for (const account of accounts) {
+            this.state.expanded[account] = unfold;
         }
+        ev.target.classList.toggle("selected-filter", unfold);
     }
     filter() {
     var self=this;
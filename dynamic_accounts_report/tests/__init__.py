@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from . import test_aged_receivable
+from . import test_report_benchmark
+from . import test_report_cache
+from . import test_tax_report
+from . import test_trial_balance
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+import logging
+import random
+from datetime import date, timedelta
+
+from odoo import Command
+
+_logger = logging.getLogger(__name__)
+
+# Lines of an invoice with three product lines, its tax and receivable lines,
+# plus the two lines of its payment when it is paid.
+LINES_PER_INVOICE = 6
+
+
+class LedgerGenerator:
+    """Generate a synthetic, deterministic ledger to benchmark the reports.
+
+    The same parameters and seed always produce the same companies,
+    accounts, partners, invoices, payments, partial reconciles, analytic
+    lines and taxes, so that timings measured on two commits compare the
+    same data. The number of journal items is approximate, see
+    ``LINES_PER_INVOICE``.
+
+    The records are created through the ORM by batches; with ``commit``
+    set, each batch is committed, e.g. to fill a benchmark database from
+    ``odoo shell`` at the scale of millions of lines.
+    """
+
+    def __init__(self, env, lines=10000, companies=1, partners=200,
+                 accounts=20, analytic_accounts=10, date_from='2023-01-01',
+                 months=24, paid_ratio=0.7, partial_ratio=0.3,
+                 batch_size=500, seed=42, commit=False):
+        """
+        :param env: Environment to create the records with.
+        :param int lines: Approximate number of journal items to create,
+            shared between the companies.
+        :param int companies: Number of companies to create.
+        :param int partners: Number of partners, shared by the companies.
+        :param int accounts: Number of extra income and expense accounts per
+            company.
+        :param int analytic_accounts: Number of analytic accounts.
+        :param str date_from: Date of the first invoice.
+        :param int months: Number of months the invoices are spread over.
+        :param float paid_ratio: Share of the invoices having a payment.
+        :param float partial_ratio: Share of the payments paying half of the
+            invoice only.
+        :param int batch_size: Number of invoices created at once.
+        :param int seed: Seed of the random generator.
+        :param bool commit: Commit after each batch.
+        """
+        self.env = env(context=dict(env.context, tracking_disable=True,
+                                    mail_create_nolog=True,
+                                    mail_notrack=True))
+        self.lines = lines
+        self.companies = companies
+        self.partners = partners
+        self.accounts = accounts
+        self.analytic_accounts = analytic_accounts
+        self.date_from = date.fromisoformat(date_from)
+        self.days = months * 30
+        self.paid_ratio = paid_ratio
+        self.partial_ratio = partial_ratio
+        self.batch_size = batch_size
+        self.commit = commit
+        self.random = random.Random(seed)
+
+    def generate(self):
+        """
+        Create the ledger.
+
+        :return: Summary of the generated data: the companies, the date range
+            and the number of records created.
+        :rtype: dict
+        """
+        partners = self._create_partners()
+        analytic_accounts = self._create_analytic_accounts()
+        companies = self.env['res.company']
+        counts = {'invoices': 0, 'payments': 0}
+        for index in range(self.companies):
+            company = self._create_company(index)
+            companies |= company
+            invoices, payments = self._create_company_moves(
+                company, partners, analytic_accounts,
+                self.lines // self.companies // LINES_PER_INVOICE or 1)
+            counts['invoices'] += invoices
+            counts['payments'] += payments
+        self.env.flush_all()
+        return {
+            'company_ids': companies.ids,
+            'date_from': self.date_from.isoformat(),
+            'date_to': (self.date_from + timedelta(days=self.days)).isoformat(),
+            'lines': self.env['account.move.line'].search_count(
+                [('company_id', 'in', companies.ids)]),
+            'partners': len(partners),
+            'analytic_accounts': len(analytic_accounts),
+            **counts,
+        }
+
+    def _commit(self):
+        """Write the batch to the database and empty the caches, so that the
+        memory used does not grow with the size of the ledger."""
+        self.env.flush_all()
+        if self.commit:
+            self.env.cr.commit()
+        self.env.invalidate_all()
+
+    def _create_partners(self):
+        """Create the partners, customers and vendors at the same time."""
+        return self.env['res.partner'].create([{
+            'name': f'Benchmark Partner {index:05d}',
+            'company_id': False,
+        } for index in range(self.partners)])
+
+    def _create_analytic_accounts(self):
+        """Create the analytic accounts of a dedicated plan."""
+        plan = self.env['account.analytic.plan'].create(
+            {'name': 'Benchmark Plan'})
+        return self.env['account.analytic.account'].create([{
+            'name': f'Benchmark Analytic {index:03d}',
+            'plan_id': plan.id,
+            'company_id': False,
+        } for index in range(self.analytic_accounts)])
+
+    def _create_company(self, index):
+        """Create a company with the generic chart of accounts and extra
+        income and expense accounts."""
+        company = self.env['res.company'].create(
+            {'name': f'Benchmark Company {index:02d}'})
+        self.env.user.company_ids |= company
+        self.env['account.chart.template'].try_loading(
+            'generic_coa', company=company, install_demo=False)
+        self.env['account.account'].create([{
+            'name': f'Benchmark {account_type} {number:03d}',
+            'code': f'{code}{number:03d}',
+            'account_type': account_type,
+            'company_ids': [Command.set(company.ids)],
+        } for account_type, code in (('income', '4900'), ('expense', '6900'))
+            for number in range(self.accounts)])
+        return company
+
+    def _get_company_data(self, company):
+        """Return the journals, accounts and taxes the moves of a company are
+        created with."""
+        Account = self.env['account.account'].with_company(company)
+        Journal = self.env['account.journal'].with_company(company)
+        Tax = self.env['account.tax'].with_company(company)
+        company_domain = [('company_ids', 'in', company.ids)]
+        data = {
+            'bank_journal': Journal.search(
+                [('company_id', '=', company.id), ('type', '=', 'bank')],
+                limit=1),
+            'income_accounts': Account.search(
+                company_domain + [('account_type', '=', 'income')]),
+            'expense_accounts': Account.search(
+                company_domain + [('account_type', '=', 'expense')]),
+        }
+        for tax_type in ('sale', 'purchase'):
+            data[f'{tax_type}_tax'] = Tax.search([
+                ('company_id', '=', company.id),
+                ('type_tax_use', '=', tax_type),
+                ('amount_type', '=', 'percent'),
+            ], limit=1) or Tax.create({
+                'name': f'Benchmark {tax_type} tax 15%',
+                'type_tax_use': tax_type,
+                'amount': 15.0,
+                'company_id': company.id,
+            })
+        return data
+
+    def _create_company_moves(self, company, partners, analytic_accounts,
+                              invoice_count):
+        """
+        Create the invoices and bills of a company and pay part of them.
+
+        :return: Number of invoices and of payments created.
+        :rtype: tuple
+        """
+        env = self.env(context=dict(self.env.context,
+                                    allowed_company_ids=company.ids))
+        data = self._get_company_data(company)
+        payment_count = 0
+        for start in range(0, invoice_count, self.batch_size):
+            size = min(self.batch_size, invoice_count - start)
+            invoices = env['account.move'].create([
+                self._get_invoice_values(data, partners, analytic_accounts)
+                for _index in range(size)])
+            invoices.action_post()
+            payment_count += self._pay_invoices(env, data, invoices)
+            self._commit()
+            _logger.info("Generated %s/%s invoices of %s", start + size,
+                         invoice_count, company.name)
+        return invoice_count, payment_count
+
+    def _get_date(self):
+        """Return a random date within the generated period."""
+        return self.date_from + timedelta(
+            days=self.random.randrange(self.days))
+
+    def _get_invoice_values(self, data, partners, analytic_accounts):
+        """Return the values of a random customer invoice or vendor bill of
+        three lines."""
+        is_sale = self.random.random() < 0.6
+        accounts = data['income_accounts' if is_sale else 'expense_accounts']
+        tax = data['sale_tax' if is_sale else 'purchase_tax']
+        invoice_date = self._get_date()
+        line_values = []
+        for _index in range(3):
+            values = {
+                'name': 'Benchmark line',
+                'quantity': self.random.randint(1, 10),
+                'price_unit': self.random.randint(10, 5000),
+                'account_id': self.random.choice(accounts).id,
+                'tax_ids': [Command.set(tax.ids)],
+            }
+            if analytic_accounts and self.random.random() < 0.5:
+                analytic_account = self.random.choice(analytic_accounts)
+                values['analytic_distribution'] = {
+                    str(analytic_account.id): 100}
+            line_values.append(Command.create(values))
+        return {
+            'move_type': 'out_invoice' if is_sale else 'in_invoice',
+            'partner_id': self.random.choice(partners).id,
+            'invoice_date': invoice_date,
+            'date': invoice_date,
+            'invoice_date_due': invoice_date + timedelta(
+                days=self.random.choice((0, 15, 30, 60))),
+            'invoice_line_ids': line_values,
+        }
+
+    def _pay_invoices(self, env, data, invoices):
+        """
+        Create and reconcile a bank entry paying part of the invoices, fully
+        or by half.
+
+        :return: Number of payments created.
+        :rtype: int
+        """
+        journal = data['bank_journal']
+        to_pay = []
+        for invoice in invoices:
+            if self.random.random() >= self.paid_ratio:
+                continue
+            counterpart = invoice.line_ids.filtered(
+                lambda line: line.account_id.account_type in (
+                    'asset_receivable', 'liability_payable'))[:1]
+            amount = counterpart.balance
+            if self.random.random() < self.partial_ratio:
+                amount = invoice.currency_id.round(amount / 2)
+            payment_date = invoice.invoice_date + timedelta(
+                days=self.random.randrange(90))
+            to_pay.append((counterpart, {
+                'move_type': 'entry',
+                'journal_id': journal.id,
+                'date': payment_date,
+                'partner_id': invoice.partner_id.id,
+                'line_ids': [
+                    Command.create({
+                        'account_id': counterpart.account_id.id,
+                        'partner_id': invoice.partner_id.id,
+                        'balance': -amount,
+                    }),
+                    Command.create({
+                        'account_id': journal.default_account_id.id,
+                        'partner_id': invoice.partner_id.id,
+                        'balance': amount,
+                    }),
+                ],
+            }))
+        if not to_pay:
+            return 0
+        payments = env['account.move'].create(
+            [values for _counterpart, values in to_pay])
+        payments.action_post()
+        env['account.move.line']._reconcile_plan([
+            counterpart + payment.line_ids.filtered(
+                lambda line: line.account_id == counterpart.account_id)
+            for (counterpart, _values), payment in zip(to_pay, payments)
+        ])
+        return len(payments)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAgedReceivable(AccountTestInvoicingCommon):
+
+    def test_aged_receivable_buckets(self):
+        for invoice_date, amount in (('2024-01-31', 100.0),
+                                     ('2024-03-11', 200.0),
+                                     ('2024-03-31', 400.0)):
+            self.init_invoice(
+                'out_invoice', partner=self.partner_a,
+                invoice_date=invoice_date, amounts=[amount], taxes=[],
+                post=True)
+        data = self.env['age.receivable.report'].get_filter_values(
+            '2024-03-31', [self.partner_a.id])
+        totals = data['partner_totals'][self.partner_a.name]
+        self.assertEqual(totals['diff0_sum'], 400.0)
+        self.assertEqual(totals['diff1_sum'], 200.0)
+        self.assertEqual(totals['diff2_sum'], 100.0)
+        self.assertEqual(totals['debit_sum'], 700.0)
+        self.assertEqual(
+            sorted(line['diff2'] for line in data[self.partner_a.name]),
+            [0.0, 0.0, 100.0])
+
+        data = self.env['age.receivable.report'].get_filter_values(
+            '2024-02-29', [self.partner_a.id])
+        totals = data['partner_totals'][self.partner_a.name]
+        self.assertEqual(totals['diff0_sum'], 0.0)
+        self.assertEqual(totals['diff1_sum'], 100.0)
+        self.assertEqual(totals['debit_sum'], 100.0)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import subprocess
+import time
+
+from odoo.tests import TransactionCase, tagged
+
+from .ledger_generator import LedgerGenerator
+
+_logger = logging.getLogger(__name__)
+
+# Wizards of base_accounting_kit printing a report of its report/ directory.
+REPORT_WIZARDS = [
+    'account.aged.trial.balance',
+    'account.balance.report',
+    'account.bank.book.report',
+    'account.cash.book.report',
+    'account.day.book.report',
+    'account.print.journal',
+    'account.report.general.ledger',
+    'account.report.partner.ledger',
+    'cash.flow.report',
+    'financial.report',
+    'kit.account.tax.report',
+]
+
+
+@tagged('report_benchmark', '-standard', 'post_install', '-at_install')
+class TestReportBenchmark(TransactionCase):
+    """Time every report entry point on a synthetic ledger.
+
+    Not part of the standard tests, run it with
+    ``--test-tags report_benchmark``. The scale is set by the environment
+    variables ``REPORT_BENCHMARK_LINES`` (10000 by default) and
+    ``REPORT_BENCHMARK_COMPANIES`` (1), and the results are written as JSON
+    to ``REPORT_BENCHMARK_OUTPUT`` (report_benchmark.json by default), to be
+    compared between commits.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.scale = int(os.environ.get('REPORT_BENCHMARK_LINES', 10000))
+        cls.env = cls.env(user=cls.env.ref('base.user_admin'))
+        start = time.perf_counter()
+        cls.ledger = LedgerGenerator(
+            cls.env, lines=cls.scale,
+            companies=int(os.environ.get('REPORT_BENCHMARK_COMPANIES', 1)),
+        ).generate()
+        cls.ledger['generation_time'] = time.perf_counter() - start
+        cls.env = cls.env(context=dict(
+            cls.env.context, allowed_company_ids=cls.ledger['company_ids']))
+
+    def _measure(self, call):
+        """
+        Run a report entry point with empty caches.
+
+        :param call: Function without argument running the entry point.
+        :return: The time and number of SQL queries it took.
+        :rtype: dict
+        """
+        self.env['dynamic.report.cache'].sudo().search([]).unlink()
+        self.env.flush_all()
+        self.env.invalidate_all()
+        query_count = self.cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            with self.cr.savepoint():
+                call()
+        except Exception as error:
+            _logger.exception("Report benchmark entry point failed")
+            return {'error': repr(error)}
+        return {
+            'time': round(time.perf_counter() - start, 4),
+            'queries': self.cr.sql_log_count - query_count,
+        }
+
+    def _get_dynamic_report_calls(self):
+        """Return the ``view_report`` and ``get_filter_values`` calls of the
+        dynamic reports, with the arguments their client actions send."""
+        date_from, date_to = self.ledger['date_from'], self.ledger['date_to']
+        balance_sheet = self.env['dynamic.balance.sheet.report'].create({})
+        calls = {
+            'dynamic.balance.sheet.report.view_report': (
+                'dynamic.balance.sheet.report', 'view_report',
+                (balance_sheet.id, False, None)),
+        }
+        arguments = {
+            'account.general.ledger': (
+                (None, None), ([], 'year', {}, [], {})),
+            'account.partner.ledger': (
+                (None, None), ([], 'year', {}, {})),
+            'account.trial.balance': (
+                (), (date_from, date_to, '1', 'month', [], [], {}, {})),
+            'age.receivable.report': ((), (date_to, [])),
+            'age.payable.report': ((), (date_to, [])),
+            'bank.book.report': ((), ([], 'year', [], {})),
+            'cash.book.report': ((), ([], 'year', [], {})),
+            'tax.report': ((), (date_from, date_to, '1', 'month', {}, {})),
+        }
+        for model, (view_args, filter_args) in arguments.items():
+            calls[f'{model}.view_report'] = (model, 'view_report', view_args)
+            calls[f'{model}.get_filter_values'] = (
+                model, 'get_filter_values', filter_args)
+        return {
+            name: (lambda model=model, method=method, args=args:
+                   getattr(self.env[model], method)(*args))
+            for name, (model, method, args) in calls.items()
+        }
+
+    def _get_wizard_values(self, model):
+        """Return the values to print a report wizard over the whole
+        ledger."""
+        wizard_fields = self.env[model]._fields
+        values = {}
+        if 'date_from' in wizard_fields:
+            values['date_from'] = self.ledger['date_from']
+        if 'date_to' in wizard_fields:
+            values['date_to'] = self.ledger['date_to']
+        if 'journal_ids' in wizard_fields:
+            values['journal_ids'] = self.env['account.journal'].search([]).ids
+        if 'account_report_id' in wizard_fields:
+            values['account_report_id'] = self.env[
+                'account.financial.report'].search([], limit=1).id
+        return values
+
+    def _get_kit_report_calls(self):
+        """Return the ``_get_report_values`` calls of the reports of
+        base_accounting_kit, with the data their wizards print them with."""
+        calls = {}
+        for model in REPORT_WIZARDS:
+            wizard = self.env[model].create(self._get_wizard_values(model))
+            action = wizard.check_report()
+            report_model = f"report.{action['report_name']}"
+            # The web client runs the report with the wizard as active record
+            calls[f'{report_model}._get_report_values ({model})'] = (
+                lambda report_model=report_model, action=action,
+                wizard=wizard: self.env[report_model].with_context(
+                    active_model=wizard._name, active_id=wizard.id,
+                    active_ids=wizard.ids)._get_report_values(
+                    action['context'].get('active_ids', wizard.ids),
+                    data=action['data']))
+        return calls
+
+    def _get_git_commit(self):
+        """Return the commit the benchmark runs on, if known."""
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'], text=True,
+                cwd=os.path.dirname(__file__),
+                stderr=subprocess.DEVNULL).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def test_report_benchmark(self):
+        calls = {**self._get_dynamic_report_calls(),
+                 **self._get_kit_report_calls()}
+        results = {name: self._measure(call)
+                   for name, call in sorted(calls.items())}
+        output = os.environ.get('REPORT_BENCHMARK_OUTPUT',
+                                'report_benchmark.json')
+        with open(output, 'w') as benchmark_file:
+            json.dump({
+                'commit': self._get_git_commit(),
+                'scale': self.scale,
+                'ledger': self.ledger,
+                'results': results,
+            }, benchmark_file, indent=2, sort_keys=True)
+        _logger.info("Report benchmark results written to %s", output)
+        failed = {name: result['error'] for name, result in results.items()
+                  if 'error' in result}
+        self.assertFalse(failed, "Some report entry points failed")
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestReportCache(AccountTestInvoicingCommon):
+
+    def _create_entry(self, date):
+        """Create a draft 100.0 miscellaneous entry dated ``date``."""
+        return self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': date,
+            'journal_id': self.company_data['default_journal_misc'].id,
+            'line_ids': [
+                Command.create({
+                    'account_id': self.company_data[
+                        'default_account_expense'].id,
+                    'debit': 100.0,
+                }),
+                Command.create({
+                    'account_id': self.company_data[
+                        'default_account_revenue'].id,
+                    'credit': 100.0,
+                }),
+            ],
+        })
+
+    def _get_trial_balance(self):
+        return self.env['account.trial.balance'].get_filter_values(
+            '2024-01-01', '2024-01-31', '', 'month', [], [], {}, {})
+
+    def test_cached_result_is_reused(self):
+        self._create_entry('2024-01-10').action_post()
+        self._get_trial_balance()
+        query_count = self.cr.sql_log_count
+        self._get_trial_balance()
+        # Only the lookup of the cached entry is issued, not the report
+        self.assertLessEqual(self.cr.sql_log_count - query_count, 5)
+
+    def test_posting_invalidates_result(self):
+        cache = self.env['dynamic.report.cache'].sudo()
+        entry = self._create_entry('2024-01-10')
+        self._get_trial_balance()
+        self.assertEqual(cache.search_count(
+            [('report_model', '=', 'account.trial.balance')]), 1)
+        # A later entry does not change the January figures
+        self._create_entry('2024-03-10').action_post()
+        self.assertEqual(cache.search_count(
+            [('report_model', '=', 'account.trial.balance')]), 1)
+        entry.action_post()
+        self.assertFalse(cache.search_count(
+            [('report_model', '=', 'account.trial.balance')]))
+        lines = self._get_trial_balance()
+        expense = next(
+            line for line in lines if line['account_id']
+            == self.company_data['default_account_expense'].id)
+        self.assertEqual(expense['total_debit'], 100.0)
+
+    def test_oversized_result_is_not_stored(self):
+        self.env['ir.config_parameter'].sudo().set_param(
+            'dynamic_accounts_report.report_cache_result_size', 10)
+        self._create_entry('2024-01-10').action_post()
+        self.assertTrue(self._get_trial_balance())
+        self.assertFalse(self.env['dynamic.report.cache'].sudo().search_count(
+            [('report_model', '=', 'account.trial.balance')]))
+
+    def test_year_comparison_scope_reaches_fiscal_year_end(self):
+        cache = self.env['dynamic.report.cache'].sudo()
+        self.env['account.trial.balance'].get_filter_values(
+            '2024-01-01', '2024-01-31', '', 'year', [], [], {}, {})
+        entry = cache.search(
+            [('report_model', '=', 'account.trial.balance')])
+        self.assertEqual(str(entry.date_to), '2024-12-31')
+        # The year comparison reads the whole fiscal year
+        self._create_entry('2024-06-10').action_post()
+        self.assertFalse(entry.exists())
+
+    def test_journal_change_invalidates_results(self):
+        cache = self.env['dynamic.report.cache'].sudo()
+        self.env['account.trial.balance'].view_report()
+        self.assertTrue(cache.search_count(
+            [('report_model', '=', 'account.trial.balance')]))
+        self.company_data['default_journal_misc'].name = 'Renamed'
+        self.assertFalse(cache.search_count(
+            [('report_model', '=', 'account.trial.balance')]))
+        journal_names = [journal['name'] for journal in self.env[
+            'account.trial.balance'].view_report()[1]['journal_ids']]
+        self.assertIn('Renamed', journal_names)
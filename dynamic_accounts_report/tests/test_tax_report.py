@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTaxReport(AccountTestInvoicingCommon):
+
+    def test_tax_of_comparison_period_is_listed(self):
+        self.init_invoice(
+            'out_invoice', partner=self.partner_a, invoice_date='2024-01-15',
+            amounts=[100.0], taxes=self.tax_sale_a, post=True)
+        data = self.env['tax.report'].get_filter_values(
+            '2024-02-01', '2024-02-29', '1', 'month', {}, {})
+        line = next(line for line in data['sale']
+                    if line['name'] == self.tax_sale_a.name)
+        self.assertEqual(line['net'], 0.0)
+        self.assertEqual(
+            line['dynamic net']['dynamic_total_net_sum1'], 100.0)
+        # The account layout only shows the rows of the reported period
+        data = self.env['tax.report'].get_filter_values(
+            '2024-02-01', '2024-02-29', '1', 'month', {}, 'account')
+        self.assertFalse(data['sale'])
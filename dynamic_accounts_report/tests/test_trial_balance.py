@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTrialBalance(AccountTestInvoicingCommon):
+
+    def _create_accounts_with_entries(self, count, prefix):
+        """Create ``count`` expense accounts having one posted line each in
+        January 2024 and one in December 2023."""
+        accounts = self.env['account.account'].create([{
+            'name': f'Benchmark {prefix} {index}',
+            'code': f'{prefix}{index:04d}',
+            'account_type': 'expense',
+        } for index in range(count)])
+        for date in ('2023-12-15', '2024-01-15'):
+            move = self.env['account.move'].create({
+                'move_type': 'entry',
+                'date': date,
+                'journal_id': self.company_data['default_journal_misc'].id,
+                'line_ids': [
+                    Command.create({'account_id': account.id, 'debit': 10.0})
+                    for account in accounts
+                ] + [Command.create({
+                    'account_id': self.company_data[
+                        'default_account_revenue'].id,
+                    'credit': 10.0 * count,
+                })],
+            })
+            move.action_post()
+        return accounts
+
+    def _get_filter_values_query_count(self):
+        """Run the trial balance with three month comparisons and return the
+        number of SQL queries it issued."""
+        self.env.invalidate_all()
+        query_count = self.cr.sql_log_count
+        self.env['account.trial.balance'].get_filter_values(
+            '2024-01-01', '2024-01-31', '3', 'month', [], [], {}, {})
+        return self.cr.sql_log_count - query_count
+
+    def test_trial_balance_amounts(self):
+        account = self._create_accounts_with_entries(1, 'TBA')
+        lines = self.env['account.trial.balance'].get_filter_values(
+            '2024-01-01', '2024-01-31', '1', 'month', [], [], {}, {})
+        line = next(line for line in lines if line['account_id'] == account.id)
+        self.assertEqual(line['initial_total_debit'], 0.0)
+        self.assertEqual(line['dynamic_total_debit_1'], 10.0)
+        self.assertEqual(line['total_debit'], 10.0)
+        self.assertEqual(line['end_total_debit'], 20.0)
+        self.assertEqual(line['end_total_credit'], 0.0)
+
+    def test_trial_balance_query_count_is_flat(self):
+        self._create_accounts_with_entries(5, 'TBS')
+        small_chart_count = self._get_filter_values_query_count()
+        self._create_accounts_with_entries(100, 'TBL')
+        large_chart_count = self._get_filter_values_query_count()
+        self.assertEqual(small_chart_count, large_chart_count)